@@ -1,4 +1,5 @@
-from django.db import models as django_models
+from django.db import models as django_models, transaction
+from django.utils import timezone
 
 
 class BackupManager(django_models.Manager):
@@ -12,3 +13,47 @@ class BackupManager(django_models.Manager):
 
     def get_deleted(self):
         return super(BackupManager, self).get_queryset()
+
+    def get_expired(self):
+        return self.get_queryset().filter(kept_until__lt=timezone.now())
+
+    def get_extra(self, schedule=None):
+        """ Return queryset of the oldest backups of schedules that have more than maximal_number_of_backups """
+        queryset = self.get_active().filter(backup_schedule__isnull=False)
+        if schedule is not None:
+            queryset = queryset.filter(backup_schedule=schedule)
+        rows = (queryset
+                .order_by('backup_schedule', '-created_at', '-pk')
+                .values_list('pk', 'backup_schedule', 'backup_schedule__maximal_number_of_backups'))
+
+        extra_ids = []
+        kept = {}
+        for pk, schedule_id, maximal_number_of_backups in rows:
+            kept[schedule_id] = kept.get(schedule_id, 0) + 1
+            if kept[schedule_id] > maximal_number_of_backups:
+                extra_ids.append(pk)
+        return self.get_queryset().filter(pk__in=extra_ids)
+
+    def start_deletion(self, queryset):
+        """ Move ready backups of queryset to deleting state and start their deletion tasks.
+            Return list of uuids of backups that are being deleted.
+
+            State change is committed before tasks are started only if there is no outer transaction,
+            so this method must not be called within atomic block - otherwise workers may pick backups
+            that are not in deleting state yet. Its callers (schedule execution and retention tasks)
+            run in autocommit mode.
+        """
+        from nodeconductor.backup import tasks
+
+        with transaction.atomic():
+            backups = list(queryset.filter(state=self.model.States.READY).select_for_update())
+            for backup in backups:
+                # state is changed by transition, so its checks and signals are not bypassed
+                backup._starting_deletion()
+                backup.save(update_fields=['state'])
+
+        # tasks are started outside of atomic block, when state of backups is already committed
+        uuids = [backup.uuid.hex for backup in backups]
+        for uuid in uuids:
+            tasks.deletion_task.delay(uuid)
+        return uuids
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backup', '0004_backupschedule_timezone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackupJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('pending_steps', models.PositiveSmallIntegerField(default=0)),
+                ('is_joined', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('backup', models.OneToOneField(related_name='job', to='backup.Backup')),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.CreateModel(
+            name='BackupJobStep',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('name', models.CharField(max_length=50)),
+                ('parameters', jsonfield.fields.JSONField(blank=True)),
+                ('result', jsonfield.fields.JSONField(null=True, blank=True)),
+                ('state', models.PositiveSmallIntegerField(default=1, choices=[(1, 'Pending'), (2, 'Done'), (3, 'Erred')])),
+                ('job', models.ForeignKey(related_name='steps', to='backup.BackupJob')),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='backupjobstep',
+            unique_together=set([('job', 'name')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='backupschedule',
+            index_together=set([('is_active', 'next_trigger_at')]),
+        ),
+    ]
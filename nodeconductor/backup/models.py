@@ -5,7 +5,8 @@ import logging
 import pytz
 
 from croniter.croniter import croniter
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone as django_timezone
 from django.utils import six
 from django.utils.encoding import python_2_unicode_compatible
@@ -36,13 +37,16 @@ class BackupSourceAbstractModel(models.Model):
 
 
 @python_2_unicode_compatible
-class BackupSchedule(core_models.UuidMixin,
+class BackupSchedule(core_models.ChangeTrackingMixin,
+                     core_models.UuidMixin,
                      core_models.DescribableMixin,
                      LoggableMixin,
                      BackupSourceAbstractModel):
     """
     Model representing a backup schedule for a generic object.
     """
+    TRACKED_FIELDS = ('is_active', 'schedule')
+
     # backup specific settings
     retention_time = models.PositiveIntegerField(
         help_text='Retention time in days')  # if 0 - backup will be kept forever
@@ -52,6 +56,10 @@ class BackupSchedule(core_models.UuidMixin,
     is_active = models.BooleanField(default=False)
     timezone = models.CharField(max_length=50, default=django_timezone.get_current_timezone_name)
 
+    class Meta(object):
+        # due schedules are selected by this index
+        index_together = (('is_active', 'next_trigger_at'),)
+
     def __str__(self):
         return '%(uuid)s BackupSchedule of %(object)s' % {
             'uuid': self.uuid,
@@ -95,24 +103,28 @@ class BackupSchedule(core_models.UuidMixin,
 
     def _delete_extra_backups(self):
         """
-        Deletes oldest existing backups if maximal_number_of_backups was reached
+        Deletes oldest existing backups if maximal_number_of_backups was reached.
+        Must not be called within atomic block, see BackupManager.start_deletion.
         """
-        exclude_states = (Backup.States.DELETING, Backup.States.DELETED, Backup.States.ERRED)
-        backups_count = self.backups.exclude(state__in=exclude_states).count()
-        extra_backups_count = backups_count - self.maximal_number_of_backups
-        if extra_backups_count > 0:
-            for backup in self.backups.order_by('created_at')[:extra_backups_count]:
-                backup.start_deletion()
+        Backup.objects.start_deletion(Backup.objects.get_extra(schedule=self))
 
     def execute(self):
         """
         Creates new backup, deletes existing if maximal_number_of_backups was
         reached, calculates new next_trigger_at time.
+        Return False if schedule has been already executed by concurrent process.
         """
+        previous_trigger_at = self.next_trigger_at
+        self._update_next_trigger_at()
+        # claim execution of the schedule: only one process can move trigger time
+        claimed = BackupSchedule.objects.filter(pk=self.pk, next_trigger_at=previous_trigger_at).update(
+            next_trigger_at=self.next_trigger_at)
+        if not claimed:
+            return False
+
         self._create_backup()
         self._delete_extra_backups()
-        self._update_next_trigger_at()
-        self.save()
+        return True
 
     def save(self, *args, **kwargs):
         """
@@ -121,13 +133,7 @@ class BackupSchedule(core_models.UuidMixin,
          - instance.schedule changed
          - instance is new
         """
-        try:
-            prev_instance = BackupSchedule.objects.get(pk=self.pk)
-        except BackupSchedule.DoesNotExist:
-            prev_instance = None
-
-        if prev_instance is None or (not prev_instance.is_active and self.is_active or
-                                     self.schedule != prev_instance.schedule):
+        if self.pk is None or self.has_changed('schedule') or (self.is_active and self.has_changed('is_active')):
             self._update_next_trigger_at()
 
         super(BackupSchedule, self).save(*args, **kwargs)
@@ -277,6 +283,64 @@ class Backup(core_models.UuidMixin,
         return ('uuid', 'name', 'backup_source')
 
 
+class BackupJob(models.Model):
+    """
+    Backup creation split to steps (e.g. snapshot of each volume) that are executed
+    by independent tasks. The last finished step joins results into backup metadata.
+    """
+    backup = models.OneToOneField(Backup, related_name='job')
+    pending_steps = models.PositiveSmallIntegerField(default=0)
+    is_joined = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    @transaction.atomic
+    def create_for_backup(cls, backup, steps):
+        """ Create job with steps [(name, parameters), ...] """
+        job = cls.objects.create(backup=backup, pending_steps=len(steps))
+        BackupJobStep.objects.bulk_create(
+            [BackupJobStep(job=job, name=name, parameters=parameters) for name, parameters in steps])
+        return job
+
+    def finish_step(self):
+        """ Decrease number of pending steps. Return True if caller has to join the job. """
+        BackupJob.objects.filter(pk=self.pk, pending_steps__gt=0).update(pending_steps=F('pending_steps') - 1)
+        # only one of concurrently finished steps succeeds to mark job as joined
+        return bool(BackupJob.objects.filter(pk=self.pk, pending_steps=0, is_joined=False).update(is_joined=True))
+
+    def get_results(self):
+        """ Return results of successful steps {name: result} and names of failed steps """
+        results, failed = {}, []
+        for step in self.steps.all():
+            if step.state == BackupJobStep.States.DONE:
+                results[step.name] = step.result
+            else:
+                failed.append(step.name)
+        return results, failed
+
+
+class BackupJobStep(models.Model):
+    class States(object):
+        PENDING = 1
+        DONE = 2
+        ERRED = 3
+
+        CHOICES = (
+            (PENDING, 'Pending'),
+            (DONE, 'Done'),
+            (ERRED, 'Erred'),
+        )
+
+    job = models.ForeignKey(BackupJob, related_name='steps')
+    name = models.CharField(max_length=50)
+    parameters = JSONField(blank=True)
+    result = JSONField(blank=True, null=True)
+    state = models.PositiveSmallIntegerField(default=States.PENDING, choices=States.CHOICES)
+
+    class Meta(object):
+        unique_together = ('job', 'name')
+
+
 class BackupStrategy(object):
     """
     A parent class for the model-specific backup strategies.
@@ -291,6 +355,32 @@ class BackupStrategy(object):
         raise NotImplementedError(
             'Implement backup() that would perform backup of a model.')
 
+    @classmethod
+    def get_backup_steps(cls, backup_source):
+        """
+        Return list of independent steps [(name, parameters), ...] to execute backup in parallel
+        or None if backup has to be performed by backup() in one task.
+        Parameters have to be JSON serializable.
+        """
+        return None
+
+    @classmethod
+    def execute_backup_step(cls, backup_source, name, parameters):
+        raise NotImplementedError(
+            'Implement execute_backup_step() that would perform one step of backup and return its result.')
+
+    @classmethod
+    def join_backup_steps(cls, backup_source, results):
+        raise NotImplementedError(
+            'Implement join_backup_steps() that would return backup metadata from results of steps.')
+
+    @classmethod
+    def revert_backup_steps(cls, backup_source, results):
+        """
+        Clean up results of successful steps if some steps of backup failed
+        """
+        pass
+
     @classmethod
     def restore(cls, backup_source, metadata, user_input):
         raise NotImplementedError(
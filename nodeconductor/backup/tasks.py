@@ -5,11 +5,43 @@ from django.utils import timezone
 
 from nodeconductor.backup import models, exceptions
 from nodeconductor.backup.log import event_logger, extract_event_context
+from nodeconductor.core.utils import prefetch_generic_relation
 
 
 logger = logging.getLogger(__name__)
 
 
+def _backup_succeeded(backup, metadata):
+    backup.metadata = metadata
+    backup.confirm_backup()
+
+    logger.info('Successfully performed backup for backup source: %s', backup.backup_source.name)
+    event_logger.backup.info(
+        'Backup for {iaas_instance_name} has been created.',
+        event_type='iaas_backup_creation_succeeded',
+        event_context=extract_event_context(backup))
+
+
+def _backup_failed(backup):
+    schedule = backup.backup_schedule
+    if schedule:
+        schedule.is_active = False
+        schedule.save()
+
+        event_logger.backup_schedule.info(
+            'Backup schedule for {iaas_instance_name} has been deactivated.',
+            event_type='iaas_backup_schedule_deactivated',
+            event_context=extract_event_context(schedule))
+
+    logger.exception('Failed to perform backup for backup source: %s', backup.backup_source.name)
+    event_logger.backup.info(
+        'Backup creation for {iaas_instance_name} has failed.',
+        event_type='iaas_backup_creation_failed',
+        event_context=extract_event_context(backup))
+
+    backup.erred()
+
+
 @shared_task
 def process_backup_task(backup_uuid):
     try:
@@ -24,38 +56,56 @@ def process_backup_task(backup_uuid):
 
             try:
                 strategy = backup.get_strategy()
-                backup.metadata = strategy.backup(source)
-                backup.confirm_backup()
+                steps = strategy.get_backup_steps(source)
+                if steps:
+                    job = models.BackupJob.create_for_backup(backup, steps)
+                    for step_id in job.steps.values_list('pk', flat=True):
+                        backup_step_task.delay(step_id)
+                    return
+                metadata = strategy.backup(source)
             except exceptions.BackupStrategyExecutionError:
-                schedule = backup.backup_schedule
-                if schedule:
-                    schedule.is_active = False
-                    schedule.save()
-
-                    event_logger.backup_schedule.info(
-                        'Backup schedule for {iaas_instance_name} has been deactivated.',
-                        event_type='iaas_backup_schedule_deactivated',
-                        event_context=extract_event_context(schedule))
-
-                logger.exception('Failed to perform backup for backup source: %s', source.name)
-                event_logger.backup.info(
-                    'Backup creation for {iaas_instance_name} has failed.',
-                    event_type='iaas_backup_creation_failed',
-                    event_context=extract_event_context(backup))
-
-                backup.erred()
+                _backup_failed(backup)
             else:
-                logger.info('Successfully performed backup for backup source: %s', source.name)
-                event_logger.backup.info(
-                    'Backup for {iaas_instance_name} has been created.',
-                    event_type='iaas_backup_creation_succeeded',
-                    event_context=extract_event_context(backup))
+                _backup_succeeded(backup, metadata)
         else:
             logger.exception('Process backup task was called for backup with no source. Backup uuid: %s', backup_uuid)
     except models.Backup.DoesNotExist:
         logger.exception('Process backup task was called for backed with uuid %s which does not exist', backup_uuid)
 
 
+@shared_task
+def backup_step_task(step_id):
+    step = models.BackupJobStep.objects.select_related('job__backup').get(pk=step_id)
+    backup = step.job.backup
+    try:
+        step.result = backup.get_strategy().execute_backup_step(backup.backup_source, step.name, step.parameters)
+        step.state = models.BackupJobStep.States.DONE
+    except Exception:
+        # step has to be finished on any error, otherwise job is never joined and backup stays in backing up state
+        logger.exception('Failed to perform step %s of backup %s', step.name, backup.uuid.hex)
+        step.state = models.BackupJobStep.States.ERRED
+    try:
+        step.save(update_fields=['result', 'state'])
+    finally:
+        if step.job.finish_step():
+            join_backup_job(step.job)
+
+
+def join_backup_job(job):
+    backup = job.backup
+    strategy = backup.get_strategy()
+    results, failed = job.get_results()
+    try:
+        if failed:
+            strategy.revert_backup_steps(backup.backup_source, results)
+            raise exceptions.BackupStrategyExecutionError('Steps %s have failed' % ', '.join(failed))
+        metadata = strategy.join_backup_steps(backup.backup_source, results)
+    except Exception:
+        _backup_failed(backup)
+    else:
+        _backup_succeeded(backup, metadata)
+
+
 @shared_task
 def restoration_task(backup_uuid, instance_uuid, user_raw_input, snapshot_ids):
     try:
@@ -128,11 +178,18 @@ def deletion_task(backup_uuid):
 
 @shared_task
 def execute_schedules():
-    for schedule in models.BackupSchedule.objects.filter(is_active=True, next_trigger_at__lt=timezone.now()):
+    """ Execute due schedules, they are selected by (is_active, next_trigger_at) index """
+    schedules = list(models.BackupSchedule.objects
+                     .filter(is_active=True, next_trigger_at__lt=timezone.now())
+                     .order_by('next_trigger_at'))
+    for schedule in prefetch_generic_relation(schedules, 'backup_source'):
         schedule.execute()
 
 
 @shared_task
 def delete_expired_backups():
-    for backup in models.Backup.objects.filter(kept_until__lt=timezone.now(), state=models.Backup.States.READY):
-        backup.start_deletion()
+    """ Start deletion of expired backups and the oldest backups of schedules
+        that have more than maximal number of backups.
+    """
+    models.Backup.objects.start_deletion(models.Backup.objects.get_expired())
+    models.Backup.objects.start_deletion(models.Backup.objects.get_extra())
@@ -70,6 +70,17 @@ class BackupScheduleTest(TestCase):
         # and schedule time have to be changed
         self.assertGreater(schedule.next_trigger_at, timezone.now())
 
+    def test_execute_is_skipped_if_schedule_has_been_claimed_by_concurrent_process(self):
+        schedule = factories.BackupScheduleFactory(backup_source=self.backup_source)
+        models.BackupSchedule.objects.filter(pk=schedule.pk).update(
+            next_trigger_at=timezone.now() - timedelta(minutes=10))
+        schedule = models.BackupSchedule.objects.get(pk=schedule.pk)
+        concurrent_schedule = models.BackupSchedule.objects.get(pk=schedule.pk)
+
+        self.assertTrue(schedule.execute())
+        self.assertFalse(concurrent_schedule.execute())
+        self.assertEqual(schedule.backups.count(), 1)
+
     def test_save(self):
         # new schedule
         schedule = factories.BackupScheduleFactory(next_trigger_at=None)
@@ -129,3 +140,23 @@ class BackupTest(TestCase):
         backup.start_deletion()
         mocked_task.assert_called_with(backup.uuid.hex)
         self.assertEqual(backup.state, models.Backup.States.DELETING)
+
+
+class BackupManagerTest(TestCase):
+
+    def setUp(self):
+        self.schedule = factories.BackupScheduleFactory(maximal_number_of_backups=2)
+        self.backups = [factories.BackupFactory(backup_schedule=self.schedule) for _ in range(4)]
+
+    def test_extra_backups_are_the_oldest_ones(self):
+        extra = models.Backup.objects.get_extra()
+        self.assertEqual(set(extra), set(self.backups[:2]))
+
+    def test_not_ready_backups_are_not_deleted(self):
+        factories.BackupFactory(backup_schedule=self.schedule, state=models.Backup.States.BACKING_UP)
+
+        with patch('nodeconductor.backup.tasks.deletion_task.delay') as mocked_task:
+            uuids = models.Backup.objects.start_deletion(models.Backup.objects.get_extra())
+
+        self.assertEqual(sorted(uuids), sorted(backup.uuid.hex for backup in self.backups[:3]))
+        self.assertEqual(mocked_task.call_count, 3)
@@ -1,9 +1,10 @@
 from datetime import timedelta
 
 from django.test import TestCase
+from mock import patch
 from django.utils import timezone
 
-from nodeconductor.backup import models, tasks
+from nodeconductor.backup import exceptions, models, tasks
 from nodeconductor.backup.tests import factories
 from nodeconductor.iaas.tests.factories import InstanceFactory
 from nodeconductor.iaas.models import Instance
@@ -46,3 +47,59 @@ class ExecuteScheduleTaskTest(TestCase):
     def test_command_does_not_create_backups_created_for_schedule_with_next_trigger_in_future(self):
         tasks.execute_schedules()
         self.assertEqual(self.future_schedule.backups.count(), 0)
+
+
+class ProcessBackupTaskTest(TestCase):
+
+    def setUp(self):
+        self.backup = factories.BackupFactory(state=models.Backup.States.BACKING_UP)
+        self.strategy = 'nodeconductor.iaas.backup.instance_backup.InstanceBackupStrategy'
+
+    def process_backup(self, execute_backup_step):
+        with patch(self.strategy + '._is_storage_resource_available', return_value=True), \
+                patch(self.strategy + '.execute_backup_step', side_effect=execute_backup_step), \
+                patch(self.strategy + '.revert_backup_steps') as revert_backup_steps, \
+                patch('nodeconductor.backup.tasks.backup_step_task.delay', side_effect=tasks.backup_step_task):
+            tasks.process_backup_task(self.backup.uuid.hex)
+        return revert_backup_steps
+
+    def test_backup_steps_are_joined_into_metadata(self):
+        self.process_backup(lambda source, name, parameters: 'snapshot-%s' % name)
+
+        backup = models.Backup.objects.get(pk=self.backup.pk)
+        self.assertEqual(backup.state, models.Backup.States.READY)
+        self.assertEqual(backup.metadata['system_snapshot_id'], 'snapshot-system')
+        self.assertEqual(backup.metadata['data_snapshot_id'], 'snapshot-data')
+        self.assertTrue(backup.job.is_joined)
+
+    def test_results_of_successful_steps_are_reverted_if_some_step_fails(self):
+        def execute_backup_step(source, name, parameters):
+            if name == 'data':
+                raise exceptions.BackupStrategyExecutionError()
+            return 'snapshot-%s' % name
+
+        revert_backup_steps = self.process_backup(execute_backup_step)
+
+        backup = models.Backup.objects.get(pk=self.backup.pk)
+        self.assertEqual(backup.state, models.Backup.States.ERRED)
+        revert_backup_steps.assert_called_once_with(backup.backup_source, {'system': 'snapshot-system'})
+
+    def test_backup_is_erred_if_step_fails_with_unexpected_error(self):
+        def execute_backup_step(source, name, parameters):
+            if name == 'data':
+                raise ValueError('Unexpected backend response')
+            return 'snapshot-%s' % name
+
+        revert_backup_steps = self.process_backup(execute_backup_step)
+
+        backup = models.Backup.objects.get(pk=self.backup.pk)
+        self.assertEqual(backup.state, models.Backup.States.ERRED)
+        self.assertEqual(backup.job.steps.get(name='data').state, models.BackupJobStep.States.ERRED)
+        revert_backup_steps.assert_called_once_with(backup.backup_source, {'system': 'snapshot-system'})
+
+    def test_job_is_joined_only_once(self):
+        job = models.BackupJob.create_for_backup(self.backup, [('system', {}), ('data', {})])
+
+        self.assertFalse(job.finish_step())
+        self.assertTrue(job.finish_step())
+        self.assertFalse(job.finish_step())
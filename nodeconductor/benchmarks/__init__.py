@@ -0,0 +1,13 @@
+"""
+Reproducible performance benchmarks on dummy backends.
+
+Scenario of customers, projects, service project links, resources, users and
+roles is generated with test factories in a test database, then key API
+endpoints are requested through DRF test client and periodic tasks are executed
+in eager mode. Number of queries and time of each run are stored as JSON and
+can be compared with a baseline:
+
+    DJANGO_SETTINGS_MODULE=nodeconductor.server.test_settings \\
+        nodeconductor runbenchmarks --sizes=5,20 --output=current.json
+    nodeconductor comparebenchmarks baseline.json current.json
+"""
@@ -0,0 +1,99 @@
+"""
+Query plans of hot filters of list endpoints on PostgreSQL.
+
+Endpoints are requested on generated scenario, then each captured SELECT query
+is explained with sequential scans disabled. Planner falls back to a sequential
+scan, or to a full index scan with a filter, only if no index can serve
+the query, so such scans of watched tables are reported as missing indexes.
+"""
+from __future__ import unicode_literals
+
+import collections
+import json
+
+from django.core.urlresolvers import reverse
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from nodeconductor.benchmarks.scenarios import Scenario
+
+
+# (plan name, url name, query parameters, watched tables)
+ENDPOINTS = (
+    ('instances_by_start_time', 'instance-list', {'o': 'start_time'}, ('iaas_instance',)),
+    ('instances_by_installation_state', 'instance-list', {'installation_state': 'OK'}, ('iaas_instance',)),
+    ('instances_by_name', 'instance-list', {'name': 'instance'}, ('iaas_instance',)),
+    ('resources_by_customer_name', 'openstack-instance-list', {'customer_name': 'customer'}, ('structure_customer',)),
+    ('customers_by_name', 'customer-list', {'name': 'customer'}, ('structure_customer',)),
+    ('projects_by_name', 'project-list', {'name': 'project'}, ('structure_project',)),
+    ('open_alerts', 'alert-list', {'opened': True, 'severity': 'Warning'}, ('logging_alert',)),
+    ('quotas', 'quota-list', {}, ('quotas_quota',)),
+    ('price_estimates', 'priceestimate-list', {'date': '2015.10'}, ('cost_tracking_priceestimate',)),
+)
+
+FULL_SCAN_NODES = ('Seq Scan', 'Index Scan', 'Index Only Scan')
+
+FullScan = collections.namedtuple('FullScan', ('table', 'node', 'filter'))
+
+
+def find_full_scans(plan, tables):
+    """ Return sequential scans and filtered full index scans of :tables: in JSON plan """
+    scans = []
+    nodes = list(plan) if isinstance(plan, list) else [plan]
+    while nodes:
+        node = nodes.pop()
+        if 'Plan' in node:
+            node = node['Plan']
+        nodes.extend(node.get('Plans', []))
+
+        table = node.get('Relation Name')
+        if table not in tables or node['Node Type'] not in FULL_SCAN_NODES:
+            continue
+        # index scan without condition reads whole index, it is fine only for ordering
+        if node['Node Type'] == 'Seq Scan' or ('Index Cond' not in node and 'Filter' in node):
+            scans.append(FullScan(table, node['Node Type'], node.get('Filter')))
+    return scans
+
+
+def explain(sql):
+    """ Return JSON plan of query, sequential scans are used only if there is no other way """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+        plan = cursor.fetchone()[0]
+    return json.loads(plan) if isinstance(plan, basestring) else plan
+
+
+class PlanRunner(object):
+    """ Capture plans of queries of endpoints requested by staff user """
+
+    def __init__(self, scenario_options=None):
+        self.scenario_options = scenario_options or {}
+
+    def run(self):
+        if connection.vendor != 'postgresql':
+            raise RuntimeError('Query plans are captured only on PostgreSQL.')
+
+        scenario = Scenario(**self.scenario_options).generate()
+        client = APIClient()
+        client.force_authenticate(scenario.staff)
+
+        results = collections.OrderedDict()
+        for name, url_name, params, tables in ENDPOINTS:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(reverse(url_name), params)
+            # psycopg2 reports executed queries with interpolated parameters
+            queries = [query['sql'] for query in context.captured_queries
+                       if query['sql'].lstrip().upper().startswith('SELECT')]
+            plans, scans = [], []
+            for sql in queries:
+                plan = explain(sql)
+                plans.append({'sql': sql, 'plan': plan})
+                scans.extend(find_full_scans(plan, tables))
+            results[name] = {
+                'status': response.status_code,
+                'plans': plans,
+                'full_scans': [scan._asdict() for scan in scans],
+            }
+        return results
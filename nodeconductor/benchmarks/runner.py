@@ -0,0 +1,198 @@
+from __future__ import unicode_literals
+
+import collections
+import contextlib
+import json
+import logging
+import time
+
+from celery import current_app
+from django.apps import apps
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.test import APIClient
+
+from nodeconductor.benchmarks.scenarios import Scenario
+from nodeconductor.cost_tracking import estimation
+from nodeconductor.logging import context as log_context
+from nodeconductor.logging.log import event_logger
+
+
+logger = logging.getLogger(__name__)
+
+# (benchmark name, url name, query parameters)
+ENDPOINTS = (
+    ('instances', 'instance-list', {}),
+    ('openstack_instances', 'openstack-instance-list', {}),
+    ('alerts', 'alert-list', {}),
+    ('events', 'event-list', {}),
+    ('customers', 'customer-list', {}),
+    ('projects', 'project-list', {}),
+    ('stats_customer', 'stats_customer', {}),
+    ('stats_quota', 'stats_quota', {'aggregate': 'customer'}),
+    ('stats_creation_time', 'stats_creation_time', {'type': 'project'}),
+    ('stats_alerts', 'stats_alerts', {}),
+)
+
+# (benchmark name, task path, arguments)
+TASKS = (
+    ('update_projected_estimates', 'nodeconductor.cost_tracking.tasks.update_projected_estimate', ()),
+    ('reconcile_quotas', 'nodeconductor.quotas.tasks.reconcile_quotas', ()),
+    ('execute_backup_schedules', 'nodeconductor.backup.tasks.execute_schedules', ()),
+    ('delete_expired_backups', 'nodeconductor.backup.tasks.delete_expired_backups', ()),
+)
+
+# (benchmark name, model, event logger name, event type, event context field)
+EVENTS = (
+    ('iaas_instance', 'iaas.Instance', 'instance', 'iaas_instance_start_succeeded', 'instance'),
+    ('openstack_instance', 'openstack.Instance', 'resource', 'resource_created', 'resource'),
+)
+
+# Number of events emitted for each object, e.g. events of a state transition
+EVENTS_PER_OBJECT = 3
+
+# Monthly cost of each resource, dummy backends do not estimate costs
+MONTHLY_COST = 10
+
+Regression = collections.namedtuple('Regression', ('name', 'metric', 'baseline', 'current'))
+
+
+def measure(func, repeat=3):
+    """ Return number of queries of the first run and the best time of :repeat: runs """
+    times = []
+    with CaptureQueriesContext(connection) as context:
+        start = time.time()
+        result = func()
+        times.append(time.time() - start)
+    for _ in range(repeat - 1):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return {'queries': len(context), 'time': round(min(times), 4)}, result
+
+
+@contextlib.contextmanager
+def constant_monthly_cost(cost=MONTHLY_COST):
+    """ Make projected estimates calculation use constant cost instead of backends estimations """
+    get_monthly_cost = estimation.get_monthly_cost
+    estimation.get_monthly_cost = lambda backend, resource, price_list: cost
+    try:
+        yield
+    finally:
+        estimation.get_monthly_cost = get_monthly_cost
+
+
+class BenchmarkRunner(object):
+    """ Run endpoints and tasks benchmarks on scenarios of growing size.
+
+        Sizes are numbers of customers, scenario is extended with new customers
+        before each size, so the database is populated only once.
+    """
+
+    def __init__(self, sizes=(5, 20), repeat=3, scenario_options=None):
+        self.sizes = sorted(sizes)
+        self.repeat = repeat
+        self.scenario_options = scenario_options or {}
+
+    def run(self):
+        results = collections.OrderedDict()
+        always_eager = current_app.conf.CELERY_ALWAYS_EAGER
+        current_app.conf.CELERY_ALWAYS_EAGER = True
+        try:
+            generated, users = 0, collections.OrderedDict()
+            for size in self.sizes:
+                scenario = Scenario(customers=size - generated, **self.scenario_options).generate()
+                generated = size
+                users.setdefault('staff', scenario.staff)
+                users.setdefault('owner', scenario.owner)
+
+                for user_name, user in users.items():
+                    for name, url_name, params in ENDPOINTS:
+                        key = 'endpoint:%s:%s@%s' % (name, user_name, size)
+                        results[key] = self.run_endpoint(user, url_name, params)
+                for name, path, args in TASKS:
+                    key = 'task:%s@%s' % (name, size)
+                    results[key] = self.run_task(path, args)
+                for name, model, logger_name, event_type, field in EVENTS:
+                    key = 'event:%s@%s' % (name, size)
+                    results[key] = self.run_events(model, logger_name, event_type, field)
+                logger.info('Benchmarks for %s customers are finished', size)
+        finally:
+            current_app.conf.CELERY_ALWAYS_EAGER = always_eager
+
+        return {
+            'created': timezone.now().isoformat(),
+            'sizes': self.sizes,
+            'scenario': Scenario(**self.scenario_options).describe(),
+            'results': results,
+        }
+
+    def run_endpoint(self, user, url_name, params):
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse(url_name)
+        measurement, response = measure(lambda: client.get(url, params), self.repeat)
+        measurement['status'] = response.status_code
+        return measurement
+
+    def run_task(self, path, args):
+        task = import_string(path)
+        with constant_monthly_cost():
+            measurement, result = measure(lambda: task.apply(args=args), self.repeat)
+        measurement['status'] = result.state
+        return measurement
+
+    def run_events(self, model, logger_name, event_type, field):
+        """ Measure queries and time per event emitted for objects loaded without related objects """
+        model = apps.get_model(model)
+        logger = getattr(event_logger, logger_name)
+
+        def emit():
+            # the same memo as within request or task
+            with log_context.memo():
+                objects = list(model.objects.all())
+                for obj in objects:
+                    for _ in range(EVENTS_PER_OBJECT):
+                        logger.info('Benchmark event', event_type=event_type, event_context={field: obj})
+            return len(objects) * EVENTS_PER_OBJECT
+
+        measurement, count = measure(emit, self.repeat)
+        measurement['queries'] = round(float(measurement['queries']) / count, 2)
+        measurement['time'] = round(measurement['time'] / count, 6)
+        measurement['events'] = count
+        measurement['status'] = 'SUCCESS'
+        return measurement
+
+
+def compare(baseline, current, time_tolerance=0.5, min_time_delta=0.01):
+    """ Return list of regressions of :current: results against :baseline: results.
+
+        Any growth of number of queries is a regression, time is a regression if it grows
+        more than by :time_tolerance: share and more than by :min_time_delta: seconds.
+    """
+    regressions = []
+    for name, current_result in current['results'].items():
+        baseline_result = baseline['results'].get(name)
+        if baseline_result is None:
+            continue
+        if current_result['queries'] > baseline_result['queries']:
+            regressions.append(Regression(name, 'queries', baseline_result['queries'], current_result['queries']))
+        time_delta = current_result['time'] - baseline_result['time']
+        if time_delta > min_time_delta and time_delta > baseline_result['time'] * time_tolerance:
+            regressions.append(Regression(name, 'time', baseline_result['time'], current_result['time']))
+        if current_result.get('status') != baseline_result.get('status'):
+            regressions.append(Regression(name, 'status', baseline_result.get('status'), current_result.get('status')))
+    return regressions
+
+
+def load(path):
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def dump(results, path):
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
@@ -0,0 +1,68 @@
+from __future__ import unicode_literals
+
+from nodeconductor.iaas.tests import factories as iaas_factories
+from nodeconductor.logging.tests import factories as logging_factories
+from nodeconductor.openstack.tests import factories as openstack_factories
+from nodeconductor.structure import models as structure_models
+from nodeconductor.structure.tests import factories as structure_factories
+
+
+class Scenario(object):
+    """ Generate customers with projects, users, roles, service project links and resources.
+
+        All counts except customers are per parent object, e.g. Scenario(customers=10, projects=3)
+        creates 30 projects. Resources are created both in IaaS cloud memberships and
+        in OpenStack service project links, alerts are raised for customers and projects.
+    """
+
+    def __init__(self, customers=5, projects=2, links=1, resources=3, users=2, alerts=2):
+        self.counts = {
+            'customers': customers,
+            'projects': projects,
+            'links': links,
+            'resources': resources,
+            'users': users,
+            'alerts': alerts,
+        }
+        self.staff = None
+        self.owner = None
+        self.customers = []
+
+    def describe(self):
+        return dict(self.counts)
+
+    def generate(self):
+        counts = self.counts
+        self.staff = structure_factories.UserFactory(is_staff=True)
+        for _ in range(counts['customers']):
+            customer = structure_factories.CustomerFactory()
+            owner = structure_factories.UserFactory()
+            customer.add_user(owner, structure_models.CustomerRole.OWNER)
+            self.customers.append(customer)
+            # owner of the first customer is used to measure non-staff requests
+            self.owner = self.owner or owner
+
+            cloud = iaas_factories.CloudFactory(customer=customer, dummy=True)
+            template = iaas_factories.TemplateFactory()
+            iaas_factories.ImageFactory(cloud=cloud, template=template)
+            service = openstack_factories.OpenStackServiceFactory(customer=customer)
+
+            for _ in range(counts['projects']):
+                project = structure_factories.ProjectFactory(customer=customer)
+                for _ in range(counts['users']):
+                    project.add_user(structure_factories.UserFactory(), structure_models.ProjectRole.ADMINISTRATOR)
+                project.add_user(structure_factories.UserFactory(), structure_models.ProjectRole.MANAGER)
+
+                for _ in range(counts['links']):
+                    membership = iaas_factories.CloudProjectMembershipFactory(cloud=cloud, project=project)
+                    iaas_factories.InstanceFactory.create_batch(
+                        counts['resources'], cloud_project_membership=membership, template=template)
+
+                    link = openstack_factories.OpenStackServiceProjectLinkFactory(service=service, project=project)
+                    openstack_factories.InstanceFactory.create_batch(
+                        counts['resources'], service_project_link=link,
+                        state=structure_models.Resource.States.ONLINE)
+
+                logging_factories.AlertFactory.create_batch(counts['alerts'], scope=project)
+            logging_factories.AlertFactory.create_batch(counts['alerts'], scope=customer)
+        return self
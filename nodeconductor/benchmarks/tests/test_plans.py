@@ -0,0 +1,49 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+
+from nodeconductor.benchmarks import plans
+
+
+class FindFullScansTest(unittest.TestCase):
+
+    def get_plan(self, *nodes):
+        return [{'Plan': {'Node Type': 'Limit', 'Plans': [
+            {'Node Type': 'Nested Loop', 'Plans': list(nodes)}]}}]
+
+    def test_sequential_scan_of_watched_table_is_found(self):
+        plan = self.get_plan(
+            {'Node Type': 'Seq Scan', 'Relation Name': 'logging_alert', 'Filter': '(closed IS NULL)'},
+            {'Node Type': 'Seq Scan', 'Relation Name': 'django_content_type'})
+
+        scans = plans.find_full_scans(plan, ('logging_alert',))
+
+        self.assertEqual(scans, [plans.FullScan('logging_alert', 'Seq Scan', '(closed IS NULL)')])
+
+    def test_filtered_full_index_scan_is_found(self):
+        plan = self.get_plan(
+            {'Node Type': 'Index Scan', 'Relation Name': 'iaas_instance', 'Filter': "((state)::text = 'o')"})
+
+        self.assertEqual(len(plans.find_full_scans(plan, ('iaas_instance',))), 1)
+
+    def test_index_scans_with_condition_and_ordering_scans_are_ignored(self):
+        plan = self.get_plan(
+            {'Node Type': 'Index Scan', 'Relation Name': 'iaas_instance', 'Index Cond': '(id = 1)'},
+            {'Node Type': 'Index Scan', 'Relation Name': 'iaas_instance'},
+            {'Node Type': 'Bitmap Heap Scan', 'Relation Name': 'iaas_instance', 'Recheck Cond': '(id = 1)'})
+
+        self.assertEqual(plans.find_full_scans(plan, ('iaas_instance',)), [])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are captured only on PostgreSQL.')
+class PlanRunnerTest(TestCase):
+
+    def test_hot_filters_do_not_scan_watched_tables(self):
+        results = plans.PlanRunner(scenario_options={'customers': 2, 'projects': 1}).run()
+
+        for name, result in results.items():
+            self.assertEqual(result['status'], 200, name)
+            self.assertEqual(result['full_scans'], [], name)
@@ -0,0 +1,53 @@
+from __future__ import unicode_literals
+
+from django.test import TestCase
+from django.utils import timezone
+
+from nodeconductor.benchmarks import runner
+from nodeconductor.cost_tracking import estimation
+from nodeconductor.cost_tracking.models import PriceEstimate
+
+
+class CompareTest(TestCase):
+
+    def get_results(self, queries, time, status=200):
+        return {'results': {'endpoint:alerts:staff@5': {'queries': queries, 'time': time, 'status': status}}}
+
+    def test_growth_of_queries_is_regression(self):
+        regressions = runner.compare(self.get_results(4, 0.1), self.get_results(5, 0.1))
+
+        self.assertEqual(regressions, [runner.Regression('endpoint:alerts:staff@5', 'queries', 4, 5)])
+
+    def test_small_time_growth_is_ignored(self):
+        self.assertEqual(runner.compare(self.get_results(4, 0.1), self.get_results(4, 0.12)), [])
+        self.assertEqual(runner.compare(self.get_results(4, 0.001), self.get_results(4, 0.005)), [])
+
+    def test_significant_time_growth_is_regression(self):
+        regressions = runner.compare(self.get_results(4, 0.1), self.get_results(4, 0.3))
+
+        self.assertEqual([regression.metric for regression in regressions], ['time'])
+
+    def test_changed_status_is_regression(self):
+        regressions = runner.compare(self.get_results(4, 0.1), self.get_results(4, 0.1, status=500))
+
+        self.assertEqual([regression.metric for regression in regressions], ['status'])
+
+
+class BenchmarkRunnerTest(TestCase):
+
+    def setUp(self):
+        self.get_monthly_cost = estimation.get_monthly_cost
+
+    def test_endpoints_and_tasks_are_measured_for_each_size(self):
+        results = runner.BenchmarkRunner(sizes=(1,), repeat=1, scenario_options={'projects': 1}).run()
+
+        self.assertEqual(len(results['results']), len(runner.ENDPOINTS) * 2 + len(runner.TASKS) + len(runner.EVENTS))
+        for name, result in results['results'].items():
+            self.assertIn(result['status'], (200, 'SUCCESS'), name)
+
+    def test_projected_estimates_are_calculated_with_constant_monthly_cost(self):
+        runner.BenchmarkRunner(sizes=(1,), repeat=1, scenario_options={'projects': 1}).run()
+
+        estimates = PriceEstimate.objects.filter(month=timezone.now().month, year=timezone.now().year)
+        self.assertTrue(estimates.exists())
+        self.assertEqual(estimation.get_monthly_cost, self.get_monthly_cost)
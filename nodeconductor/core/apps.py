@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 from django.apps import AppConfig
 from django.db.models import signals
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
 
 from nodeconductor.core import handlers
 
@@ -15,16 +16,38 @@ class CoreConfig(AppConfig):
         User = get_user_model()
         SshPublicKey = self.get_model('SshPublicKey')
 
-        signals.pre_save.connect(
-            handlers.preserve_fields_before_update,
+        signals.post_save.connect(
+            handlers.create_auth_token,
             sender=User,
-            dispatch_uid='nodeconductor.core.handlers.preserve_fields_before_update',
+            dispatch_uid='nodeconductor.core.handlers.create_auth_token',
         )
 
         signals.post_save.connect(
-            handlers.create_auth_token,
+            handlers.invalidate_user_tokens_cache,
             sender=User,
-            dispatch_uid='nodeconductor.core.handlers.create_auth_token',
+            dispatch_uid='nodeconductor.core.handlers.invalidate_user_tokens_cache',
+        )
+
+        signals.post_delete.connect(
+            handlers.invalidate_token_cache,
+            sender=Token,
+            dispatch_uid='nodeconductor.core.handlers.invalidate_token_cache',
+        )
+
+        # models read by cached views are declared by the views, so all senders are handled
+        signals.post_save.connect(
+            handlers.invalidate_response_cache,
+            dispatch_uid='nodeconductor.core.handlers.invalidate_response_cache_on_save',
+        )
+
+        signals.post_delete.connect(
+            handlers.invalidate_response_cache,
+            dispatch_uid='nodeconductor.core.handlers.invalidate_response_cache_on_delete',
+        )
+
+        signals.m2m_changed.connect(
+            handlers.invalidate_response_cache_on_m2m_change,
+            dispatch_uid='nodeconductor.core.handlers.invalidate_response_cache_on_m2m_change',
         )
 
         signals.post_save.connect(
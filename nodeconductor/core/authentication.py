@@ -1,9 +1,19 @@
 from __future__ import unicode_literals
 
+import collections
+import copy
+import datetime
+import threading
+import time
+
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 import rest_framework.authentication
 from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
 
 import nodeconductor.logging.middleware
 
@@ -11,6 +21,190 @@ import nodeconductor.logging.middleware
 TOKEN_KEY = settings.NODECONDUCTOR.get('TOKEN_KEY', 'x-auth-token')
 
 
+class LocalCache(object):
+    """ Thread-safe process-local LRU cache, entries expire after :timeout: seconds """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, expires = self._entries.pop(key)
+            except KeyError:
+                return None
+            if expires < time.time():
+                return None
+            # the most recently used entry goes to the end
+            self._entries[key] = (value, expires)
+            return value
+
+    def set(self, key, value):
+        if not self.size or not self.timeout:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.time() + self.timeout)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenCache(object):
+    """ Cache of authentication tokens.
+
+        Token key is resolved to user in process-local LRU cache first, then in shared
+        Django cache (token key -> user id and token creation time) and only then in database.
+        Entries are invalidated by signal handlers when token is deleted and when user is changed,
+        for example password is changed or user is deactivated. Signals invalidate local cache
+        of the current process only, so other processes accept revoked token
+        for at most local_timeout seconds.
+
+        If lifetime is set, token expires if it is not used during this time.
+        Creation time of used token is moved forward once per tenth of lifetime.
+
+        Numbers of local hits, shared hits and misses are kept per process and are added
+        to counters in shared cache every metrics_flush_interval lookups (see get_metrics).
+    """
+    key_prefix = 'nc:auth:token:'
+    metrics_key_prefix = 'nc:auth:metrics:'
+    metrics = ('local_hits', 'shared_hits', 'misses')
+    metrics_flush_interval = 100
+
+    def __init__(self, local_size=1000, local_timeout=10, shared_timeout=60, lifetime=None):
+        self.local = LocalCache(local_size, local_timeout)
+        self.shared_timeout = shared_timeout
+        if isinstance(lifetime, (int, long, float)):
+            lifetime = datetime.timedelta(seconds=lifetime)
+        self.lifetime = lifetime
+        self.stats = collections.Counter()
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = settings.NODECONDUCTOR.get('TOKEN_CACHE', {})
+        return cls(lifetime=settings.NODECONDUCTOR.get('TOKEN_LIFETIME'), **options)
+
+    def authenticate(self, key):
+        """ Return (user, token) of token with given key or raise AuthenticationFailed """
+        user, created = self.get_entry(key)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        if self.lifetime:
+            created = self.check_expiration(key, user, created)
+
+        # cached user is shared by requests, each request gets its own copy
+        user = copy.deepcopy(user)
+        return user, Token(key=key, user=user, created=created)
+
+    def get_entry(self, key):
+        entry = self.local.get(key)
+        if entry is not None:
+            self.count('local_hits')
+            return entry
+
+        shared_entry = cache.get(self.key_prefix + key) if self.shared_timeout else None
+        if shared_entry is not None:
+            user_id, created = shared_entry
+            try:
+                user = get_user_model().objects.get(pk=user_id)
+            except get_user_model().DoesNotExist:
+                self.invalidate(key)
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            self.count('shared_hits')
+        else:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            user, created = token.user, token.created
+            self.count('misses')
+            self.set_entry(key, user, created)
+
+        entry = (user, created)
+        self.local.set(key, entry)
+        return entry
+
+    def set_entry(self, key, user, created):
+        if self.shared_timeout:
+            cache.set(self.key_prefix + key, (user.pk, created), self.shared_timeout)
+        self.local.set(key, (user, created))
+
+    def check_expiration(self, key, user, created):
+        """ Return actual creation time of token, raise AuthenticationFailed if token has expired """
+        now = timezone.now()
+        if now - created > self.lifetime:
+            # token could be used and refreshed by another process
+            created = Token.objects.filter(key=key).values_list('created', flat=True).first()
+            if created is None or now - created > self.lifetime:
+                Token.objects.filter(key=key).delete()
+                self.invalidate(key)
+                raise exceptions.AuthenticationFailed(_('Token has expired.'))
+            self.set_entry(key, user, created)
+
+        if now - created > self.lifetime / 10:
+            Token.objects.filter(key=key).update(created=now)
+            self.set_entry(key, user, now)
+            created = now
+        return created
+
+    def is_expired(self, token):
+        return bool(self.lifetime) and timezone.now() - token.created > self.lifetime
+
+    def invalidate(self, key):
+        self.local.delete(key)
+        cache.delete(self.key_prefix + key)
+
+    def invalidate_user(self, user):
+        for key in Token.objects.filter(user=user).values_list('key', flat=True):
+            self.invalidate(key)
+
+    def count(self, metric):
+        with self._stats_lock:
+            self.stats[metric] += 1
+            if sum(self.stats.values()) < self.metrics_flush_interval:
+                return
+            stats, self.stats = self.stats, collections.Counter()
+        self.flush_metrics(stats)
+
+    def flush_metrics(self, stats=None):
+        if stats is None:
+            with self._stats_lock:
+                stats, self.stats = self.stats, collections.Counter()
+        for metric, value in stats.items():
+            key = self.metrics_key_prefix + metric
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                # counter has been evicted from cache
+                cache.set(key, value, None)
+
+    def get_metrics(self):
+        """ Return numbers of local hits, shared hits and misses of all processes and hit rate """
+        self.flush_metrics()
+        values = cache.get_many([self.metrics_key_prefix + metric for metric in self.metrics])
+        metrics = {metric: values.get(self.metrics_key_prefix + metric, 0) for metric in self.metrics}
+        total = sum(metrics.values())
+        metrics['hit_rate'] = float(metrics['local_hits'] + metrics['shared_hits']) / total if total else 0
+        return metrics
+
+
+token_cache = TokenCache.from_settings()
+
+
 class TokenAuthentication(rest_framework.authentication.TokenAuthentication):
     """
     Custom token-based authentication.
@@ -39,6 +233,9 @@ class TokenAuthentication(rest_framework.authentication.TokenAuthentication):
 
         return self.authenticate_credentials(auth[1])
 
+    def authenticate_credentials(self, key):
+        return token_cache.authenticate(key)
+
 
 def user_capturing_auth(auth):
     class CapturingAuthentication(auth):
@@ -0,0 +1,369 @@
+"""
+Cache of responses of expensive read-only endpoints.
+
+View methods are opted in with cache_response decorator, which declares models
+read by the view. Responses are cached per user permissions: key includes
+the request path, the accepted media type and a fingerprint of user permission
+groups, so users with the same roles share entries.
+
+Entries are invalidated by generation counters instead of deletion.
+Saving or deleting an object of a declared model increments the counter of
+the model and counters of its scopes: customers, projects and service
+project links which include the object. Entry of staff user depends on
+counters of declared models; entry of other user depends on counters of
+customers visible to the user and on counters of objects without scope.
+Entry is served only if all its counters have not changed since the response
+was calculated.
+
+Counters and entries are kept in shared Django cache, so the cache has to be
+shared by all processes, e.g. a Redis cache. Cache is disabled unless it is
+configured:
+
+    NODECONDUCTOR['RESPONSE_CACHE'] = {
+        'cache': 'default',
+        'timeout': 300,
+    }
+
+Counters are incremented on save, before the transaction is committed,
+and are incremented again when the request or Celery task which has changed
+objects is finished (see ResponseCacheMiddleware and nodeconductor.server.celery),
+so entries calculated meanwhile from old data are invalidated after commit.
+Responses and scopes of users are read from the primary database, because
+an entry calculated from a lagging replica would be stored under current counters.
+
+Bulk updates do not send signals, counters of updated model are incremented
+explicitly with response_cache.invalidate_model(model).
+"""
+from __future__ import unicode_literals
+
+import collections
+import functools
+import hashlib
+import importlib
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from nodeconductor.core.models import DescendantMixin
+from nodeconductor.core.replicas import read_replica
+
+
+# Models which generation counters are tracked per object
+SCOPE_MODELS = ('structure.Customer', 'structure.Project', 'structure.ServiceProjectLink')
+
+# Attributes which lead from object to its scopes if object is not DescendantMixin
+PARENT_ATTRIBUTES = ('scope', 'customer', 'project', 'service_project_link', 'cloud_project_membership')
+
+# Maximum length of parents chains followed to find scopes
+MAX_DEPTH = 4
+
+# Headers of paginated responses which are cached with response data
+CACHED_HEADERS = ('Link', 'X-Result-Count')
+
+
+# {model label: model}
+_models = {}
+
+
+def get_model(label):
+    """ Return model by label, abstract models (e.g. structure.Resource) are imported from app models module """
+    try:
+        return _models[label]
+    except KeyError:
+        pass
+    try:
+        model = apps.get_model(label)
+    except LookupError:
+        app_label, class_name = label.split('.')
+        model = getattr(importlib.import_module('nodeconductor.%s.models' % app_label), class_name)
+    _models[label] = model
+    return model
+
+
+def get_scopes(obj, depth=MAX_DEPTH):
+    """ Return customers, projects and service project links which include obj """
+    scopes = []
+    scope_models = tuple(get_model(label) for label in SCOPE_MODELS)
+    if isinstance(obj, scope_models):
+        scopes.append(obj)
+    if not depth:
+        return scopes
+
+    if isinstance(obj, DescendantMixin):
+        try:
+            parents = obj.get_parents()
+        except ObjectDoesNotExist:
+            # parent has been deleted together with the object, counters of unscoped objects are bumped instead
+            parents = []
+    else:
+        parents = []
+        for attribute in PARENT_ATTRIBUTES:
+            try:
+                parents.append(getattr(obj, attribute, None))
+            except ObjectDoesNotExist:
+                # parent has been deleted together with the object
+                continue
+
+    for parent in parents:
+        if isinstance(parent, models.Model):
+            scopes.extend(scope for scope in get_scopes(parent, depth - 1) if scope not in scopes)
+    return scopes
+
+
+def get_scope_label(scope):
+    for label in SCOPE_MODELS:
+        if isinstance(scope, get_model(label)):
+            return label.lower()
+
+
+def get_user_scopes(request):
+    from nodeconductor.structure.managers import filter_queryset_for_user
+    from nodeconductor.structure.models import Customer
+
+    return filter_queryset_for_user(Customer.objects.all(), request.user)
+
+
+class ResponseCache(object):
+    """ Generation counters, entries and hit/miss metrics of cached responses.
+
+        Numbers of hits and misses are kept per process and view and are added
+        to counters in shared cache every metrics_flush_interval lookups (see get_metrics).
+    """
+    key_prefix = 'nc:response-cache:'
+    metrics_flush_interval = 100
+
+    def __init__(self):
+        # labels of declared models
+        self.models = set()
+        # {model: lowercase labels of declared models which include it}
+        self._labels = {}
+        # {(view, 'hits' | 'misses'): count}
+        self.stats = collections.Counter()
+        self._stats_lock = threading.Lock()
+        # counters incremented within current request or task
+        self._bumped = threading.local()
+
+    @property
+    def options(self):
+        return settings.NODECONDUCTOR.get('RESPONSE_CACHE')
+
+    @property
+    def enabled(self):
+        return bool(self.options)
+
+    @property
+    def cache(self):
+        return caches[self.options.get('cache', 'default')]
+
+    def register(self, model_labels):
+        self.models.update(model_labels)
+        self._labels.clear()
+
+    def get_labels(self, model):
+        """ Return labels of declared models which include model, e.g. structure.resource for its subclasses """
+        try:
+            return self._labels[model]
+        except KeyError:
+            pass
+        labels = [label.lower() for label in self.models if issubclass(model, get_model(label))]
+        self._labels[model] = labels
+        return labels
+
+    def get_model_key(self, label):
+        return '%smodel:%s' % (self.key_prefix, label)
+
+    def get_unscoped_key(self, label):
+        return '%sunscoped:%s' % (self.key_prefix, label)
+
+    def get_scope_key(self, scope_label, pk):
+        return '%sscope:%s:%s' % (self.key_prefix, scope_label, pk)
+
+    def get_entry_key(self, view_name, request, fingerprint):
+        parts = (view_name, request.get_full_path(), getattr(request, 'accepted_media_type', ''), fingerprint)
+        return '%sentry:%s' % (self.key_prefix, hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest())
+
+    def get_fingerprint(self, user):
+        # views can filter by roles of staff user too, e.g. can_manage filter of projects
+        groups = sorted(user.groups.values_list('pk', flat=True))
+        return '%s:%s' % ('staff' if user.is_staff else 'user', ','.join(str(group) for group in groups))
+
+    def get_dependencies(self, request, labels, scopes=None):
+        """ Return keys of counters which entry of the request depends on """
+        if request.user.is_staff:
+            return [self.get_model_key(label) for label in labels]
+        scopes = scopes(request) if scopes is not None else get_user_scopes(request)
+        keys = [self.get_unscoped_key(label) for label in labels]
+        for scope in scopes:
+            keys.append(self.get_scope_key(get_scope_label(scope), scope.pk))
+        return keys
+
+    def bump(self, keys):
+        cache = self.cache
+        bumped = getattr(self._bumped, 'keys', None)
+        if bumped is not None:
+            bumped.update(keys)
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # counter does not exist or has been evicted, a new counter does not repeat old values
+                cache.set(key, int(time.time() * 1000), None)
+
+    def get_generations(self, keys, values):
+        """ Return current values of counters, missing counters are created """
+        generations = {key: values[key] for key in keys if values.get(key) is not None}
+        missing = [key for key in keys if key not in generations]
+        for key in missing:
+            self.cache.add(key, int(time.time() * 1000), None)
+        if missing:
+            generations.update(self.cache.get_many(missing))
+        return generations
+
+    def invalidate(self, instance):
+        """ Increment counters of declared models and scopes of saved or deleted instance """
+        if not self.enabled:
+            return
+        labels = self.get_labels(instance.__class__)
+        if not labels:
+            return
+        scopes = get_scopes(instance)
+        keys = [self.get_model_key(label) for label in labels]
+        if scopes:
+            keys.extend(self.get_scope_key(get_scope_label(scope), scope.pk) for scope in scopes)
+        else:
+            keys.extend(self.get_unscoped_key(label) for label in labels)
+        self.bump(keys)
+
+    def invalidate_model(self, model):
+        """ Increment counters of declared models which include model after bulk update of its objects.
+            Scopes of updated objects are unknown, so entries of all users are invalidated.
+        """
+        if not self.enabled:
+            return
+        labels = self.get_labels(model)
+        self.bump([self.get_model_key(label) for label in labels] +
+                  [self.get_unscoped_key(label) for label in labels])
+
+    def track_bumps(self, reset=False):
+        """ Start collecting counters incremented within current request or task,
+            :reset: drops collected counters of unfinished request of the thread.
+        """
+        self._bumped.depth = 1 if reset else getattr(self._bumped, 'depth', 0) + 1
+        if self._bumped.depth == 1:
+            self._bumped.keys = set()
+
+    def repeat_bumps(self):
+        """ Increment collected counters again once changes of request or task are committed """
+        depth = getattr(self._bumped, 'depth', 0)
+        if not depth:
+            return
+        self._bumped.depth = depth - 1
+        if self._bumped.depth:
+            # eager task within a request, its changes are committed with the request
+            return
+        keys, self._bumped.keys = self._bumped.keys, None
+        if keys and self.enabled:
+            self.bump(keys)
+
+    def count(self, view_name, metric):
+        with self._stats_lock:
+            self.stats[view_name, metric] += 1
+            if sum(self.stats.values()) < self.metrics_flush_interval:
+                return
+            stats, self.stats = self.stats, collections.Counter()
+        self.flush_metrics(stats)
+
+    def flush_metrics(self, stats=None):
+        if stats is None:
+            with self._stats_lock:
+                stats, self.stats = self.stats, collections.Counter()
+        cache = self.cache
+        for (view_name, metric), value in stats.items():
+            key = '%smetrics:%s:%s' % (self.key_prefix, view_name, metric)
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                # counter has been evicted from cache
+                cache.set(key, value, None)
+
+    def get_metrics(self, view_name):
+        """ Return numbers of hits and misses of view in all processes and hit rate """
+        self.flush_metrics()
+        keys = {metric: '%smetrics:%s:%s' % (self.key_prefix, view_name, metric) for metric in ('hits', 'misses')}
+        values = self.cache.get_many(keys.values())
+        metrics = {metric: values.get(key, 0) for metric, key in keys.items()}
+        total = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = float(metrics['hits']) / total if total else 0
+        return metrics
+
+
+response_cache = ResponseCache()
+
+
+def cache_response(models, scopes=None, timeout=None):
+    """ Cache successful responses of safe requests of view method.
+
+        :models: labels of models read by the view, base classes include their subclasses;
+        :scopes: callable which returns scopes read by the view for request of non-staff user,
+                 customers visible to the user by default;
+        :timeout: lifetime of entries, RESPONSE_CACHE timeout by default.
+    """
+    response_cache.register(models)
+    labels = [label.lower() for label in models]
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapped(view, request, *args, **kwargs):
+            user = request.user
+            if not response_cache.enabled or request.method not in SAFE_METHODS or not user.is_authenticated():
+                return view_method(view, request, *args, **kwargs)
+
+            # replica can lag behind counters, so scopes and entries are read from the primary
+            with read_replica(pinned=True):
+                cache = response_cache.cache
+                view_name = '%s.%s' % (view.__class__.__name__, view_method.__name__)
+                entry_key = response_cache.get_entry_key(view_name, request, response_cache.get_fingerprint(user))
+                dependencies = response_cache.get_dependencies(request, labels, scopes)
+
+                values = cache.get_many([entry_key] + dependencies)
+                entry = values.get(entry_key)
+                if entry is not None and all(entry['generations'].get(key) == values.get(key) for key in dependencies):
+                    response_cache.count(view_name, 'hits')
+                    return Response(entry['data'], status=entry['status'], headers=entry['headers'])
+                response_cache.count(view_name, 'misses')
+
+                # generations are taken before calculation, so changes made meanwhile invalidate the entry
+                generations = response_cache.get_generations(dependencies, values)
+                response = view_method(view, request, *args, **kwargs)
+                if response.status_code == 200 and isinstance(response, Response):
+                    headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+                    cache.set(entry_key, {
+                        'generations': generations,
+                        'data': response.data,
+                        'status': response.status_code,
+                        'headers': headers,
+                    }, timeout or response_cache.options.get('timeout', 300))
+                return response
+
+        return wrapped
+
+    return decorator
+
+
+class ResponseCacheMiddleware(object):
+    """ Increment counters changed by request again after its transaction is committed """
+
+    def process_request(self, request):
+        response_cache.track_bumps(reset=True)
+
+    def process_response(self, request, response):
+        response_cache.repeat_bumps()
+        return response
@@ -1,10 +1,12 @@
 from __future__ import unicode_literals
 
 from django.forms import model_to_dict
-from django.utils import six
 from rest_framework.authtoken.models import Token
 
+from nodeconductor.core.authentication import token_cache
+from nodeconductor.core.cache import response_cache
 from nodeconductor.core.log import event_logger
+from nodeconductor.core.models import ChangeTrackingMixin
 
 
 def create_auth_token(sender, instance, created=False, **kwargs):
@@ -12,10 +14,34 @@ def create_auth_token(sender, instance, created=False, **kwargs):
         Token.objects.create(user=instance)
 
 
+def invalidate_token_cache(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+def invalidate_user_tokens_cache(sender, instance, created=False, **kwargs):
+    """ Drop cached tokens of user if password, activity, permissions or other details are changed """
+    if not created and set(instance.get_changes()) - {'last_login'}:
+        token_cache.invalidate_user(instance)
+
+
+def invalidate_response_cache(sender, instance, **kwargs):
+    response_cache.invalidate(instance)
+
+
+def invalidate_response_cache_on_m2m_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        response_cache.invalidate(instance)
+
+
 def preserve_fields_before_update(sender, instance, **kwargs):
+    """ Deprecated: models should inherit ChangeTrackingMixin and use its get_old_values method """
     if instance.pk is None:
         return
 
+    if isinstance(instance, ChangeTrackingMixin):
+        setattr(instance, '_old_values', instance.get_old_values())
+        return
+
     meta = instance._meta
     old_instance = meta.model._default_manager.get(pk=instance.pk)
 
@@ -33,15 +59,11 @@ def log_user_save(sender, instance, created=False, **kwargs):
             event_type='user_creation_succeeded',
             event_context={'affected_user': instance})
     else:
-        old_values = instance._old_values
-
-        password_changed = instance.password != old_values['password']
-        activation_changed = instance.is_active != old_values['is_active']
-        user_updated = any(
-            old_value != getattr(instance, field_name)
-            for field_name, old_value in six.iteritems(old_values)
-            if field_name not in ('password', 'is_active', 'last_login')
-        )
+        changed_fields = set(instance.get_changes())
+
+        password_changed = 'password' in changed_fields
+        activation_changed = 'is_active' in changed_fields
+        user_updated = bool(changed_fields - {'password', 'is_active', 'last_login'})
 
         if password_changed:
             event_logger.user.info(
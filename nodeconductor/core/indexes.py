@@ -0,0 +1,169 @@
+"""
+Migration operations for indexes that Django models cannot declare:
+partial indexes, indexes on expressions and PostgreSQL trigram indexes.
+
+Indexes are created only where the database supports them:
+
+- PostgreSQL supports all of them;
+- SQLite supports partial indexes since 3.8.0 and indexes on expressions since 3.9.0;
+- MySQL supports only plain indexes.
+
+Index which database does not support is skipped, so migrations work on all
+supported databases and slow queries are fixed where it is possible. Partial index
+is not created without its condition either, as it could duplicate plain index.
+"""
+from __future__ import unicode_literals
+
+import logging
+import re
+
+from django.db import DatabaseError, router, transaction
+from django.db.migrations.operations.base import Operation
+
+
+logger = logging.getLogger(__name__)
+
+COLUMN_NAME = re.compile(r'^\w+$')
+
+
+def supports_partial_indexes(connection):
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 8, 0)
+    return connection.vendor == 'postgresql'
+
+
+def supports_expression_indexes(connection):
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 9, 0)
+    return connection.vendor == 'postgresql'
+
+
+def has_extension(connection, name):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_extension WHERE extname = %s', [name])
+        return cursor.fetchone() is not None
+
+
+class EnableExtension(Operation):
+    """ Enable PostgreSQL extension if current database user is allowed to do it.
+
+        Indexes which require the extension are skipped if it is not enabled.
+    """
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, name):
+        self.name = name
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql' or has_extension(connection, self.name):
+            return
+        try:
+            # savepoint keeps migration transaction usable if extension cannot be created
+            with transaction.atomic(using=connection.alias):
+                schema_editor.execute('CREATE EXTENSION IF NOT EXISTS %s' % schema_editor.quote_name(self.name))
+        except DatabaseError as e:
+            logger.warning('PostgreSQL extension %s is not enabled, dependent indexes are skipped: %s', self.name, e)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # extension can be used by other applications
+        pass
+
+    def describe(self):
+        return 'Enable PostgreSQL extension %s' % self.name
+
+
+class CreateIndex(Operation):
+    """ Create index on columns or SQL expressions of model table.
+
+        :name: name of index, unique within database;
+        :model_name: name of model of current application;
+        :columns: column names, SQL expressions or (column or expression, operator class) tuples,
+                  e.g. ('UPPER(name::text)', 'gin_trgm_ops');
+        :condition: SQL condition of partial index;
+        :method: PostgreSQL index method, e.g. 'gin';
+        :vendors: database vendors which get the index, all by default;
+        :extension: PostgreSQL extension required by the index.
+    """
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, name, model_name, columns, condition=None, method=None, vendors=None, extension=None):
+        self.name = name
+        self.model_name = model_name
+        self.columns = columns
+        self.condition = condition
+        self.method = method
+        self.vendors = vendors
+        self.extension = extension
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def get_model(self, app_label, schema_editor, state):
+        model = state.render().get_model(app_label, self.model_name)
+        if router.allow_migrate(schema_editor.connection.alias, model):
+            return model
+
+    def get_columns(self):
+        """ Return (column or expression, operator class or None) tuples """
+        return [column if isinstance(column, (list, tuple)) else (column, None) for column in self.columns]
+
+    def is_supported(self, connection):
+        if self.vendors is not None and connection.vendor not in self.vendors:
+            return False
+        if self.extension is not None and not has_extension(connection, self.extension):
+            return False
+        if any(opclass is not None for _, opclass in self.get_columns()) and connection.vendor != 'postgresql':
+            return False
+        if self.condition and not supports_partial_indexes(connection):
+            return False
+        if any(not COLUMN_NAME.match(column) for column, _ in self.get_columns()):
+            return supports_expression_indexes(connection)
+        return True
+
+    def get_create_sql(self, schema_editor, table):
+        columns = []
+        for column, opclass in self.get_columns():
+            # operator class follows parenthesized expression: (UPPER(name::text)) gin_trgm_ops
+            sql = schema_editor.quote_name(column) if COLUMN_NAME.match(column) else '(%s)' % column
+            columns.append('%s %s' % (sql, opclass) if opclass else sql)
+        columns = ', '.join(columns)
+        sql = 'CREATE INDEX %s ON %s' % (schema_editor.quote_name(self.name), schema_editor.quote_name(table))
+        if self.method and schema_editor.connection.vendor == 'postgresql':
+            sql += ' USING %s' % self.method
+        sql += ' (%s)' % columns
+        if self.condition:
+            sql += ' WHERE %s' % self.condition
+        return sql
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = self.get_model(app_label, schema_editor, to_state)
+        if model is None:
+            return
+        if not self.is_supported(schema_editor.connection):
+            logger.info('Index %s is not supported by database %s and is skipped',
+                        self.name, schema_editor.connection.alias)
+            return
+        schema_editor.execute(self.get_create_sql(schema_editor, model._meta.db_table))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = self.get_model(app_label, schema_editor, from_state)
+        if model is None:
+            return
+        connection = schema_editor.connection
+        if connection.vendor in ('postgresql', 'sqlite'):
+            # index is missing if it has been skipped
+            schema_editor.execute('DROP INDEX IF EXISTS %s' % schema_editor.quote_name(self.name))
+        elif self.is_supported(connection):
+            schema_editor.execute('DROP INDEX %s ON %s' % (
+                schema_editor.quote_name(self.name), schema_editor.quote_name(model._meta.db_table)))
+
+    def describe(self):
+        return 'Create index %s on %s' % (self.name, self.model_name)
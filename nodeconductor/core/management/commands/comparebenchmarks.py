@@ -0,0 +1,34 @@
+from __future__ import unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nodeconductor.benchmarks import runner
+
+
+class Command(BaseCommand):
+    """ Compare benchmarks results with a baseline, fail if there are regressions """
+
+    args = '<baseline.json> <current.json>'
+    option_list = BaseCommand.option_list + (
+        make_option('--time-tolerance', dest='time_tolerance', type='float', default=0.5,
+                    help='Allowed relative growth of time, 0.5 means 50%.'),
+        make_option('--min-time-delta', dest='min_time_delta', type='float', default=0.01,
+                    help='Time growth in seconds that is ignored as a noise.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 2:
+            raise CommandError('Paths of baseline and current results are required.')
+
+        baseline, current = runner.load(args[0]), runner.load(args[1])
+        regressions = runner.compare(
+            baseline, current, time_tolerance=options['time_tolerance'], min_time_delta=options['min_time_delta'])
+
+        for regression in regressions:
+            self.stdout.write('%s: %s %s -> %s' % (
+                regression.name, regression.metric, regression.baseline, regression.current))
+        if regressions:
+            raise CommandError('%s regressions are found' % len(regressions))
+        self.stdout.write('No regressions are found')
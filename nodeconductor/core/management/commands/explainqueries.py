@@ -0,0 +1,50 @@
+from __future__ import unicode_literals
+
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.runner import DiscoverRunner
+
+
+class Command(BaseCommand):
+    """ Capture query plans of hot filters of list endpoints in a PostgreSQL test database,
+        fail if a watched table is scanned fully.
+    """
+
+    option_list = BaseCommand.option_list + (
+        make_option('--customers', dest='customers', type='int', default=5,
+                    help='Number of generated customers.'),
+        make_option('--output', dest='output', default='plans.json',
+                    help='Path of JSON file with plans.'),
+    )
+
+    def handle(self, *args, **options):
+        # scenario uses test factories that are not installed in production
+        from nodeconductor.benchmarks import plans
+
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans can be captured only on PostgreSQL database.')
+
+        test_runner = DiscoverRunner(interactive=False, verbosity=0)
+        test_runner.setup_test_environment()
+        old_config = test_runner.setup_databases()
+        try:
+            results = plans.PlanRunner(scenario_options={'customers': options['customers']}).run()
+        finally:
+            test_runner.teardown_databases(old_config)
+            test_runner.teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+
+        failures = 0
+        for name, result in results.items():
+            for scan in result['full_scans']:
+                failures += 1
+                self.stdout.write('%s: %s of %s, filter: %s' % (name, scan['node'], scan['table'], scan['filter']))
+        self.stdout.write('Plans are saved to %s' % options['output'])
+        if failures:
+            raise CommandError('%s full scans are found' % failures)
+        self.stdout.write('No full scans are found')
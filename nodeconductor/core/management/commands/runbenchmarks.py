@@ -0,0 +1,43 @@
+from __future__ import unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+
+
+class Command(BaseCommand):
+    """ Run benchmarks of API endpoints and tasks in a test database """
+
+    option_list = BaseCommand.option_list + (
+        make_option('--sizes', dest='sizes', default='5,20',
+                    help='Comma separated numbers of generated customers.'),
+        make_option('--repeat', dest='repeat', type='int', default=3,
+                    help='Number of runs of each benchmark, the best time is reported.'),
+        make_option('--output', dest='output', default='benchmarks.json',
+                    help='Path of JSON file with results.'),
+    )
+
+    def handle(self, *args, **options):
+        # benchmarks use test factories that are not installed in production
+        from nodeconductor.benchmarks import runner
+
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('Sizes have to be comma separated integers.')
+
+        test_runner = DiscoverRunner(interactive=False, verbosity=0)
+        test_runner.setup_test_environment()
+        old_config = test_runner.setup_databases()
+        try:
+            results = runner.BenchmarkRunner(sizes=sizes, repeat=options['repeat']).run()
+        finally:
+            test_runner.teardown_databases(old_config)
+            test_runner.teardown_test_environment()
+
+        runner.dump(results, options['output'])
+        for name, result in results['results'].items():
+            self.stdout.write('%-60s queries=%-5s time=%.4fs status=%s' % (
+                name, result['queries'], result['time'], result['status']))
+        self.stdout.write('Results are saved to %s' % options['output'])
@@ -1,9 +1,14 @@
 from __future__ import unicode_literals
 
-from rest_framework import mixins
+from django.db.models.query import prefetch_related_objects
+from django.http import StreamingHttpResponse
+from rest_framework import mixins, renderers
+from rest_framework.permissions import SAFE_METHODS
 
+from nodeconductor.core import replicas
 from nodeconductor.core.models import SynchronizableMixin, SynchronizationStates
 from nodeconductor.core.exceptions import IncorrectStateException
+from nodeconductor.core.renderers import StreamingJSONRenderer
 
 
 class ListModelMixin(mixins.ListModelMixin):
@@ -42,3 +47,80 @@ class UserContextMixin(object):
         context = super(UserContextMixin, self).get_serializer_context()
         context['user'] = self.request.user
         return context
+
+
+class StreamingListMixin(object):
+    """
+    Stream unpaginated JSON list responses instead of building them in memory.
+
+    Response is streamed if client requests all entries with ?page_size=all
+    or the view is not paginated by default. Objects are fetched with queryset.iterator()
+    and serialized in chunks of streaming_chunk_size, prefetch_related lookups
+    are applied to each chunk. X-Result-Count header is calculated with
+    a separate count query. Paginated and non-JSON (e.g. browsable API)
+    responses are rendered as usual.
+    """
+    streaming_chunk_size = 100
+    streaming_page_size = 'all'
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_streaming_request(request):
+            return super(StreamingListMixin, self).list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_streaming_response(self.iter_serialized(queryset), queryset.count())
+
+    def is_streaming_request(self, request):
+        if not isinstance(request.accepted_renderer, renderers.JSONRenderer):
+            return False
+        paginator = self.paginator
+        if paginator is None:
+            return True
+        page_size_query_param = getattr(paginator, 'page_size_query_param', None)
+        if page_size_query_param and request.query_params.get(page_size_query_param) == self.streaming_page_size:
+            return True
+        # paginators without default page size, e.g. UnlimitedLinkHeaderPagination
+        return not paginator.get_page_size(request)
+
+    def iter_chunks(self, queryset):
+        chunk = []
+        for obj in queryset.iterator():
+            chunk.append(obj)
+            if len(chunk) == self.streaming_chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def iter_serialized(self, queryset):
+        prefetch_lookups = queryset._prefetch_related_lookups
+        for chunk in self.iter_chunks(queryset):
+            if prefetch_lookups:
+                prefetch_related_objects(chunk, prefetch_lookups)
+            for item in self.get_serializer(chunk, many=True).data:
+                yield item
+
+    def get_streaming_response(self, items, count):
+        renderer = StreamingJSONRenderer()
+        response = StreamingHttpResponse(
+            renderer.render_iter(items, self.request.accepted_media_type, self.get_renderer_context()),
+            content_type=renderer.media_type)
+        response['X-Result-Count'] = count
+        return response
+
+
+class ReadReplicaMixin(object):
+    """ Route reads of safe requests of the view to replicas unless user is pinned to the primary """
+
+    def initial(self, request, *args, **kwargs):
+        super(ReadReplicaMixin, self).initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replicas.get_replicas():
+            self._read_replica = replicas.read_replica(pinned=replicas.is_pinned(request.user))
+            self._read_replica.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        read_replica_block = getattr(self, '_read_replica', None)
+        if read_replica_block is not None:
+            self._read_replica = None
+            read_replica_block.__exit__(None, None, None)
+        return super(ReadReplicaMixin, self).finalize_response(request, response, *args, **kwargs)
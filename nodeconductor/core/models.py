@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 
+import copy
 import re
 import logging
 
@@ -15,8 +16,8 @@ from django.utils.encoding import force_text, python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 from django_fsm import transition, FSMIntegerField
 from uuidfield import UUIDField
-import reversion
 
+from nodeconductor.core import revisions
 from nodeconductor.logging.log import LoggableMixin
 
 
@@ -74,7 +75,73 @@ class ErrorMessageMixin(models.Model):
     error_message = models.TextField(blank=True)
 
 
-class User(LoggableMixin, UuidMixin, DescribableMixin, AbstractBaseUser, PermissionsMixin):
+class ChangeTrackingMixin(object):
+    """
+    Mixin to track changes of model fields without extra queries.
+
+    Values of tracked fields are remembered when instance is loaded from database
+    and after each save, so post_save handlers can compare them with saved ones.
+    Values that are not known (instance was constructed with explicit primary key
+    or loaded with deferred fields) are read from database right before save.
+    """
+    # Names of tracked fields, all concrete fields except primary key are tracked if None.
+    TRACKED_FIELDS = None
+
+    def __init__(self, *args, **kwargs):
+        super(ChangeTrackingMixin, self).__init__(*args, **kwargs)
+        self._tracked_values = {}
+        # Django constructs instances loaded from database with positional arguments
+        # or with keyword arguments for deferred model classes.
+        if self.pk is not None and ((args and not kwargs) or self._deferred):
+            self._remember_tracked_values()
+
+    @classmethod
+    def get_tracked_fields(cls):
+        if '_tracked_fields' not in cls.__dict__:
+            cls._tracked_fields = [
+                field for field in cls._meta.concrete_fields
+                if not field.primary_key and (cls.TRACKED_FIELDS is None or field.name in cls.TRACKED_FIELDS)]
+        return cls._tracked_fields
+
+    def _remember_tracked_values(self, field_names=None):
+        for field in self.get_tracked_fields():
+            if field_names is not None and field.name not in field_names:
+                continue
+            # deferred fields are not present in instance dictionary
+            if field.attname in self.__dict__:
+                value = self.__dict__[field.attname]
+                self._tracked_values[field.name] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def _load_missing_tracked_values(self):
+        missing = [field.name for field in self.get_tracked_fields() if field.name not in self._tracked_values]
+        if not missing or self.pk is None:
+            return
+        stored = self._meta.concrete_model._default_manager.filter(pk=self.pk).values_list(*missing).first()
+        if stored is not None:
+            self._tracked_values.update(zip(missing, stored))
+
+    def get_old_values(self):
+        """ Return values of tracked fields as they are stored in database, foreign keys are represented by ids """
+        self._load_missing_tracked_values()
+        return self._tracked_values.copy()
+
+    def get_changes(self):
+        """ Return old values of tracked fields that were changed since instance was loaded or saved """
+        old_values = self.get_old_values()
+        return {field.name: old_values[field.name] for field in self.get_tracked_fields()
+                if field.name in old_values and field.attname in self.__dict__
+                and old_values[field.name] != self.__dict__[field.attname]}
+
+    def has_changed(self, field_name):
+        return field_name in self.get_changes()
+
+    def save(self, *args, **kwargs):
+        self._load_missing_tracked_values()
+        super(ChangeTrackingMixin, self).save(*args, **kwargs)
+        self._remember_tracked_values(kwargs.get('update_fields'))
+
+
+class User(ChangeTrackingMixin, LoggableMixin, UuidMixin, DescribableMixin, AbstractBaseUser, PermissionsMixin):
     username = models.CharField(
         _('username'), max_length=30, unique=True,
         help_text=_('Required. 30 characters or fewer. Letters, numbers and '
@@ -280,13 +347,15 @@ class SynchronizableMixin(ErrorMessageMixin):
 
 
 class ReversionMixin(object):
+    """ Save version of object on each save, versions are captured by nodeconductor.core.revisions.
+        Version that repeats the last version of object is not saved if ignore_revision_duplicates is True.
+    """
 
     def save(self, save_revision=True, ignore_revision_duplicates=True, **kwargs):
+        result = super(ReversionMixin, self).save(**kwargs)
         if save_revision:
-            with reversion.create_revision():
-                reversion.revision_context_manager.set_ignore_duplicates(ignore_revision_duplicates)
-                return super(ReversionMixin, self).save(**kwargs)
-        return super(ReversionMixin, self).save(**kwargs)
+            revisions.capture(self, ignore_duplicates=ignore_revision_duplicates)
+        return result
 
 
 class SerializableAbstractMixin(object):
@@ -1,11 +1,43 @@
 from __future__ import unicode_literals
-from collections import OrderedDict
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict, namedtuple
+import hashlib
+import json
 
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils import six
+from django.utils.encoding import force_text
+from django.utils.six.moves.urllib import parse as urlparse
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
+Cursor = namedtuple('Cursor', ['ordering', 'position', 'pk', 'reverse'])
+
+
+def _set_query_param(url, key, val=None):
+    """
+    Set or remove (if val is None) query parameter of the URL.
+    Unlike DRF helpers keeps blank parameters, e.g. ?potential
+    """
+    (scheme, netloc, path, query, fragment) = urlparse.urlsplit(url)
+    query_dict = urlparse.parse_qs(query, keep_blank_values=True)
+    if val is None:
+        query_dict.pop(key, None)
+    else:
+        query_dict[key] = [val]
+    query = urlparse.urlencode(sorted(list(query_dict.items())), doseq=True)
+    return urlparse.urlunsplit((scheme, netloc, path, query, fragment))
+
+
 class LinkHeaderPagination(pagination.PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 300
@@ -43,6 +75,250 @@ class LinkHeaderPagination(pagination.PageNumberPagination):
         return replace_query_param(url, self.page_query_param, page_number)
 
 
+class CursorLinkHeaderPagination(pagination.BasePagination):
+    """
+    Keyset pagination that exposes the same Link header contract as LinkHeaderPagination.
+
+    Pages are fetched with an indexed range filter on (ordering field, pk) instead of OFFSET,
+    so deep pages are as cheap as the first one and rows don't shift between pages.
+    Cursors are opaque base64 encoded positions of the first or the last item of the page.
+
+    Ordering is taken from the ?o parameter if it is declared in Meta.order_by of the view filter class,
+    otherwise from the queryset. Only non-nullable fields can be used for ordering,
+    other fields fall back to the default ordering.
+
+    X-Result-Count is calculated according to count_mode:
+     - 'exact' - COUNT query for every page;
+     - 'cached' - COUNT query result is cached for count_cache_timeout seconds;
+     - 'estimated' - planner estimation on PostgreSQL, exact count on other databases.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 300
+    cursor_query_param = 'cursor'
+    ordering = 'pk'
+    count_mode = 'exact'
+    count_cache_timeout = 60
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering_field = self.get_ordering_field(queryset, request, view)
+        self.count = self.get_count(queryset)
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor.reverse
+        field = self.ordering_field.lstrip('-')
+        descending = self.ordering_field.startswith('-') != reverse
+
+        if descending:
+            queryset = queryset.order_by('-' + field, '-pk')
+        else:
+            queryset = queryset.order_by(field, 'pk')
+
+        if cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            try:
+                position = self._get_field(queryset.model, field).to_python(cursor.position)
+                pk = queryset.model._meta.pk.to_python(cursor.pk)
+            except ValidationError:
+                # cursor has been tampered with
+                raise NotFound('Invalid cursor')
+            queryset = queryset.filter(
+                Q(**{'%s__%s' % (field, lookup): position}) |
+                Q(**{field: position, 'pk__' + lookup: pk}))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering_field(self, queryset, request, view):
+        """ Return ordering field requested with ?o if it is allowed for the view, default ordering otherwise """
+        filter_class = getattr(view, 'filter_class', None)
+        ordering = request.query_params.get(getattr(filter_class, 'order_by_field', 'o'))
+        if filter_class is not None and ordering:
+            mapping = getattr(filter_class.Meta, 'order_by_mapping', {})
+            descending = ordering.startswith('-')
+            ordering = mapping.get(ordering.lstrip('-'), ordering.lstrip('-'))
+            ordering = '-' + ordering if descending else ordering
+
+            allowed = getattr(filter_class.Meta, 'order_by', False)
+            if allowed is True or ordering in [o[0] if isinstance(o, (list, tuple)) else o for o in allowed or []]:
+                if self._get_field(queryset.model, ordering) is not None:
+                    return ordering
+
+        default_ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if default_ordering and self._get_field(queryset.model, default_ordering[0]) is not None:
+            return default_ordering[0]
+        return self.ordering
+
+    def get_count(self, queryset):
+        if self.count_mode == 'estimated':
+            count = _estimate_count(queryset)
+            if count is not None:
+                return count
+
+        if self.count_mode == 'cached':
+            try:
+                query = str(queryset.query)
+            except EmptyResultSet:
+                return 0
+            key = 'pagination_count:%s' % hashlib.md5(query.encode('utf-8')).hexdigest()
+            count = cache.get(key)
+            if count is None:
+                count = queryset.count()
+                cache.set(key, count, self.count_cache_timeout)
+            return count
+
+        return queryset.count()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            query = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            cursor = Cursor(
+                ordering=query['o'],
+                position=query['p'],
+                pk=query['k'],
+                reverse=bool(query.get('r')),
+            )
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound('Invalid cursor')
+
+        # cursor of another ordering can't be applied, start from the first page
+        if cursor.ordering != self.ordering_field:
+            return None
+        return cursor
+
+    def encode_cursor(self, obj, reverse):
+        position = obj
+        for name in self.ordering_field.lstrip('-').split('__'):
+            position = getattr(position, name)
+        query = {'o': self.ordering_field, 'p': force_text(position), 'k': force_text(obj.pk)}
+        if reverse:
+            query['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(query, sort_keys=True).encode('utf-8')).decode('ascii')
+        return _set_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        link_candidates = OrderedDict((
+            ('first', self.get_first_link),
+            ('prev', self.get_previous_link),
+            ('next', self.get_next_link),
+        ))
+
+        link = ', '.join(
+            '<%s>; rel="%s"' % (get_link(), rel)
+            for rel, get_link in link_candidates.items()
+            if get_link()
+        )
+
+        headers = {
+            'X-Result-Count': self.count,
+            'Link': link,
+        }
+
+        return Response(data, headers=headers)
+
+    def get_first_link(self):
+        # keep blank cursor parameter, so that the first page is still requested in the cursor mode
+        return _set_query_param(self.base_url, self.cursor_query_param, '')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def _get_field(model, path):
+        """ Return model field by lookup path if it can be used in keyset, None otherwise """
+        field = None
+        for name in path.lstrip('-').split('__'):
+            if field is not None:
+                if not field.rel:
+                    return None
+                model = field.rel.to
+            try:
+                field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if field.null:
+                return None
+        if field.rel:
+            return None
+        return field
+
+
+class OptionalCursorLinkHeaderPagination(CursorLinkHeaderPagination):
+    """
+    Page number pagination that switches to the keyset one if ?cursor parameter is passed.
+
+    Lets high-churn collections opt in to the cursor mode without breaking existing ?page clients.
+    """
+    page_number_pagination_class = LinkHeaderPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.page_number_paginator = None
+            return super(OptionalCursorLinkHeaderPagination, self).paginate_queryset(queryset, request, view=view)
+
+        self.page_number_paginator = self.page_number_pagination_class()
+        page = self.page_number_paginator.paginate_queryset(queryset, request, view=view)
+        self.display_page_controls = self.page_number_paginator.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_paginated_response(data)
+        return super(OptionalCursorLinkHeaderPagination, self).get_paginated_response(data)
+
+    def to_html(self):
+        return self.page_number_paginator.to_html()
+
+
+def _estimate_count(queryset):
+    """ Return number of rows estimated by PostgreSQL planner or None if estimation is not available """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, six.string_types):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
 class UnlimitedLinkHeaderPagination(LinkHeaderPagination):
     """
     A hackish paginator for cases when calculating a queryset to display is an expensive query and if
@@ -15,3 +15,20 @@ class BrowsableAPIRenderer(renderers.BrowsableAPIRenderer):
         context = super(BrowsableAPIRenderer, self).get_context(data, accepted_media_type, renderer_context)
         context['version'] = __version__
         return context
+
+
+class StreamingJSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer that encodes a list incrementally.
+
+    Items are rendered one by one, so a whole response never has to be kept
+    in memory and the first bytes are sent before the last item is serialized.
+    """
+
+    def render_iter(self, items, accepted_media_type=None, renderer_context=None):
+        yield b'['
+        for index, item in enumerate(items):
+            if index:
+                yield b','
+            yield self.render(item, accepted_media_type, renderer_context)
+        yield b']'
@@ -0,0 +1,149 @@
+"""
+Routing of read-only queries to read replicas.
+
+Queries are sent to replicas only within read_replica() blocks: safe requests
+of views with core.mixins.ReadReplicaMixin, tasks and commands decorated with read_replica.
+Everything else, including all writes, reads within transactions
+(e.g. select_for_update of quotas and state transitions) and reads after
+a write in the same block, uses the primary database.
+
+Replicas lag behind the primary, so user who has written to the primary
+is pinned to it for READ_REPLICA_LAG seconds: their requests do not use replicas
+during this window. Pins are stored in the cache, so the cache has to be shared
+by all processes for pinning to work across them.
+
+Replicas are configured as database aliases:
+
+    DATABASES['replica'] = {...}
+    NODECONDUCTOR['READ_REPLICAS'] = ['replica']
+    NODECONDUCTOR['READ_REPLICA_LAG'] = 5
+"""
+from __future__ import unicode_literals
+
+import functools
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class ReplicaState(threading.local):
+    """ Routing state of current request or task """
+
+    def __init__(self):
+        self.depth = 0
+        # primary has been written within current request
+        self.written = False
+        # primary has been written within current read_replica() block
+        self.block_written = False
+        self.pinned = False
+
+
+_state = ReplicaState()
+
+
+def get_replicas():
+    return settings.NODECONDUCTOR.get('READ_REPLICAS', [])
+
+
+def get_lag():
+    return settings.NODECONDUCTOR.get('READ_REPLICA_LAG', 5)
+
+
+def get_pin_key(user):
+    return 'nc:replicas:pin:%s' % user.pk
+
+
+def pin_user(user):
+    """ Route reads of the user to the primary while replicas can miss their writes """
+    cache.set(get_pin_key(user), True, get_lag())
+
+
+def is_pinned(user):
+    return user.is_authenticated() and cache.get(get_pin_key(user)) is not None
+
+
+def reset():
+    _state.depth = 0
+    _state.written = False
+    _state.block_written = False
+    _state.pinned = False
+
+
+class read_replica(object):
+    """ Context manager and decorator which allows reads from replicas within the block.
+        Reads are not routed to replicas if :pinned: is True, e.g. for a pinned user.
+        Pinned nested block routes its reads to the primary until it is exited.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self._outer_pinned = []
+
+    def __enter__(self):
+        self._outer_pinned.append(_state.pinned)
+        if not _state.depth:
+            _state.block_written = False
+            _state.pinned = self.pinned
+        else:
+            _state.pinned = _state.pinned or self.pinned
+        _state.depth += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _state.depth -= 1
+        _state.pinned = self._outer_pinned.pop()
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapped(*args, **kwargs):
+            with read_replica(self.pinned):
+                return func(*args, **kwargs)
+        return wrapped
+
+
+class ReplicaRouter(object):
+    """ Database router which sends reads within read_replica() blocks to replicas """
+
+    def db_for_read(self, model, **hints):
+        # related objects of objects read from replicas are read from the primary outside of blocks too
+        replicas = get_replicas()
+        if not replicas or not _state.depth or _state.pinned or _state.block_written:
+            return DEFAULT_DB_ALIAS
+        # data read within transaction has to be consistent with its writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _state.written = _state.block_written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas contain the same data as the primary
+        aliases = [DEFAULT_DB_ALIAS] + list(get_replicas())
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, model):
+        # replicas are migrated by replication
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaPinMiddleware(object):
+    """ Pin user to the primary after requests that have written to it """
+
+    def process_request(self, request):
+        reset()
+
+    def process_response(self, request, response):
+        if _state.written and get_replicas():
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated():
+                pin_user(user)
+        reset()
+        return response
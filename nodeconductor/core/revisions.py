@@ -0,0 +1,204 @@
+"""
+Batched capture of versions of ReversionMixin models.
+
+Objects saved within revisions.batch() block are collected in a buffer and
+their versions are written right before the outermost block commits:
+one Revision row and one bulk insert of Version rows per batch. Versions are
+written in the same transaction, so they are rolled back together with changes
+of objects. Objects saved outside of batch are versioned immediately.
+
+Version that repeats the last version of the object is not saved unless
+duplicates are kept explicitly (ReversionMixin.save(ignore_revision_duplicates=False)),
+duplicates are removed from old history by compact_versions.
+
+Versions of frequently updated models can be sampled: if model has sampling
+interval, at most one version of its object is kept per interval. Later save
+within the interval replaces this version with a new version of the current
+revision, so the version moves forward in time together with its data and
+reversion.get_for_date never returns data saved after the requested date.
+Intervals are configured per model in seconds, no model is sampled by default:
+
+    NODECONDUCTOR['REVISION_SAMPLING_INTERVALS'] = {
+        'quotas.quota': 60,
+    }
+"""
+from __future__ import unicode_literals
+
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+import reversion
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from reversion.models import Revision, Version
+
+
+# Maximum number of versions in one DELETE query
+CHUNK_SIZE = 500
+
+
+class RevisionBuffer(threading.local):
+    """ Objects saved within current batch of the thread """
+
+    def __init__(self):
+        self.depth = 0
+        # {(model, pk): object}
+        self.objects = collections.OrderedDict()
+        # keys of objects which duplicate versions are saved
+        self.keep_duplicates = set()
+
+
+_buffer = RevisionBuffer()
+
+
+def get_sampling_interval(model):
+    intervals = settings.NODECONDUCTOR.get('REVISION_SAMPLING_INTERVALS', {})
+    return intervals.get('%s.%s' % (model._meta.app_label, model._meta.model_name))
+
+
+def get_sampling_key(version_data):
+    return 'nc:revisions:sampled:{}:{}'.format(version_data['content_type'].id, version_data['object_id'])
+
+
+def capture(obj, ignore_duplicates=True):
+    """ Add version of saved object to current batch or save it immediately """
+    # objects saved within reversion.create_revision() block are versioned by reversion itself
+    if not reversion.is_registered(obj.__class__) or reversion.revision_context_manager.is_active():
+        return
+    key = obj.__class__, obj.pk
+    if _buffer.depth:
+        _buffer.objects[key] = obj
+        if ignore_duplicates:
+            _buffer.keep_duplicates.discard(key)
+        else:
+            _buffer.keep_duplicates.add(key)
+    else:
+        save_versions([obj], keep_duplicates=() if ignore_duplicates else [key])
+
+
+@contextmanager
+def batch():
+    """ Atomic block that saves versions of objects saved within it with one revision """
+    with transaction.atomic():
+        keys = set(_buffer.objects)
+        _buffer.depth += 1
+        try:
+            yield
+        except Exception:
+            # changes of objects saved within the block are rolled back
+            for key in set(_buffer.objects) - keys:
+                del _buffer.objects[key]
+                _buffer.keep_duplicates.discard(key)
+            raise
+        finally:
+            _buffer.depth -= 1
+
+        if not _buffer.depth:
+            objects, _buffer.objects = _buffer.objects.values(), collections.OrderedDict()
+            keep_duplicates, _buffer.keep_duplicates = _buffer.keep_duplicates, set()
+            save_versions(objects, keep_duplicates)
+
+
+def get_last_versions_data(versions_data):
+    """ Return serialized data of the last versions of objects: {(content type id, object id): data} """
+    object_ids = collections.defaultdict(list)
+    for version_data in versions_data:
+        object_ids[version_data['content_type'].id].append(version_data['object_id'])
+
+    last_data = {}
+    for content_type_id, ids in object_ids.items():
+        last_ids = (Version.objects
+                    .filter(content_type_id=content_type_id, object_id__in=ids)
+                    .values('object_id')
+                    .annotate(last_id=Max('pk'))
+                    .values_list('last_id', flat=True))
+        rows = Version.objects.filter(pk__in=list(last_ids)).values_list('object_id', 'serialized_data')
+        last_data.update(((content_type_id, object_id), data) for object_id, data in rows)
+    return last_data
+
+
+def save_versions(objects, keep_duplicates=()):
+    """ Save versions of objects with one revision.
+        Versions that repeat the last version of object are skipped unless (model, pk) of object
+        is in keep_duplicates, versions of sampled objects replace their version of current interval.
+    """
+    versions_data = []
+    for obj in objects:
+        version_data = reversion.default_revision_manager.get_adapter(obj.__class__).get_version_data(obj)
+        versions_data.append((obj, version_data))
+
+    checked = [version_data for obj, version_data in versions_data
+               if (obj.__class__, obj.pk) not in keep_duplicates]
+    last_data = get_last_versions_data(checked) if checked else {}
+
+    now = time.time()
+    new_versions, replaced_ids, sampling_keys = [], [], {}
+    for obj, version_data in versions_data:
+        object_key = version_data['content_type'].id, version_data['object_id']
+        if (obj.__class__, obj.pk) not in keep_duplicates and \
+                last_data.get(object_key) == version_data['serialized_data']:
+            continue
+
+        interval = get_sampling_interval(obj.__class__)
+        if interval:
+            key = get_sampling_key(version_data)
+            sampled = cache.get(key)
+            if sampled is not None:
+                # version keeps sampling interval of the replaced one
+                version_id, expires = sampled
+                replaced_ids.append(version_id)
+            else:
+                expires = now + interval
+            sampling_keys[object_key] = (key, expires)
+        new_versions.append(Version(**version_data))
+
+    if not new_versions:
+        return None
+
+    if replaced_ids:
+        # version is missing if transaction that has created it was rolled back
+        Version.objects.filter(pk__in=replaced_ids).delete()
+
+    revision = Revision.objects.create(manager_slug='default')
+    for version in new_versions:
+        version.revision = revision
+    Version.objects.bulk_create(new_versions)
+
+    if sampling_keys:
+        # bulk_create does not set primary keys
+        rows = Version.objects.filter(revision=revision).values_list('id', 'content_type_id', 'object_id')
+        for version_id, content_type_id, object_id in rows:
+            if (content_type_id, object_id) in sampling_keys:
+                key, expires = sampling_keys[content_type_id, object_id]
+                cache.set(key, (version_id, expires), max(int(expires - now), 1))
+    return revision
+
+
+def compact_versions(model, created_before):
+    """ Delete versions of model objects created before given date that repeat the previous version
+        of the same object. Answers of reversion.get_for_date are not changed: the previous version
+        has the same data. Return number of deleted versions.
+    """
+    rows = (Version.objects
+            .filter(content_type=ContentType.objects.get_for_model(model),
+                    revision__date_created__lt=created_before)
+            .order_by('object_id', 'pk')
+            .values_list('pk', 'object_id', 'serialized_data'))
+
+    duplicate_ids = []
+    previous_object_id, previous_data = None, None
+    for pk, object_id, serialized_data in rows.iterator():
+        if object_id == previous_object_id and serialized_data == previous_data:
+            duplicate_ids.append(pk)
+        previous_object_id, previous_data = object_id, serialized_data
+
+    with transaction.atomic():
+        for index in range(0, len(duplicate_ids), CHUNK_SIZE):
+            Version.objects.filter(pk__in=duplicate_ids[index:index + CHUNK_SIZE]).delete()
+        Revision.objects.filter(date_created__lt=created_before, version__isnull=True).delete()
+    return len(duplicate_ids)
@@ -3,10 +3,13 @@ import base64
 from django.core import validators
 from django.core.exceptions import ImproperlyConfigured, MultipleObjectsReturned, ObjectDoesNotExist
 from django.core.urlresolvers import reverse, resolve, Resolver404
+from django.db.models import Manager
 from rest_framework import serializers
 from rest_framework.fields import Field, ReadOnlyField
+from rest_framework.serializers import LIST_SERIALIZER_KWARGS
 
 from nodeconductor.core.fields import TimestampField
+from nodeconductor.core.utils import prefetch_generic_relation
 from nodeconductor.core.signals import pre_serializer_fields
 
 
@@ -66,6 +69,66 @@ class UnboundSerializerMethodField(ReadOnlyField):
         return self.filter_function(value, request)
 
 
+class PrefetchedField(Field):
+    """
+    A read-only field whose values are loaded for a whole page of objects at once.
+
+    :prefetch_function: is called with list of serialized objects and request
+    and returns dictionary {object pk: representation}. List serializers of
+    AugmentedSerializerMixin call prefetch of all such fields once per page,
+    single objects are prefetched when they are rendered.
+    Objects missing in returned dictionary are represented by :empty_value:.
+
+    Example of signal handler that injects prefetched field:
+        def get_clouds(projects, request):
+            clouds = collections.defaultdict(list)
+            for membership in CloudProjectMembership.objects.filter(project__in=projects):
+                clouds[membership.project_id].append(membership.cloud.name)
+            return clouds
+
+        def add_clouds(sender, fields, **kwargs):
+            fields['clouds'] = PrefetchedField(get_clouds, empty_value=[])
+    """
+
+    def __init__(self, prefetch_function=None, empty_value=None, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super(PrefetchedField, self).__init__(**kwargs)
+        if prefetch_function is not None:
+            self.prefetch = prefetch_function
+        self.empty_value = empty_value
+        self._values = {}
+        self._prefetched_pks = set()
+
+    def prefetch(self, objects, request):
+        raise NotImplementedError()
+
+    def load(self, objects):
+        objects = [obj for obj in objects if obj.pk not in self._prefetched_pks]
+        if objects:
+            self._values.update(self.prefetch(objects, self.context.get('request')))
+            self._prefetched_pks.update(obj.pk for obj in objects)
+
+    def to_representation(self, obj):
+        self.load([obj])
+        return self._values.get(obj.pk, self.empty_value)
+
+
+class PrefetchListSerializer(serializers.ListSerializer):
+    """
+    List serializer that loads values of all prefetched fields of child serializer
+    for all serialized objects before they are rendered.
+    """
+
+    def to_representation(self, data):
+        objects = list(data.all() if isinstance(data, Manager) else data)
+        if objects:
+            for field in self.child.fields.values():
+                if isinstance(field, PrefetchedField):
+                    field.load(objects)
+        return super(PrefetchListSerializer, self).to_representation(objects)
+
+
 class GenericRelatedField(Field):
     """
     A custom field to use for the `tagged_object` generic relationship.
@@ -147,6 +210,27 @@ class GenericRelatedField(Field):
         return obj
 
 
+class GenericRelatedListSerializer(PrefetchListSerializer):
+    """
+    List serializer that resolves generic relations of all serialized objects
+    with one query per content type before fields of child serializer are rendered.
+
+    Usage:
+
+    .. code-block:: python
+
+        class Meta(object):
+            list_serializer_class = GenericRelatedListSerializer
+    """
+
+    def to_representation(self, data):
+        objects = list(data.all() if isinstance(data, Manager) else data)
+        for field in self.child.fields.values():
+            if isinstance(field, GenericRelatedField) and '.' not in field.source and field.source != '*':
+                prefetch_generic_relation(objects, field.source)
+        return super(GenericRelatedListSerializer, self).to_representation(objects)
+
+
 class AugmentedSerializerMixin(object):
     """
     This mixing provides several extensions to stock Serializer class:
@@ -220,7 +304,13 @@ class AugmentedSerializerMixin(object):
                         'customer': ('uuid', 'name', 'native_name')
                     }
 
-    3,  Protect some fields from change.
+    3.  Load values of fields for a whole page of objects.
+
+        Values of PrefetchedField, including fields injected with pre_serializer_fields signal,
+        are loaded once per page by the list serializer instead of once per object.
+        Custom Meta.list_serializer_class should extend PrefetchListSerializer.
+
+    4.  Protect some fields from change.
 
         Example:
             class ProjectSerializer(AugmentedSerializerMixin,
@@ -232,6 +322,15 @@ class AugmentedSerializerMixin(object):
 
     """
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        child_serializer = cls(*args, **kwargs)
+        list_kwargs = {'child': child_serializer}
+        list_kwargs.update({key: value for key, value in kwargs.items() if key in LIST_SERIALIZER_KWARGS})
+        meta = getattr(cls, 'Meta', None)
+        list_serializer_class = getattr(meta, 'list_serializer_class', PrefetchListSerializer)
+        return list_serializer_class(*args, **list_kwargs)
+
     def get_fields(self):
         fields = super(AugmentedSerializerMixin, self).get_fields()
         pre_serializer_fields.send(sender=self.__class__, fields=fields)
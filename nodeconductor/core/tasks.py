@@ -2,15 +2,21 @@ from __future__ import unicode_literals
 
 import functools
 import logging
+import time
+import uuid
 
+from django.core.cache import cache
 from django.db import transaction, IntegrityError, DatabaseError
 from django.conf import settings
 from django.utils import six
+from django.utils.encoding import force_text
 from django_fsm import TransitionNotAllowed
 
-from celery import current_app, current_task
+from celery import Task, current_app, current_task, shared_task
 from celery.execute import send_task as send_celery_task
-from celery.exceptions import MaxRetriesExceededError
+from celery.exceptions import MaxRetriesExceededError, Retry
+
+from nodeconductor.core.throttling import RedisSemaphore
 
 
 logger = logging.getLogger(__name__)
@@ -157,7 +163,7 @@ def tracked_processing(model_class, processing_state, desired_state, error_state
 
 class Throttle(object):
     """ Limit a number of celery tasks running in parallel.
-        Retry task until conditions meet or timeout exceed.
+        Wait until a slot is free or retry task if it is not freed in wait_timeout.
 
         An instance can be used either as a decorator or as a context manager.
 
@@ -177,7 +183,8 @@ class Throttle(object):
         :param key: an additional key to be used with task name
         :param concurrency: a number of tasks running at once
         :param retry_delay: a time in seconds before the next try
-        :param timeout: a time in seconds to keep a lock
+        :param timeout: a time in seconds to keep a lock, see heartbeat() for longer tasks
+        :param wait_timeout: a time in seconds to wait for a free slot before retry
 
         Concurrency and other options can be set via django settings:
 
@@ -192,20 +199,27 @@ class Throttle(object):
 
         But these settings have lower priority and will be used only when
         they omitted during task definition.
+
+        Slots are granted in order of arrival: a task keeps its place in a queue
+        between retries, because its request id is used as a holder id.
+        A slot of crashed worker is freed after timeout.
     """
 
     DEFAULT_OPTIONS = {
         'concurrency': 1,
         'retry_delay': 30,
         'timeout': 3600,
+        'wait_timeout': 60,
     }
 
     def __init__(self, key='*', **kwargs):
         self.set_options(**kwargs)
         self.task_name = None
         self.task_key = key
+        self.holder = None
 
     def __enter__(self):
+        self.holder = current_task.request.id if current_task else uuid.uuid4().hex
         if self.acquire_lock():
             return self
 
@@ -214,6 +228,7 @@ class Throttle(object):
             # this guaranties that task will be executed rather than failed
             current_task.retry(countdown=self.opt('retry_delay'), max_retries=10000)
         except MaxRetriesExceededError as e:
+            self.semaphore.leave(self.holder)
             six.reraise(Throttled, e)
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -250,28 +265,42 @@ class Throttle(object):
     def redis(self):
         return current_app.backend.client
 
+    @property
+    def semaphore(self):
+        # waiter has to keep its place in a queue until the next retry
+        waiter_ttl = self.opt('wait_timeout') + 2 * self.opt('retry_delay')
+        return RedisSemaphore(self.redis, self.key, concurrency=int(self.opt('concurrency')),
+                              lease=self.opt('timeout'), waiter_ttl=waiter_ttl)
+
     def acquire_lock(self):
-        concurrency = self.opt('concurrency')
-        currently_running = self.redis.get(self.key) or 0
-        if int(currently_running) >= int(concurrency):
-            logger.debug('Tasks limit exceed for %s, limit: %s', self.key, concurrency)
-            return False
-
-        pipe = self.redis.pipeline()
-        pipe.incr(self.key)
-        pipe.expire(self.key, self.opt('timeout'))
-        pipe.execute()
-        logger.debug('Acquire lock for %s, total: %s', self.key, currently_running)
+        semaphore = self.semaphore
+        deadline = time.time() + self.opt('wait_timeout')
+        while not semaphore.acquire(self.holder):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                logger.debug('Tasks limit exceed for %s, limit: %s, waiters: %s',
+                             self.key, semaphore.concurrency, semaphore.get_waiters())
+                return False
+            semaphore.wait(self.holder, remaining)
+
+        logger.debug('Acquire lock for %s, holder: %s', self.key, self.holder)
         return True
 
     def release_lock(self):
-        pipe = self.redis.pipeline()
-        pipe.decr(self.key)
-        pipe.expire(self.key, self.opt('timeout'))
-        pipe.execute()
-        logger.debug('Release lock for %s, remaining: %s', self.key, self.redis.get(self.key))
+        self.semaphore.release(self.holder)
+        logger.debug('Release lock for %s, holder: %s', self.key, self.holder)
         return True
 
+    def heartbeat(self):
+        """ Extend lock of long running task. Return False if lock has already expired. """
+        return self.semaphore.heartbeat(self.holder)
+
+    def get_holders(self):
+        return self.semaphore.get_holders()
+
+    def get_waiters(self):
+        return self.semaphore.get_waiters()
+
 
 def throttle(*args, **kwargs):
     if args and callable(args[0]):
@@ -279,6 +308,116 @@ def throttle(*args, **kwargs):
     return Throttle(*args, **kwargs)
 
 
+class CoalescedTask(Task):
+    """ Celery task that is not enqueued if the same task for the same object is pending or running.
+
+        Idempotency key of a task consists of task name and its first argument,
+        objects are represented by their to_string(). Key is stored in Django cache
+        from enqueueing till the end of execution, retries of the task keep the key.
+        Key of crashed worker expires after coalesce_timeout seconds.
+
+        .. code-block:: python
+            @coalesced_task(name='nodeconductor.structure.sync_service_project_link')
+            def sync_service_project_link(service_project_link_str):
+                pass
+
+            # the second call is skipped until the first task is finished
+            sync_service_project_link.delay(spl.to_string())
+            sync_service_project_link.delay(spl.to_string())
+
+        Time of the last successful execution is kept per key (see get_last_success),
+        numbers of executed and skipped runs are kept per task (see get_metrics).
+        If coalesce_min_interval is set, task is not enqueued again until
+        this number of seconds passes after the last successful execution.
+
+        Only calls without callbacks are coalesced: calls with link or link_error,
+        e.g. the first task of a chain, are always enqueued, because skipped call
+        would drop its callbacks.
+    """
+    abstract = True
+    coalesce_timeout = 3600
+    coalesce_min_interval = 0
+
+    def get_coalesce_key(self, args, kwargs):
+        obj = args[0] if args else ''
+        if hasattr(obj, 'to_string'):
+            obj = obj.to_string()
+        return 'nc:coalesce:{}:{}'.format(self.name, force_text(obj))
+
+    def get_last_success(self, *args, **kwargs):
+        """ Return timestamp of the last successful execution of task with given arguments """
+        return cache.get(self.get_coalesce_key(args, kwargs) + ':success')
+
+    def is_pending(self, *args, **kwargs):
+        """ Return True if task with given arguments is enqueued or running """
+        return cache.get(self.get_coalesce_key(args, kwargs)) is not None
+
+    def get_metrics(self):
+        """ Return numbers of executed and skipped runs of the task """
+        prefix = 'nc:coalesce:{}:'.format(self.name)
+        metrics = cache.get_many([prefix + 'executed', prefix + 'skipped'])
+        return {name: metrics.get(prefix + name, 0) for name in ('executed', 'skipped')}
+
+    def _count(self, metric):
+        key = 'nc:coalesce:{}:{}'.format(self.name, metric)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # counter has been evicted from cache
+            cache.set(key, 1, None)
+
+    def apply_async(self, args=None, kwargs=None, **options):
+        if options.get('link') or options.get('link_error'):
+            return super(CoalescedTask, self).apply_async(args, kwargs, **options)
+
+        key = self.get_coalesce_key(args or (), kwargs or {})
+        task_id = options.setdefault('task_id', uuid.uuid4().hex)
+
+        last_success = cache.get(key + ':success')
+        if last_success and time.time() - last_success < self.coalesce_min_interval:
+            logger.debug('Skip task %s: it has been executed %.0fs ago', key, time.time() - last_success)
+            self._count('skipped')
+            return None
+
+        # retry of the task uses the same task id
+        if not cache.add(key, task_id, self.coalesce_timeout) and cache.get(key) != task_id:
+            logger.debug('Skip task %s: the same task is pending or running', key)
+            self._count('skipped')
+            return None
+
+        try:
+            return super(CoalescedTask, self).apply_async(args, kwargs, **options)
+        except Exception:
+            cache.delete(key)
+            raise
+
+    def __call__(self, *args, **kwargs):
+        key = self.get_coalesce_key(args, kwargs)
+        if self.request.id:
+            # task is running now, its timeout starts again
+            cache.set(key, self.request.id, self.coalesce_timeout)
+        try:
+            result = super(CoalescedTask, self).__call__(*args, **kwargs)
+        except Retry:
+            raise
+        except Exception:
+            cache.delete(key)
+            self._count('executed')
+            raise
+
+        cache.delete(key)
+        cache.set(key + ':success', time.time(), None)
+        self._count('executed')
+        return result
+
+
+def coalesced_task(*args, **kwargs):
+    """ Define shared task with CoalescedTask base, accepts the same arguments as shared_task """
+    kwargs.setdefault('base', CoalescedTask)
+    return shared_task(*args, **kwargs)
+
+
 def transition(model_class, processing_state, error_state='set_erred'):
     """ Atomically runs state transition for a model_class instance.
         Executes desired task on success.
@@ -0,0 +1,135 @@
+from __future__ import unicode_literals
+
+import datetime
+import time
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.utils import timezone
+from mock import patch
+from rest_framework import status, test
+from rest_framework.authtoken.models import Token
+
+from nodeconductor.core.authentication import LocalCache, TokenCache
+from nodeconductor.structure.tests import factories
+
+
+class TokenAuthenticationTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.token = Token.objects.get(user=self.user)
+        self.url = reverse('customer-list')
+        self.token_cache = TokenCache()
+        patcher = patch('nodeconductor.core.authentication.token_cache', self.token_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # handlers use cache imported from authentication module
+        patcher = patch('nodeconductor.core.handlers.token_cache', self.token_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear)
+
+    def get(self, key=None):
+        return self.client.get(self.url, HTTP_AUTHORIZATION='Token %s' % (key or self.token.key))
+
+    def test_token_is_resolved_from_cache_after_the_first_request(self):
+        self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+
+        with patch('nodeconductor.core.authentication.Token.objects') as tokens:
+            response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(tokens.select_related.called)
+        self.assertEqual(self.token_cache.stats['local_hits'], 1)
+
+    def test_token_is_resolved_from_shared_cache_if_local_entry_is_missing(self):
+        self.get()
+        self.token_cache.local.clear()
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.token_cache.stats['shared_hits'], 1)
+
+    def test_deleted_token_stops_working_immediately(self):
+        self.get()
+        key = self.token.key
+
+        self.token.delete()
+
+        self.assertEqual(self.get(key).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_of_deactivated_user_stops_working_immediately(self):
+        self.get()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_is_reloaded_after_password_change(self):
+        self.get()
+
+        self.user.set_password('new-secret')
+        self.user.save()
+
+        self.assertIsNone(self.token_cache.local.get(self.token.key))
+        self.assertIsNone(cache.get(TokenCache.key_prefix + self.token.key))
+
+    def test_token_revoked_in_other_process_stops_working_after_local_timeout(self):
+        self.token_cache.local.timeout = 5
+        self.get()
+        key = self.token.key
+
+        # deletion in other process invalidates shared cache and local cache of that process only
+        with patch.object(self.token_cache.local, 'delete'):
+            self.token.delete()
+
+        self.assertEqual(self.get(key).status_code, status.HTTP_200_OK)
+        with patch('nodeconductor.core.authentication.time.time', return_value=time.time() + 6):
+            self.assertEqual(self.get(key).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unused_token_expires_after_lifetime(self):
+        self.token_cache.lifetime = datetime.timedelta(hours=1)
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - datetime.timedelta(hours=2))
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['detail'], 'Token has expired.')
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    def test_used_token_lifetime_is_extended(self):
+        self.token_cache.lifetime = datetime.timedelta(hours=1)
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - datetime.timedelta(minutes=50))
+
+        self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+
+        token = Token.objects.get(key=self.token.key)
+        self.assertLess(timezone.now() - token.created, datetime.timedelta(minutes=1))
+
+    def test_hit_rate_is_calculated_for_all_lookups(self):
+        for _ in range(4):
+            self.get()
+
+        metrics = self.token_cache.get_metrics()
+
+        self.assertEqual(metrics['misses'], 1)
+        self.assertEqual(metrics['local_hits'], 3)
+        self.assertEqual(metrics['hit_rate'], 0.75)
+
+
+class LocalCacheTest(test.APISimpleTestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        local_cache = LocalCache(size=2, timeout=60)
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        local_cache.get('a')
+
+        local_cache.set('c', 3)
+
+        self.assertEqual(local_cache.get('a'), 1)
+        self.assertIsNone(local_cache.get('b'))
+        self.assertEqual(local_cache.get('c'), 3)
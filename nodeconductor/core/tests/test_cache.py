@@ -0,0 +1,210 @@
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from mock import patch
+from rest_framework import status, test
+
+from nodeconductor.core.cache import get_scopes, response_cache
+from nodeconductor.iaas.models import Instance
+from nodeconductor.iaas.tests import factories as iaas_factories
+from nodeconductor.structure.models import CustomerRole
+from nodeconductor.structure.tests import factories as structure_factories
+
+
+response_cache_settings = override_settings(
+    NODECONDUCTOR=dict(settings.NODECONDUCTOR, RESPONSE_CACHE={'cache': 'default', 'timeout': 60}))
+
+
+class ScopesTest(test.APITransactionTestCase):
+
+    def test_scopes_of_instance_are_its_membership_project_and_customer(self):
+        instance = iaas_factories.InstanceFactory()
+        membership = instance.cloud_project_membership
+
+        scopes = get_scopes(instance)
+
+        self.assertIn(membership, scopes)
+        self.assertIn(membership.project, scopes)
+        self.assertIn(membership.project.customer, scopes)
+
+    def test_scope_of_quota_is_found_through_generic_foreign_key(self):
+        project = structure_factories.ProjectFactory()
+
+        scopes = get_scopes(project.quotas.first())
+
+        self.assertEqual(scopes, [project, project.customer])
+
+
+@response_cache_settings
+class ResponseCacheTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        response_cache.stats.clear()
+        self.addCleanup(cache.clear)
+
+        self.staff = structure_factories.UserFactory(is_staff=True)
+        self.customer = structure_factories.CustomerFactory()
+        self.owner = structure_factories.UserFactory()
+        self.customer.add_user(self.owner, CustomerRole.OWNER)
+
+        self.other_customer = structure_factories.CustomerFactory()
+        self.other_owner = structure_factories.UserFactory()
+        self.other_customer.add_user(self.other_owner, CustomerRole.OWNER)
+
+        self.url = reverse('stats_customer')
+
+    def get(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def get_metrics(self):
+        return response_cache.get_metrics('CustomerStatsView.get')
+
+    def test_second_request_is_served_from_cache(self):
+        first_response = self.get(self.staff)
+        second_response = self.get(self.staff)
+
+        self.assertEqual(first_response.data, second_response.data)
+        self.assertEqual(self.get_metrics()['hits'], 1)
+        self.assertEqual(self.get_metrics()['misses'], 1)
+
+    def test_entry_is_invalidated_when_declared_model_is_saved(self):
+        self.get(self.staff)
+        structure_factories.ProjectFactory(customer=self.customer)
+
+        response = self.get(self.staff)
+
+        stats = {item['name']: item for item in response.data}
+        self.assertEqual(stats[self.customer.name]['projects'], 1)
+        self.assertEqual(self.get_metrics()['hits'], 0)
+
+    def test_entry_of_user_is_invalidated_when_visible_customer_is_changed(self):
+        self.get(self.owner)
+        self.customer.name = 'New customer name'
+        self.customer.save()
+
+        response = self.get(self.owner)
+
+        self.assertEqual(response.data[0]['name'], 'New customer name')
+        self.assertEqual(self.get_metrics()['hits'], 0)
+
+    def test_entry_of_user_is_not_invalidated_when_other_customer_is_changed(self):
+        self.get(self.owner)
+        structure_factories.ProjectFactory(customer=self.other_customer)
+
+        self.get(self.owner)
+
+        self.assertEqual(self.get_metrics()['hits'], 1)
+
+    def test_users_with_different_permissions_do_not_share_entries(self):
+        owner_response = self.get(self.owner)
+        other_owner_response = self.get(self.other_owner)
+
+        self.assertEqual([item['name'] for item in owner_response.data], [self.customer.name])
+        self.assertEqual([item['name'] for item in other_owner_response.data], [self.other_customer.name])
+        self.assertEqual(self.get_metrics()['hits'], 0)
+
+    def test_users_with_the_same_permissions_share_entries(self):
+        owner = structure_factories.UserFactory()
+        self.customer.add_user(owner, CustomerRole.OWNER)
+
+        self.get(self.owner)
+        response = self.get(owner)
+
+        self.assertEqual([item['name'] for item in response.data], [self.customer.name])
+        self.assertEqual(self.get_metrics()['hits'], 1)
+
+    def test_responses_are_not_cached_if_cache_is_not_configured(self):
+        with override_settings(NODECONDUCTOR=dict(settings.NODECONDUCTOR, RESPONSE_CACHE=None)):
+            self.get(self.staff)
+            self.get(self.staff)
+
+        self.assertEqual(self.get_metrics(), {'hits': 0, 'misses': 0, 'hit_rate': 0})
+
+    def test_project_list_is_invalidated_when_quota_of_project_is_changed(self):
+        project = structure_factories.ProjectFactory(customer=self.customer)
+        url = structure_factories.ProjectFactory.get_list_url()
+        self.client.force_authenticate(self.owner)
+        self.client.get(url)
+
+        project.set_quota_usage('nc_resource_count', 5)
+        response = self.client.get(url)
+
+        quotas = {quota['name']: quota['usage'] for quota in response.data[0]['quotas']}
+        self.assertEqual(quotas['nc_resource_count'], 5)
+        self.assertEqual(response_cache.get_metrics('ProjectViewSet.list')['hits'], 0)
+
+    def test_project_list_is_invalidated_when_cloud_of_project_is_changed(self):
+        membership = iaas_factories.CloudProjectMembershipFactory(
+            project__customer=self.customer, cloud__customer=self.customer)
+        url = structure_factories.ProjectFactory.get_list_url()
+        # entries of staff depend only on counters of declared models
+        self.client.force_authenticate(self.staff)
+        self.client.get(url)
+
+        membership.cloud.name = 'New cloud name'
+        membership.cloud.save()
+        response = self.client.get(url)
+
+        self.assertEqual(response.data[0]['clouds'][0]['name'], 'New cloud name')
+        self.assertEqual(response_cache.get_metrics('ProjectViewSet.list')['hits'], 0)
+
+    def test_entries_of_all_users_are_invalidated_after_bulk_update_of_declared_model(self):
+        iaas_factories.InstanceFactory(cloud_project_membership__project__customer=self.customer)
+        self.get(self.owner)
+
+        Instance.objects.update(name='New instance name')
+        response_cache.invalidate_model(Instance)
+        self.get(self.owner)
+
+        self.assertEqual(self.get_metrics()['hits'], 0)
+
+    def test_counters_are_incremented_again_when_request_is_finished(self):
+        key = response_cache.get_scope_key('structure.customer', self.customer.pk)
+        response_cache.track_bumps()
+        self.customer.save()
+        generation = cache.get(key)
+
+        response_cache.repeat_bumps()
+
+        self.assertNotEqual(cache.get(key), generation)
+
+    def test_counters_are_not_incremented_again_when_nested_task_is_finished(self):
+        key = response_cache.get_scope_key('structure.customer', self.customer.pk)
+        response_cache.track_bumps()
+        response_cache.track_bumps()
+        self.customer.save()
+        generation = cache.get(key)
+
+        response_cache.repeat_bumps()
+        self.assertEqual(cache.get(key), generation)
+        response_cache.repeat_bumps()
+        self.assertNotEqual(cache.get(key), generation)
+
+    @override_settings(NODECONDUCTOR=dict(settings.NODECONDUCTOR, READ_REPLICAS=['replica'],
+                                          RESPONSE_CACHE={'cache': 'default', 'timeout': 60}))
+    def test_entry_is_calculated_on_primary_within_read_replica_view(self):
+        # replica is an alias of the primary, random.choice registers reads routed to replica
+        with patch('nodeconductor.core.replicas.random.choice', side_effect=lambda aliases: 'default') as choice:
+            self.get(self.owner)
+
+        self.assertFalse(choice.called)
+
+    def test_project_list_is_invalidated_when_quota_limit_of_project_is_changed(self):
+        project = structure_factories.ProjectFactory(customer=self.customer)
+        url = structure_factories.ProjectFactory.get_list_url()
+        self.client.force_authenticate(self.staff)
+        self.client.get(url)
+
+        project.set_quota_limit('nc_resource_count', 10)
+        response = self.client.get(url)
+
+        quotas = {quota['name']: quota['limit'] for quota in response.data[0]['quotas']}
+        self.assertEqual(quotas['nc_resource_count'], 10)
+        self.assertEqual(response_cache.get_metrics('ProjectViewSet.list')['hits'], 0)
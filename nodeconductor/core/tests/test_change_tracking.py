@@ -0,0 +1,72 @@
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from nodeconductor.core.models import User
+from nodeconductor.structure.tests import factories as structure_factories
+
+
+class ChangeTrackingMixinTest(TestCase):
+
+    def setUp(self):
+        self.user = structure_factories.UserFactory(full_name='Alice', is_active=True)
+
+    def get_user_selects(self, queries):
+        table = User._meta.db_table
+        return [query['sql'] for query in queries
+                if 'SELECT' in query['sql'] and 'FROM "%s"' % table in query['sql']]
+
+    def test_loaded_instance_is_saved_without_select(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.full_name = 'Bob'
+
+        with CaptureQueriesContext(connection) as context:
+            user.save()
+
+        self.assertEqual(self.get_user_selects(context.captured_queries), [])
+
+    def test_changes_are_reported_with_old_values(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.full_name = 'Bob'
+
+        self.assertEqual(user.get_changes(), {'full_name': 'Alice'})
+        self.assertTrue(user.has_changed('full_name'))
+        self.assertFalse(user.has_changed('is_active'))
+
+    def test_changes_are_reset_after_save(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.full_name = 'Bob'
+        user.save()
+
+        self.assertEqual(user.get_changes(), {})
+        self.assertEqual(user.get_old_values()['full_name'], 'Bob')
+
+    def test_values_of_instance_constructed_without_load_are_read_from_database(self):
+        user = User(pk=self.user.pk, username=self.user.username, full_name='Bob')
+
+        self.assertEqual(user.get_old_values()['full_name'], 'Alice')
+        self.assertIn('full_name', user.get_changes())
+
+    def test_deferred_fields_are_read_from_database_on_save(self):
+        user = User.objects.only('full_name').get(pk=self.user.pk)
+        user.full_name = 'Bob'
+
+        with CaptureQueriesContext(connection) as context:
+            user.get_changes()
+
+        self.assertEqual(len(self.get_user_selects(context.captured_queries)), 1)
+        self.assertEqual(user.get_old_values()['is_active'], True)
+        self.assertEqual(user.get_changes(), {'full_name': 'Alice'})
+
+    def test_user_deactivation_is_logged(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+
+        with patch('nodeconductor.core.handlers.event_logger') as event_logger:
+            user.save()
+
+        event_types = [call[1]['event_type'] for call in event_logger.user.info.call_args_list]
+        self.assertEqual(event_types, ['user_deactivated'])
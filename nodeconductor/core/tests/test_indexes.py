@@ -0,0 +1,65 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from mock import patch
+
+from nodeconductor.core.indexes import CreateIndex
+
+
+class CreateIndexTest(TestCase):
+
+    def get_sql(self, operation, table='logging_alert'):
+        with connection.schema_editor() as schema_editor:
+            return operation.get_create_sql(schema_editor, table)
+
+    def test_columns_are_quoted_and_expressions_are_wrapped(self):
+        operation = CreateIndex('sort_idx', 'instance', ['CASE WHEN start_time IS NULL THEN 0 ELSE 1 END', 'start_time'])
+
+        sql = self.get_sql(operation, 'iaas_instance')
+
+        self.assertIn('((CASE WHEN start_time IS NULL THEN 0 ELSE 1 END), %s)' % connection.ops.quote_name('start_time'),
+                      sql)
+
+    def test_operator_class_follows_wrapped_expression(self):
+        operation = CreateIndex('trgm_idx', 'customer', [('UPPER(name::text)', 'gin_trgm_ops')], method='gin')
+
+        sql = self.get_sql(operation, 'structure_customer')
+
+        self.assertIn('((UPPER(name::text)) gin_trgm_ops)', sql)
+
+    def test_index_with_operator_class_is_supported_only_by_postgresql(self):
+        operation = CreateIndex('pattern_idx', 'customer', [('name', 'varchar_pattern_ops')])
+
+        self.assertEqual(operation.is_supported(connection), connection.vendor == 'postgresql')
+
+    def test_partial_index_has_condition(self):
+        operation = CreateIndex('open_idx', 'alert', ['created'], condition='closed IS NULL')
+
+        self.assertTrue(self.get_sql(operation).endswith(' WHERE closed IS NULL'))
+
+    def test_partial_index_is_not_supported_without_partial_indexes_support(self):
+        operation = CreateIndex('open_idx', 'alert', ['created'], condition='closed IS NULL')
+
+        with patch('nodeconductor.core.indexes.supports_partial_indexes', return_value=False):
+            self.assertFalse(operation.is_supported(connection))
+
+    def test_index_of_other_vendor_is_not_supported(self):
+        operation = CreateIndex('trgm_idx', 'customer', [('UPPER(name::text)', 'gin_trgm_ops')], vendors=('oracle',))
+
+        self.assertFalse(operation.is_supported(connection))
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'Indexes are listed with SQLite pragma.')
+    def test_index_pack_is_created_by_migrations(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA index_list(logging_alert)')
+            alert_indexes = {row[1] for row in cursor.fetchall()}
+            cursor.execute('PRAGMA index_list(iaas_instance)')
+            instance_indexes = {row[1] for row in cursor.fetchall()}
+
+        self.assertIn('logging_alert_open_scope_idx', alert_indexes)
+        self.assertIn('iaas_instance_start_time_sort_idx', instance_indexes)
+        # trigram indexes exist only on PostgreSQL
+        self.assertNotIn('iaas_instance_name_trgm_idx', instance_indexes)
@@ -0,0 +1,106 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.test.utils import override_settings
+from mock import patch
+from rest_framework import status, test
+
+from nodeconductor.core import replicas
+from nodeconductor.structure.models import Customer
+from nodeconductor.structure.tests import factories as structure_factories
+
+
+def replicas_settings(aliases=('replica',)):
+    return override_settings(NODECONDUCTOR=dict(settings.NODECONDUCTOR, READ_REPLICAS=list(aliases)))
+
+
+class ReplicaRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        replicas.reset()
+
+    def tearDown(self):
+        replicas.reset()
+
+    @replicas_settings()
+    def test_reads_outside_of_block_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    @replicas_settings()
+    def test_reads_within_block_use_replica(self):
+        with replicas.read_replica():
+            self.assertEqual(self.router.db_for_read(Customer), 'replica')
+
+    def test_reads_use_primary_if_replicas_are_not_configured(self):
+        with replicas.read_replica():
+            self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    @replicas_settings()
+    def test_reads_after_write_use_primary(self):
+        with replicas.read_replica():
+            self.assertEqual(self.router.db_for_write(Customer), 'default')
+            self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+        with replicas.read_replica():
+            self.assertEqual(self.router.db_for_read(Customer), 'replica')
+
+    @replicas_settings()
+    def test_reads_of_pinned_block_use_primary(self):
+        with replicas.read_replica(pinned=True):
+            self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    @replicas_settings()
+    def test_reads_of_nested_pinned_block_use_primary(self):
+        with replicas.read_replica():
+            with replicas.read_replica(pinned=True):
+                self.assertEqual(self.router.db_for_read(Customer), 'default')
+            self.assertEqual(self.router.db_for_read(Customer), 'replica')
+
+    @replicas_settings()
+    def test_reads_within_transaction_use_primary(self):
+        with replicas.read_replica(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Customer), 'default')
+
+    @replicas_settings()
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', Customer))
+        self.assertIsNone(self.router.allow_migrate('default', Customer))
+
+
+# replica is an alias of the primary, random.choice is patched to register reads routed to replica
+@patch('nodeconductor.core.replicas.random.choice', side_effect=lambda aliases: 'default')
+class ReadReplicaViewTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = structure_factories.UserFactory(is_staff=True)
+        self.client.force_authenticate(self.staff)
+
+    @replicas_settings()
+    def test_safe_request_reads_from_replica(self, choice):
+        response = self.client.get(reverse('stats_customer'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(choice.called)
+
+    @replicas_settings()
+    def test_unsafe_request_reads_from_primary(self, choice):
+        response = self.client.post(structure_factories.CustomerFactory.get_list_url(), {'name': 'New customer'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(choice.called)
+
+    @replicas_settings()
+    def test_user_is_pinned_to_primary_after_write(self, choice):
+        self.client.post(structure_factories.CustomerFactory.get_list_url(), {'name': 'New customer'})
+        response = self.client.get(reverse('stats_customer'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(choice.called)
+        self.assertTrue(replicas.is_pinned(self.staff))
@@ -0,0 +1,167 @@
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+import reversion
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from reversion.models import Revision
+
+from nodeconductor.core import revisions
+from nodeconductor.structure.tests import factories as structure_factories
+
+
+class RevisionsCaptureTest(TransactionTestCase):
+
+    def setUp(self):
+        self.customer = structure_factories.CustomerFactory()
+        self.quota = self.customer.quotas.get(name='nc_project_count')
+        self.addCleanup(cache.clear)
+
+    def get_versions(self, quota=None):
+        return reversion.get_for_object(quota or self.quota)
+
+    def test_object_saved_outside_of_batch_is_versioned_immediately(self):
+        count = self.get_versions().count()
+
+        self.quota.usage = 10
+        self.quota.save()
+
+        self.assertEqual(self.get_versions().count(), count + 1)
+        self.assertEqual(self.get_versions()[0].object_version.object.usage, 10)
+
+    def test_objects_saved_within_batch_are_versioned_with_one_revision(self):
+        other_quota = self.customer.quotas.get(name='nc_resource_count')
+        revisions_count = Revision.objects.count()
+
+        with revisions.batch():
+            for usage in range(3):
+                self.quota.usage = usage
+                self.quota.save()
+            other_quota.usage = 5
+            other_quota.save()
+            self.assertEqual(Revision.objects.count(), revisions_count)
+
+        self.assertEqual(Revision.objects.count(), revisions_count + 1)
+        revision = Revision.objects.latest('pk')
+        self.assertEqual(revision.version_set.count(), 2)
+        self.assertEqual(self.get_versions()[0].object_version.object.usage, 2)
+
+    def test_versions_of_rolled_back_batch_are_not_saved(self):
+        revisions_count = Revision.objects.count()
+
+        with self.assertRaises(ValueError):
+            with revisions.batch():
+                self.quota.usage = 10
+                self.quota.save()
+                raise ValueError()
+
+        self.assertEqual(Revision.objects.count(), revisions_count)
+
+    def test_quota_and_its_ancestors_quotas_are_versioned_with_one_revision(self):
+        project = structure_factories.ProjectFactory(customer=self.customer)
+        revisions_count = Revision.objects.count()
+
+        project.add_quota_usage('nc_resource_count', 1)
+
+        self.assertEqual(Revision.objects.count(), revisions_count + 1)
+
+    def test_version_repeating_the_last_version_is_not_saved(self):
+        self.quota.usage = 10
+        self.quota.save()
+        count = self.get_versions().count()
+
+        self.quota.save()
+        with revisions.batch():
+            self.quota.save()
+
+        self.assertEqual(self.get_versions().count(), count)
+
+    def test_duplicate_version_is_saved_if_duplicates_are_not_ignored(self):
+        self.quota.usage = 10
+        self.quota.save()
+        count = self.get_versions().count()
+
+        self.quota.save(ignore_revision_duplicates=False)
+
+        self.assertEqual(self.get_versions().count(), count + 1)
+
+    @override_settings(NODECONDUCTOR={'REVISION_SAMPLING_INTERVALS': {'quotas.quota': 60}})
+    def test_version_of_sampled_model_is_replaced_within_interval(self):
+        count = self.get_versions().count()
+
+        for usage in range(1, 4):
+            self.quota.usage = usage
+            self.quota.save()
+
+        self.assertEqual(self.get_versions().count(), count + 1)
+        self.assertEqual(self.get_versions()[0].object_version.object.usage, 3)
+
+        cache.clear()
+        self.quota.usage = 4
+        self.quota.save()
+        self.assertEqual(self.get_versions().count(), count + 2)
+
+    @override_settings(NODECONDUCTOR={'REVISION_SAMPLING_INTERVALS': {'quotas.quota': 60}})
+    def test_sampled_version_does_not_answer_for_dates_before_its_data_is_saved(self):
+        Revision.objects.update(date_created=timezone.now() - timedelta(minutes=1))
+        self.quota.usage = 1
+        self.quota.save()
+        Revision.objects.filter(pk=self.get_versions()[0].revision_id).update(
+            date_created=timezone.now() - timedelta(seconds=30))
+        point = timezone.now() - timedelta(seconds=10)
+
+        self.quota.usage = 2
+        self.quota.save()
+
+        version = reversion.get_for_date(self.quota, point)
+        self.assertEqual(version.object_version.object.usage, 0)
+        self.assertEqual(self.get_versions()[0].object_version.object.usage, 2)
+
+    @override_settings(NODECONDUCTOR={'REVISION_SAMPLING_INTERVALS': {'quotas.quota': 60}})
+    def test_sampled_version_is_created_again_if_its_transaction_is_rolled_back(self):
+        count = self.get_versions().count()
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.quota.usage = 10
+                self.quota.save()
+                raise ValueError()
+        self.quota.usage = 5
+        self.quota.save()
+
+        self.assertEqual(self.get_versions().count(), count + 1)
+        self.assertEqual(self.get_versions()[0].object_version.object.usage, 5)
+
+
+class CompactVersionsTest(TransactionTestCase):
+
+    def setUp(self):
+        self.quota = structure_factories.CustomerFactory().quotas.get(name='nc_project_count')
+
+    def save(self, usage, age):
+        self.quota.usage = usage
+        self.quota.save(ignore_revision_duplicates=False)
+        Revision.objects.filter(pk=reversion.get_for_object(self.quota)[0].revision_id).update(
+            date_created=timezone.now() - age)
+
+    def test_duplicate_old_versions_are_deleted_without_change_of_history(self):
+        Revision.objects.all().delete()
+        self.save(1, timedelta(days=5))
+        self.save(1, timedelta(days=4))
+        self.save(2, timedelta(days=3))
+        self.save(2, timedelta(days=2))
+        self.save(2, timedelta(hours=1))
+        points = [timezone.now() - timedelta(days=days, hours=1) for days in range(5)]
+        history = [reversion.get_for_date(self.quota, point).object_version.object.usage for point in points]
+
+        deleted = revisions.compact_versions(self.quota.__class__, timezone.now() - timedelta(days=1))
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(reversion.get_for_object(self.quota).count(), 3)
+        self.assertEqual(
+            [reversion.get_for_date(self.quota, point).object_version.object.usage for point in points], history)
+        self.assertFalse(Revision.objects.filter(version__isnull=True).exists())
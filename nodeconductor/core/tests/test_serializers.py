@@ -1,11 +1,13 @@
 from __future__ import unicode_literals
 
+import collections
 import unittest
 
+from mock import Mock
 from rest_framework import serializers
 from nodeconductor.core.fields import JsonField
 from nodeconductor.core.fields import TimestampField
-from nodeconductor.core.serializers import Base64Field
+from nodeconductor.core.serializers import AugmentedSerializerMixin, Base64Field, PrefetchedField
 from nodeconductor.core import utils
 
 
@@ -96,3 +98,36 @@ class TimestampFieldTest(unittest.TestCase):
                       'There should be errors for content field')
         self.assertIn('Value "NOT_A_UNIX_TIMESTAMP" should be valid UNIX timestamp.',
                       serializer.errors['content'])
+
+
+Item = collections.namedtuple('Item', ('pk', 'name'))
+
+
+class PrefetchedSerializer(AugmentedSerializerMixin, serializers.Serializer):
+    name = serializers.CharField()
+    tags = PrefetchedField(empty_value=[])
+
+
+class PrefetchedFieldTest(unittest.TestCase):
+    def setUp(self):
+        self.items = [Item(1, 'first'), Item(2, 'second'), Item(3, 'third')]
+        self.prefetch = Mock(side_effect=lambda items, request: {
+            item.pk: ['tag-%s' % item.pk] for item in items if item.pk != 3})
+
+    def serialize(self, instance, **kwargs):
+        serializer = PrefetchedSerializer(instance, **kwargs)
+        fields = serializer.child.fields if kwargs.get('many') else serializer.fields
+        fields['tags'].prefetch = self.prefetch
+        return serializer.data
+
+    def test_values_are_prefetched_once_for_all_objects_of_list(self):
+        data = self.serialize(self.items, many=True)
+
+        self.assertEqual(self.prefetch.call_count, 1)
+        self.assertEqual([item['tags'] for item in data], [['tag-1'], ['tag-2'], []])
+
+    def test_value_of_single_object_is_prefetched_on_demand(self):
+        data = self.serialize(self.items[0])
+
+        self.prefetch.assert_called_once_with([self.items[0]], None)
+        self.assertEqual(data['tags'], ['tag-1'])
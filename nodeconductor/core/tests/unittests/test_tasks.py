@@ -0,0 +1,92 @@
+from __future__ import unicode_literals
+
+from celery import Task, chain, current_app
+from django.core.cache import cache
+from django.test import TestCase
+from mock import patch
+
+from nodeconductor.core.tasks import coalesced_task
+from nodeconductor.openstack.tests import factories as openstack_factories
+
+
+calls = []
+
+
+@coalesced_task
+def sync_object(obj_str, nested=False):
+    calls.append(obj_str)
+    if nested:
+        # the same task can not be enqueued while it is running
+        sync_object.delay(obj_str)
+
+
+@coalesced_task
+def failing_sync_object(obj_str):
+    raise ValueError()
+
+
+@coalesced_task(coalesce_min_interval=60)
+def rarely_sync_object(obj_str):
+    calls.append(obj_str)
+
+
+class CoalescedTaskTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        del calls[:]
+        self.always_eager = current_app.conf.CELERY_ALWAYS_EAGER
+        current_app.conf.CELERY_ALWAYS_EAGER = True
+        self.link = openstack_factories.OpenStackServiceProjectLinkFactory()
+
+    def tearDown(self):
+        current_app.conf.CELERY_ALWAYS_EAGER = self.always_eager
+
+    def test_pending_task_is_not_enqueued_again(self):
+        with patch.object(Task, 'apply_async') as apply_async:
+            sync_object.delay(self.link)
+            sync_object.delay(self.link)
+            sync_object.delay(openstack_factories.OpenStackServiceProjectLinkFactory())
+
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertTrue(sync_object.is_pending(self.link.to_string()))
+        self.assertEqual(sync_object.get_metrics()['skipped'], 1)
+
+    def test_running_task_is_not_enqueued_again(self):
+        sync_object.delay(self.link.to_string(), nested=True)
+
+        self.assertEqual(calls, [self.link.to_string()])
+        self.assertEqual(sync_object.get_metrics(), {'executed': 1, 'skipped': 1})
+
+    def test_finished_task_can_be_enqueued_again_and_its_success_is_recorded(self):
+        sync_object.delay(self.link.to_string())
+        sync_object.delay(self.link.to_string())
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(sync_object.is_pending(self.link.to_string()))
+        self.assertIsNotNone(sync_object.get_last_success(self.link.to_string()))
+
+    def test_failed_task_can_be_enqueued_again(self):
+        for _ in range(2):
+            failing_sync_object.delay(self.link.to_string())
+
+        self.assertEqual(failing_sync_object.get_metrics(), {'executed': 2, 'skipped': 0})
+        self.assertIsNone(failing_sync_object.get_last_success(self.link.to_string()))
+
+    def test_task_is_not_enqueued_until_min_interval_passes(self):
+        rarely_sync_object.delay(self.link.to_string())
+        rarely_sync_object.delay(self.link.to_string())
+
+        self.assertEqual(len(calls), 1)
+
+    def test_task_with_callbacks_is_enqueued_even_if_the_same_task_is_pending(self):
+        # chain is applied eagerly without apply_async of its tasks
+        current_app.conf.CELERY_ALWAYS_EAGER = False
+        with patch.object(Task, 'apply_async') as apply_async:
+            sync_object.delay(self.link.to_string())
+            sync_object.apply_async(args=(self.link.to_string(),), link=rarely_sync_object.si('linked'))
+            chain(sync_object.si(self.link.to_string()), rarely_sync_object.si('chained')).apply_async(
+                link_error=failing_sync_object.si('failed'))
+
+        self.assertEqual(apply_async.call_count, 3)
+        self.assertEqual(sync_object.get_metrics()['skipped'], 0)
@@ -0,0 +1,161 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+import uuid
+
+from nodeconductor.core.throttling import RedisSemaphore
+
+
+def get_redis():
+    """ Return client of local Redis or fakeredis with Lua support, None if neither is available """
+    try:
+        import redis
+        client = redis.StrictRedis(db=15, socket_timeout=1)
+        client.ping()
+        return client
+    except Exception:
+        pass
+
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+
+    class FakeRedis(fakeredis.FakeStrictRedis):
+        """ fakeredis client which runs scripts registered with register_script by eval.
+            Commands are serialized with a lock, like commands of Redis server, because
+            fakeredis is not thread safe. Its blpop does not block.
+        """
+        lock = threading.RLock()
+
+        def register_script(self, script):
+            def run(keys=(), args=(), client=None):
+                return self.eval(script, len(keys), *(list(keys) + list(args)))
+            return run
+
+        def eval(self, *args, **kwargs):
+            with self.lock:
+                return super(FakeRedis, self).eval(*args, **kwargs)
+
+        def blpop(self, *args, **kwargs):
+            with self.lock:
+                return super(FakeRedis, self).blpop(*args, **kwargs)
+
+        def zrange(self, *args, **kwargs):
+            with self.lock:
+                return super(FakeRedis, self).zrange(*args, **kwargs)
+
+    client = FakeRedis()
+    try:
+        client.eval('return 1', 0)
+    except Exception:
+        # Lua support requires lupa
+        return None
+    return client
+
+
+REDIS = get_redis()
+
+
+@unittest.skipIf(REDIS is None, 'Redis server or fakeredis with Lua support is required')
+class RedisSemaphoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.key = 'nc:test:%s' % uuid.uuid4().hex
+        self.semaphore = RedisSemaphore(REDIS, self.key, concurrency=2, lease=10, waiter_ttl=10)
+
+    def tearDown(self):
+        keys = REDIS.keys(self.key + '*')
+        if keys:
+            REDIS.delete(*keys)
+
+    def test_concurrency_is_not_exceeded(self):
+        self.assertTrue(self.semaphore.acquire('a'))
+        self.assertTrue(self.semaphore.acquire('b'))
+        self.assertFalse(self.semaphore.acquire('c'))
+
+        self.assertItemsEqual([holder for holder, _ in self.semaphore.get_holders()], ['a', 'b'])
+        self.assertEqual(self.semaphore.get_waiters(), ['c'])
+
+    def test_slots_are_granted_in_order_of_arrival(self):
+        self.semaphore.acquire('a')
+        self.semaphore.acquire('b')
+        for waiter in ('c', 'd', 'e'):
+            self.semaphore.acquire(waiter)
+
+        woken = self.semaphore.release('a')
+
+        self.assertEqual(woken, ['c'])
+        self.assertFalse(self.semaphore.acquire('e'))
+        self.assertTrue(self.semaphore.acquire('c'))
+        self.assertEqual(self.semaphore.get_waiters(), ['d', 'e'])
+
+    def test_release_wakes_waiter(self):
+        self.semaphore.acquire('a')
+        self.semaphore.acquire('b')
+        self.semaphore.acquire('c')
+
+        self.semaphore.release('b')
+
+        self.assertTrue(self.semaphore.wait('c', timeout=1))
+
+    def test_slot_of_holder_with_expired_lease_is_freed(self):
+        now = time.time()
+        self.semaphore.acquire('a', now=now)
+        self.semaphore.acquire('b', now=now)
+
+        self.assertFalse(self.semaphore.acquire('c', now=now + 5))
+        self.assertTrue(self.semaphore.acquire('c', now=now + 11))
+
+    def test_heartbeat_extends_lease(self):
+        now = time.time()
+        self.semaphore.acquire('a', now=now)
+        self.semaphore.acquire('b', now=now)
+
+        self.assertTrue(self.semaphore.heartbeat('a', now=now + 9))
+
+        self.assertTrue(self.semaphore.acquire('c', now=now + 11))
+        self.assertFalse(self.semaphore.acquire('d', now=now + 11))
+        self.assertFalse(self.semaphore.heartbeat('b', now=now + 11))
+
+    def test_stale_waiter_loses_its_place(self):
+        now = time.time()
+        self.semaphore.acquire('a', now=now)
+        self.semaphore.acquire('b', now=now)
+        self.semaphore.acquire('c', now=now)
+        self.semaphore.acquire('d', now=now + 5)
+        self.semaphore.release('a', now=now + 5)
+
+        # 'c' didn't come back in waiter_ttl
+        self.assertTrue(self.semaphore.acquire('d', now=now + 11))
+        self.assertEqual(self.semaphore.get_waiters(), [])
+
+    def test_concurrent_acquirers_do_not_overshoot_limit(self):
+        concurrency = 3
+        semaphore = RedisSemaphore(REDIS, self.key, concurrency=concurrency, lease=10, waiter_ttl=10)
+        lock = threading.Lock()
+        state = {'running': 0, 'max_running': 0, 'done': 0}
+
+        def worker(holder):
+            while not semaphore.acquire(holder):
+                semaphore.wait(holder, timeout=1)
+            with lock:
+                state['running'] += 1
+                state['max_running'] = max(state['max_running'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+                state['done'] += 1
+            semaphore.release(holder)
+
+        threads = [threading.Thread(target=worker, args=('worker-%s' % i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+        self.assertEqual(state['done'], len(threads))
+        self.assertLessEqual(state['max_running'], concurrency)
+        self.assertEqual(semaphore.get_holders(), [])
@@ -0,0 +1,87 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from nodeconductor.core import timeseries
+from nodeconductor.core.utils import timestamp_to_datetime
+from nodeconductor.structure.models import Project
+from nodeconductor.structure.tests import factories as structure_factories
+
+
+class BucketizeTest(unittest.TestCase):
+
+    def get_values(self, segment_list):
+        return [segment['value'] for segment in segment_list]
+
+    def test_values_are_placed_to_their_segments(self):
+        time_and_value_list = [(0, 1), (9, 2), (10, 3), (25, 4), (39, 5)]
+
+        segment_list = timeseries.bucketize(time_and_value_list, 4, 0, 40)
+
+        self.assertEqual(self.get_values(segment_list), [3, 3, 4, 5])
+
+    def test_values_outside_of_range_are_ignored(self):
+        time_and_value_list = [(-1, 10), (5, 1), (40, 10), (100, 10)]
+
+        segment_list = timeseries.bucketize(time_and_value_list, 2, 0, 40)
+
+        self.assertEqual(self.get_values(segment_list), [1, 0])
+
+    def test_reducers(self):
+        time_and_value_list = [(1, 2.0), (2, 6.0), (3, 4.0)]
+        expected = {'sum': 12.0, 'avg': 4.0, 'max': 6.0, 'last': 4.0}
+
+        for reducer, value in expected.items():
+            segment_list = timeseries.bucketize(time_and_value_list, 1, 0, 10, reducer=reducer)
+            self.assertEqual(segment_list[0]['value'], value, 'Reducer %s failed' % reducer)
+
+    def test_unknown_reducer_raises_value_error(self):
+        self.assertRaises(ValueError, timeseries.bucketize, [], 1, 0, 10, reducer='median')
+
+    def test_empty_segments_get_default_value(self):
+        segment_list = timeseries.bucketize([(15, 7)], 3, 0, 30, default='0.0000')
+
+        self.assertEqual(self.get_values(segment_list), ['0.0000', 7, '0.0000'])
+
+    def test_empty_segments_carry_previous_value_forward(self):
+        time_and_value_list = [(12, 'a'), (15, 'b'), (45, 'c')]
+
+        segment_list = timeseries.bucketize(
+            time_and_value_list, 6, 0, 60, reducer='last', default='0.0000', carry_forward=True)
+
+        self.assertEqual(self.get_values(segment_list), ['0.0000', 'b', 'b', 'b', 'c', 'c'])
+
+
+class CountByBucketsTest(TestCase):
+
+    def setUp(self):
+        self.start_timestamp = 1420070400  # 2015-01-01 00:00:00 UTC
+        # one project is created before the range, one at the end of range, which is excluded
+        offsets = [-1, 0, 9.5, 10, 25, 39.999, 40]
+        for offset in offsets:
+            project = structure_factories.ProjectFactory()
+            Project.objects.filter(pk=project.pk).update(created=timestamp_to_datetime(self.start_timestamp + offset))
+
+    def count(self):
+        segment_list = timeseries.count_by_buckets(
+            Project.objects.all(), 'created', 4, self.start_timestamp, self.start_timestamp + 40)
+        return [segment['value'] for segment in segment_list]
+
+    def test_objects_are_counted_by_buckets_in_database(self):
+        with CaptureQueriesContext(connection) as context:
+            values = self.count()
+
+        self.assertEqual(values, [2, 1, 1, 1])
+        self.assertEqual(len(context), 1)
+        self.assertIn('GROUP BY', context.captured_queries[0]['sql'])
+
+    def test_objects_are_counted_by_buckets_in_python_if_database_is_not_supported(self):
+        with patch.dict(timeseries.BUCKET_INDEX_EXPRESSIONS, clear=True):
+            values = self.count()
+
+        self.assertEqual(values, [2, 1, 1, 1])
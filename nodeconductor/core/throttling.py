@@ -0,0 +1,197 @@
+"""
+Distributed counting semaphore with FIFO wait queue stored in Redis.
+
+All state changes are done by Lua scripts, so acquire and release are atomic
+even if lots of workers compete for the same key. Redis keys used by semaphore:
+
+ - <key>:holders - sorted set of holders scored by their lease expiration time;
+ - <key>:waiters - sorted set of waiters scored by their arrival sequence number;
+ - <key>:waiters_ttl - sorted set of waiters scored by their expiration time;
+ - <key>:seq - arrival sequence counter;
+ - <key>:wake:<holder> - list that is pushed to when the waiter may try to acquire again.
+
+Holder that doesn't release semaphore (e.g. crashed worker) loses it when its lease expires,
+waiter that doesn't come back loses its place in a queue when its waiter TTL expires.
+Time is passed to scripts by clients, so worker clocks are assumed to be in sync.
+"""
+from __future__ import unicode_literals
+
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def _now(now=None):
+    return time.time() if now is None else now
+
+
+# Remove expired holders and waiters, enqueue holder and grant it a slot
+# if there is free one and holder is among the first waiters.
+ACQUIRE_SCRIPT = """
+local holders, waiters, waiters_ttl, seq = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local holder = ARGV[1]
+local now = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local concurrency = tonumber(ARGV[4])
+local waiter_ttl = tonumber(ARGV[5])
+
+redis.call('ZREMRANGEBYSCORE', holders, '-inf', now)
+local stale = redis.call('ZRANGEBYSCORE', waiters_ttl, '-inf', now)
+for _, waiter in ipairs(stale) do
+    redis.call('ZREM', waiters, waiter)
+end
+redis.call('ZREMRANGEBYSCORE', waiters_ttl, '-inf', now)
+
+local acquired = 0
+if redis.call('ZSCORE', holders, holder) then
+    acquired = 1
+else
+    if not redis.call('ZSCORE', waiters, holder) then
+        redis.call('ZADD', waiters, redis.call('INCR', seq), holder)
+    end
+    local free = concurrency - redis.call('ZCARD', holders)
+    if free > 0 and redis.call('ZRANK', waiters, holder) < free then
+        redis.call('ZREM', waiters, holder)
+        redis.call('ZREM', waiters_ttl, holder)
+        acquired = 1
+    else
+        redis.call('ZADD', waiters_ttl, now + waiter_ttl, holder)
+    end
+end
+
+if acquired == 1 then
+    redis.call('ZADD', holders, now + lease, holder)
+end
+local key_ttl = math.ceil(math.max(lease, waiter_ttl))
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, key_ttl)
+end
+return acquired
+"""
+
+# Remove holder and wake as many first waiters as there are free slots.
+RELEASE_SCRIPT = """
+local holders, waiters = KEYS[1], KEYS[2]
+local holder = ARGV[1]
+local now = tonumber(ARGV[2])
+local concurrency = tonumber(ARGV[3])
+local wake_prefix = ARGV[4]
+local wake_ttl = tonumber(ARGV[5])
+
+redis.call('ZREM', holders, holder)
+redis.call('ZREMRANGEBYSCORE', holders, '-inf', now)
+local free = concurrency - redis.call('ZCARD', holders)
+if free <= 0 then
+    return {}
+end
+
+local woken = redis.call('ZRANGE', waiters, 0, free - 1)
+for _, waiter in ipairs(woken) do
+    local wake = wake_prefix .. waiter
+    redis.call('RPUSH', wake, 1)
+    redis.call('EXPIRE', wake, wake_ttl)
+end
+return woken
+"""
+
+# Extend holder lease if holder still owns a slot.
+HEARTBEAT_SCRIPT = """
+local holders = KEYS[1]
+local holder = ARGV[1]
+local now = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+
+local expires = redis.call('ZSCORE', holders, holder)
+if not expires or tonumber(expires) <= now then
+    return 0
+end
+redis.call('ZADD', holders, now + lease, holder)
+redis.call('EXPIRE', holders, math.ceil(lease))
+return 1
+"""
+
+# Remove waiter from the queue.
+LEAVE_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('DEL', KEYS[3])
+return 1
+"""
+
+
+class RedisSemaphore(object):
+    """ Allow at most :concurrency: holders of :key: at once, serving waiters in order of arrival.
+
+        .. code-block:: python
+            semaphore = RedisSemaphore(redis, 'nc:provision:http://keystone', concurrency=2)
+            while not semaphore.acquire(holder_id):
+                semaphore.wait(holder_id, timeout=60)
+            try:
+                do_work()
+                semaphore.heartbeat(holder_id)
+                do_more_work()
+            finally:
+                semaphore.release(holder_id)
+
+        :param lease: a time in seconds after which not released slot is freed
+        :param waiter_ttl: a time in seconds to keep a place in queue for waiter that doesn't try to acquire again
+    """
+
+    def __init__(self, redis, key, concurrency=1, lease=3600, waiter_ttl=600):
+        self.redis = redis
+        self.key = key
+        self.concurrency = concurrency
+        self.lease = lease
+        self.waiter_ttl = waiter_ttl
+
+        self.holders_key = key + ':holders'
+        self.waiters_key = key + ':waiters'
+        self.waiters_ttl_key = key + ':waiters_ttl'
+        self.seq_key = key + ':seq'
+        self.wake_prefix = key + ':wake:'
+
+        self._acquire = redis.register_script(ACQUIRE_SCRIPT)
+        self._release = redis.register_script(RELEASE_SCRIPT)
+        self._heartbeat = redis.register_script(HEARTBEAT_SCRIPT)
+        self._leave = redis.register_script(LEAVE_SCRIPT)
+
+    def acquire(self, holder, now=None):
+        """ Take a slot or enqueue holder. Return True if slot is taken. """
+        keys = [self.holders_key, self.waiters_key, self.waiters_ttl_key, self.seq_key]
+        args = [holder, _now(now), self.lease, self.concurrency, self.waiter_ttl]
+        acquired = bool(self._acquire(keys=keys, args=args))
+        logger.debug('%s semaphore %s for %s', 'Acquired' if acquired else 'Enqueued to', self.key, holder)
+        return acquired
+
+    def release(self, holder, now=None):
+        """ Free holder slot and wake next waiters. Return list of woken waiters. """
+        keys = [self.holders_key, self.waiters_key]
+        args = [holder, _now(now), self.concurrency, self.wake_prefix, self.waiter_ttl]
+        woken = self._release(keys=keys, args=args)
+        logger.debug('Released semaphore %s for %s, woken: %s', self.key, holder, woken)
+        return woken
+
+    def heartbeat(self, holder, now=None):
+        """ Extend holder lease. Return False if holder has already lost its slot. """
+        args = [holder, _now(now), self.lease]
+        return bool(self._heartbeat(keys=[self.holders_key], args=args))
+
+    def wait(self, holder, timeout):
+        """ Block until holder is woken by release or timeout (in seconds) exceeds.
+            Return True if holder was woken.
+        """
+        return self.redis.blpop(self.wake_prefix + holder, timeout=max(int(timeout), 1)) is not None
+
+    def leave(self, holder):
+        """ Give up waiting and free a place in queue """
+        self._leave(keys=[self.waiters_key, self.waiters_ttl_key, self.wake_prefix + holder], args=[holder])
+
+    def get_holders(self):
+        """ Return list of (holder, lease expiration timestamp) tuples """
+        return self.redis.zrange(self.holders_key, 0, -1, withscores=True)
+
+    def get_waiters(self):
+        """ Return list of waiters in order of arrival """
+        return self.redis.zrange(self.waiters_key, 0, -1)
@@ -0,0 +1,141 @@
+"""
+Time series bucketing helpers.
+
+Values are distributed between equal time segments in a single pass,
+counts of database rows can be bucketed on the database side for PostgreSQL, MySQL and SQLite.
+"""
+from __future__ import unicode_literals
+
+import bisect
+
+from django.db import connections
+from django.db.models import Count
+
+from nodeconductor.core.utils import datetime_to_timestamp, timestamp_to_datetime
+
+
+class Reducers(object):
+    """ Functions that fold values of a single segment into one value """
+
+    @staticmethod
+    def sum(values):
+        return sum(values)
+
+    @staticmethod
+    def avg(values):
+        return sum(values) / len(values)
+
+    @staticmethod
+    def max(values):
+        return max(values)
+
+    @staticmethod
+    def last(values):
+        return values[-1]
+
+    CHOICES = ('sum', 'avg', 'max', 'last')
+
+
+def get_segment_points(segments_count, start_timestamp, end_timestamp):
+    """ Return list of segments boundaries: segment i is [points[i], points[i + 1]) """
+    time_step = (end_timestamp - start_timestamp) / segments_count
+    return [start_timestamp + time_step * i for i in range(segments_count + 1)]
+
+
+def bucketize(time_and_value_list, segments_count, start_timestamp, end_timestamp,
+              reducer='sum', default=0, carry_forward=False):
+    """
+    Split time_and_value_list to time segments and reduce values of each segment.
+
+    Values are processed in one pass, each one is placed to its segment with binary search,
+    so complexity is O(points * log(segments)) instead of O(points * segments).
+
+    Parameters
+    ----------
+    time_and_value_list: iterable of tuples
+        Example: [(time, value), (time, value) ...]
+        Have to be sorted by time only for 'last' reducer.
+    segments_count: integer
+        How many segments will be in result
+    reducer: string
+        One of Reducers.CHOICES
+    default:
+        Value of segment without any values
+    carry_forward: boolean
+        Segment without values gets value of previous segment instead of default
+    Returns
+    -------
+    List of dictionaries
+        Example:
+        [{'from': time1, 'to': time2, 'value': reduced_values_from_time1_to_time2}, ...]
+    """
+    if reducer not in Reducers.CHOICES:
+        raise ValueError('Reducer %s is not supported' % reducer)
+    reduce_values = getattr(Reducers, reducer)
+
+    points = get_segment_points(segments_count, start_timestamp, end_timestamp)
+    buckets = [[] for _ in range(segments_count)]
+    for time, value in time_and_value_list:
+        index = bisect.bisect_right(points, time) - 1
+        if 0 <= index < segments_count:
+            buckets[index].append(value)
+
+    segment_list = []
+    value = default
+    for index, bucket in enumerate(buckets):
+        if bucket:
+            value = reduce_values(bucket)
+        elif not carry_forward:
+            value = default
+
+        segment_list.append({
+            'from': points[index],
+            'to': points[index + 1],
+            'value': value,
+        })
+    return segment_list
+
+
+# Expressions that calculate index of the time segment of the datetime field, by database vendor.
+# Parameters are: field start_timestamp step
+BUCKET_INDEX_EXPRESSIONS = {
+    'postgresql': 'FLOOR((EXTRACT(EPOCH FROM {field}) - %s) / %s)',
+    'mysql': 'FLOOR((UNIX_TIMESTAMP({field}) - %s) / %s)',
+    # SQLite has no FLOOR, cast truncates the same way as only rows after start are counted.
+    # Julian day is converted to timestamp rounded to milliseconds to drop floating point error.
+    'sqlite': 'CAST((ROUND((JULIANDAY({field}) - 2440587.5) * 86400000) / 1000.0 - %s) / %s AS INTEGER)',
+}
+
+
+def count_by_buckets(queryset, field, segments_count, start_timestamp, end_timestamp):
+    """
+    Count objects of queryset in time segments by datetime :field:.
+
+    On PostgreSQL, MySQL and SQLite objects are grouped by segment index with a single GROUP BY query,
+    so only segments_count rows are transferred. Other databases fetch field values
+    and bucket them in Python.
+    """
+    points = get_segment_points(segments_count, start_timestamp, end_timestamp)
+    queryset = queryset.filter(**{
+        field + '__gte': timestamp_to_datetime(start_timestamp),
+        field + '__lt': timestamp_to_datetime(points[-1]),
+    })
+
+    vendor = connections[queryset.db].vendor
+    time_step = points[1] - points[0]
+    if vendor in BUCKET_INDEX_EXPRESSIONS and time_step > 0:
+        qn = connections[queryset.db].ops.quote_name
+        column = '%s.%s' % (qn(queryset.model._meta.db_table), qn(queryset.model._meta.get_field(field).column))
+        rows = (queryset
+                .order_by()
+                .extra(select={'bucket': BUCKET_INDEX_EXPRESSIONS[vendor].format(field=column)},
+                       select_params=(start_timestamp, time_step))
+                .values('bucket')
+                .annotate(count=Count('pk', distinct=True)))
+        counts = {int(row['bucket']): row['count'] for row in rows}
+        return [{'from': points[index], 'to': points[index + 1], 'value': counts.get(index, 0)}
+                for index in range(segments_count)]
+
+    time_and_value_list = ((datetime_to_timestamp(dt), 1)
+                           for _, dt in queryset.order_by().distinct().values_list('pk', field))
+    return bucketize(time_and_value_list, segments_count, start_timestamp, end_timestamp)
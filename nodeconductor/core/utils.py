@@ -2,11 +2,14 @@ import time
 import calendar
 import requests
 
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 from datetime import timedelta
 from operator import itemgetter
 
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Count
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.core.urlresolvers import reverse
@@ -25,6 +28,71 @@ def sort_dict(unsorted_dict):
     return sorted_dict
 
 
+def get_grouped_counts(queryset, field):
+    """
+    Return dictionary of objects counts keyed by :field: values, calculated by single GROUP BY query.
+    Counts distinct objects, so permission filters that duplicate rows via joins do not affect the result.
+    """
+    rows = queryset.order_by().values(field).annotate(count=Count('pk', distinct=True))
+    return {row[field]: row['count'] for row in rows}
+
+
+def prefetch_generic_relation(objects, field_name='scope'):
+    """
+    Resolve generic foreign key :field_name: of all :objects: with one in_bulk query
+    per content type instead of one query per object.
+    Objects have to be instances of the same model. Return list of objects.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+
+    field = next(f for f in objects[0]._meta.virtual_fields if f.name == field_name)
+    ct_attname = objects[0]._meta.get_field(field.ct_field).get_attname()
+
+    ids_by_content_type = defaultdict(set)
+    for obj in objects:
+        content_type_id, object_id = getattr(obj, ct_attname), getattr(obj, field.fk_field)
+        if content_type_id is not None and object_id is not None and not hasattr(obj, field.cache_attr):
+            ids_by_content_type[content_type_id].add(object_id)
+
+    related_objects = {}
+    for content_type_id, object_ids in ids_by_content_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        for object_id, related_object in model._default_manager.in_bulk(object_ids).items():
+            related_objects[content_type_id, object_id] = related_object
+
+    for obj in objects:
+        content_type_id, object_id = getattr(obj, ct_attname), getattr(obj, field.fk_field)
+        if content_type_id is not None and object_id is not None and not hasattr(obj, field.cache_attr):
+            setattr(obj, field.cache_attr, related_objects.get((content_type_id, object_id)))
+    return objects
+
+
+def bulk_update_field(model, field_name, values, chunk_size=500):
+    """
+    Set :field_name: of several objects to different values with one
+    UPDATE ... CASE query per chunk. :values: is list of (pk, value) tuples.
+    """
+    field = model._meta.get_field(field_name)
+    quote_name = connection.ops.quote_name
+    table = quote_name(model._meta.db_table)
+    pk_column = quote_name(model._meta.pk.column)
+    cursor = connection.cursor()
+    values = list(values)
+    for index in range(0, len(values), chunk_size):
+        chunk = values[index:index + chunk_size]
+        sql = 'UPDATE {table} SET {column} = CASE {pk} {whens} END WHERE {pk} IN ({pks})'.format(
+            table=table, column=quote_name(field.column), pk=pk_column,
+            whens=' '.join(['WHEN %s THEN %s'] * len(chunk)), pks=', '.join(['%s'] * len(chunk)))
+        params = [param for pk, value in chunk
+                  for param in (pk, field.get_db_prep_save(value, connection=connection))]
+        params += [pk for pk, _ in chunk]
+        cursor.execute(sql, params)
+
+
 def format_time_and_value_to_segment_list(time_and_value_list, segments_count, start_timestamp,
                                           end_timestamp, average=False):
     """
@@ -33,7 +101,6 @@ def format_time_and_value_to_segment_list(time_and_value_list, segments_count, s
     Parameters
     ----------
     time_and_value_list: list of tuples
-        Have to be sorted by time
         Example: [(time, value), (time, value) ...]
     segments_count: integer
         How many segments will be in result
@@ -42,25 +109,13 @@ def format_time_and_value_to_segment_list(time_and_value_list, segments_count, s
     List of dictionaries
         Example:
         [{'from': time1, 'to': time2, 'value': sum_of_values_from_time1_to_time2}, ...]
+
+    Kept for backward compatibility, use nodeconductor.core.timeseries.bucketize instead.
     """
-    segment_list = []
-    time_step = (end_timestamp - start_timestamp) / segments_count
-    for i in range(segments_count):
-        segment_start_timestamp = start_timestamp + time_step * i
-        segment_end_timestamp = segment_start_timestamp + time_step
-        value_list = [
-            value for time, value in time_and_value_list
-            if time >= segment_start_timestamp and time < segment_end_timestamp]
-        segment_value = sum(value_list)
-        if average and len(value_list) != 0:
-            segment_value /= len(value_list)
-
-        segment_list.append({
-            'from': segment_start_timestamp,
-            'to': segment_end_timestamp,
-            'value': segment_value,
-        })
-    return segment_list
+    from nodeconductor.core.timeseries import bucketize
+
+    return bucketize(time_and_value_list, segments_count, start_timestamp, end_timestamp,
+                     reducer='avg' if average else 'sum')
 
 
 def datetime_to_timestamp(datetime):
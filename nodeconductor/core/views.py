@@ -16,7 +16,9 @@ from rest_framework.views import exception_handler as rf_exception_handler
 from rest_framework.viewsets import GenericViewSet
 
 from nodeconductor import __version__
+from nodeconductor.core.authentication import token_cache
 from nodeconductor.core.exceptions import IncorrectStateException
+from nodeconductor.core.mixins import StreamingListMixin
 from nodeconductor.core.serializers import AuthTokenSerializer
 from nodeconductor.core.utils import request_api
 from nodeconductor.logging.log import event_logger
@@ -62,6 +64,9 @@ class ObtainAuthToken(APIView):
             )
 
         token, _ = Token.objects.get_or_create(user=user)
+        if token_cache.is_expired(token):
+            token.delete()
+            token = Token.objects.create(user=user)
 
         logger.debug('Returning token for successful login of user %s', user)
         event_logger.auth.info(
@@ -110,10 +115,13 @@ def exception_handler(exc, context):
     return rf_exception_handler(exc, context)
 
 
-class BaseSummaryView(GenericViewSet):
+class BaseSummaryView(StreamingListMixin, GenericViewSet):
     params = []
 
     def list(self, request):
+        if self.is_streaming_request(request) and not request.query_params.get('o'):
+            return self.get_streaming_response(self.iter_data(request), self.get_total(request))
+
         qs = self.get_queryset(request)
         qs = self.order_queryset(request, qs)
         page = self.paginate_queryset(qs)
@@ -122,22 +130,29 @@ class BaseSummaryView(GenericViewSet):
         return Response(qs)
 
     def get_queryset(self, request):
-        def fetch_data(view_name, params):
-            response = request_api(request, view_name, params=params)
-            if not response.success:
-                raise APIException(response.data)
-            return response
+        return list(self.iter_data(request))
+
+    def fetch_data(self, request, url, params, method='GET'):
+        response = request_api(request, url, method=method, params=params)
+        if not response.success:
+            raise APIException(response.data)
+        return response
 
-        data = []
+    def iter_data(self, request):
+        """ Yield items of all endpoints, keeping in memory only one endpoint response at a time """
         for url in self.get_urls(request):
             params = self.get_params(request)
-            response = fetch_data(url, params)
+            response = self.fetch_data(request, url, params)
 
             if response.total and response.total > len(response.data):
                 params['page_size'] = response.total
-                response = fetch_data(url, params)
-            data += response.data
-        return data
+                response = self.fetch_data(request, url, params)
+            for item in response.data:
+                yield item
+
+    def get_total(self, request):
+        params = self.get_params(request)
+        return sum(self.fetch_data(request, url, params, method='HEAD').total for url in self.get_urls(request))
 
     def get_params(self, request):
         params = {}
@@ -0,0 +1,245 @@
+"""
+Batch calculation of projected price estimates.
+
+Default price list is loaded once per run, monthly costs of all resources of
+a model are calculated in one pass and estimates of resources ancestors
+(service project links, services, projects and customers) are aggregated in memory.
+Estimates are read and written with bulk queries, so number of queries grows
+with number of resources models and chunks, not with number of resources.
+"""
+from __future__ import unicode_literals
+
+import collections
+import logging
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
+from django.utils import timezone
+
+from nodeconductor.core import models as core_models
+from nodeconductor.core.cache import response_cache
+from nodeconductor.core.utils import bulk_update_field, hours_in_month
+from nodeconductor.cost_tracking import CostTrackingRegister
+from nodeconductor.cost_tracking.models import DefaultPriceListItem, PriceEstimate
+from nodeconductor.structure import ServiceBackendError, ServiceBackendNotImplemented
+from nodeconductor.structure.models import Resource
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of ids in one IN clause or CASE expression
+CHUNK_SIZE = 500
+
+# (content type id, object id, year, month)
+EstimateKey = collections.namedtuple('EstimateKey', ('content_type_id', 'object_id', 'year', 'month'))
+
+
+def chunked(items, size=CHUNK_SIZE):
+    items = list(items)
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+class PriceList(object):
+    """ In-memory lookup of monthly prices of default price list items """
+
+    def __init__(self, prices):
+        # {resource content type id: {(item type, key): monthly price}}
+        self.prices = prices
+
+    @classmethod
+    def load(cls, resource_content_types=None):
+        queryset = DefaultPriceListItem.objects.all()
+        if resource_content_types is not None:
+            queryset = queryset.filter(resource_content_type__in=resource_content_types)
+
+        hours = hours_in_month()
+        prices = collections.defaultdict(dict)
+        for content_type_id, item_type, key, value in queryset.values_list(
+                'resource_content_type_id', 'item_type', 'key', 'value'):
+            # the same rounding as in AbstractPriceListItem.monthly_rate
+            prices[content_type_id][item_type, key] = Decimal('%0.2f' % (value * hours))
+        return cls(prices)
+
+    def get_monthly_cost(self, resource, used_items):
+        content_type = ContentType.objects.get_for_model(resource)
+        resource_prices = self.prices.get(content_type.id, {})
+
+        monthly_cost = 0
+        for item_type, item_key, item_count in used_items:
+            try:
+                monthly_cost += resource_prices[item_type, item_key] * item_count
+            except KeyError:
+                logger.error('Can not find price item with key "%s" and type "%s" for resource "%s"',
+                             item_key, item_type, content_type.name)
+        return monthly_cost
+
+
+def get_creation_month_cost(resource, monthly_cost):
+    """ Prorate monthly cost to the part of creation month when resource existed """
+    month_start = resource.created.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_end = month_start + relativedelta(months=+1)
+    seconds_in_month = (month_end - month_start).total_seconds()
+    seconds_of_work = (month_end - resource.created).total_seconds()
+    return round(monthly_cost * seconds_of_work / seconds_in_month, 2)
+
+
+def get_month_totals(resource, monthly_cost, now=None):
+    """ Return list of (year, month, total, update_if_exists) from current month to creation month """
+    now = now or timezone.now()
+    created = resource.created
+    creation_month_cost = get_creation_month_cost(resource, monthly_cost)
+    if created.month == now.month and created.year == now.year:
+        return [(now.year, now.month, creation_month_cost, True)]
+
+    totals = [(now.year, now.month, monthly_cost, True)]
+    date = now - relativedelta(months=+1)
+    while not (date.month == created.month and date.year == created.year):
+        totals.append((date.year, date.month, monthly_cost, False))
+        date -= relativedelta(months=+1)
+    totals.append((created.year, created.month, creation_month_cost, False))
+    return totals
+
+
+class ProjectedEstimatesBatch(object):
+    """ Collect resources estimates in memory and save them together with ancestors estimates """
+
+    def __init__(self):
+        # {resource estimate key: (total, update_if_exists, ancestors estimates keys)}
+        self.resource_estimates = collections.OrderedDict()
+
+    def add(self, resource, month_totals):
+        content_type_id = ContentType.objects.get_for_model(resource).id
+        ancestors = []
+        if isinstance(resource, core_models.DescendantMixin):
+            ancestors = [(ContentType.objects.get_for_model(ancestor).id, ancestor.id)
+                         for ancestor in resource.get_ancestors()]
+
+        for year, month, total, update_if_exists in month_totals:
+            key = EstimateKey(content_type_id, resource.id, year, month)
+            ancestors_keys = [EstimateKey(ct_id, object_id, year, month) for ct_id, object_id in ancestors]
+            self.resource_estimates[key] = (total, update_if_exists, ancestors_keys)
+
+    def get_keys(self):
+        keys = set(self.resource_estimates)
+        for _, _, ancestors_keys in self.resource_estimates.values():
+            keys.update(ancestors_keys)
+        return keys
+
+    def load_estimates(self, keys):
+        """ Return automatically calculated estimates {key: (id, total)} and set of keys of manual estimates """
+        object_ids = collections.defaultdict(set)
+        for key in keys:
+            object_ids[key.content_type_id].add(key.object_id)
+        years = {key.year for key in keys}
+
+        # estimates are updated and created based on these rows, so they are read from the primary
+        # even if resources are read from replicas, otherwise lagging rows lead to duplicates and lost totals
+        queryset = PriceEstimate.objects.using(router.db_for_write(PriceEstimate))
+        estimates, manual_keys = {}, set()
+        for content_type_id, ids in object_ids.items():
+            for ids_chunk in chunked(ids):
+                rows = (queryset
+                        .filter(content_type_id=content_type_id, object_id__in=ids_chunk, year__in=years)
+                        .values_list('id', 'object_id', 'year', 'month', 'total', 'is_manually_input'))
+                for estimate_id, object_id, year, month, total, is_manually_input in rows:
+                    key = EstimateKey(content_type_id, object_id, year, month)
+                    if key not in keys:
+                        continue
+                    if is_manually_input:
+                        manual_keys.add(key)
+                    else:
+                        estimates[key] = (estimate_id, total)
+        return estimates, manual_keys
+
+    def calculate(self, estimates):
+        """ Return new totals {key: total} of resources and ancestors estimates.
+            Ancestors totals are changed by difference between new and old resources totals.
+        """
+        totals = {}
+        deltas = collections.defaultdict(float)
+        for key, (total, update_if_exists, ancestors_keys) in self.resource_estimates.items():
+            if key in estimates and not update_if_exists:
+                delta = 0
+            else:
+                delta = total - (estimates[key][1] if key in estimates else 0)
+                totals[key] = total
+            for ancestor_key in ancestors_keys:
+                deltas[ancestor_key] += delta
+
+        for key, delta in deltas.items():
+            if key in estimates:
+                if delta:
+                    totals[key] = estimates[key][1] + delta
+            else:
+                totals[key] = delta
+        return totals
+
+    @transaction.atomic
+    def save(self):
+        keys = self.get_keys()
+        estimates, manual_keys = self.load_estimates(keys)
+        totals = self.calculate(estimates)
+
+        new_estimates = [
+            PriceEstimate(content_type_id=key.content_type_id, object_id=key.object_id, year=key.year,
+                          month=key.month, total=total, is_visible=key not in manual_keys)
+            for key, total in totals.items() if key not in estimates]
+        PriceEstimate.objects.bulk_create(new_estimates, batch_size=CHUNK_SIZE)
+
+        changed_totals = [(estimates[key][0], total) for key, total in totals.items()
+                          if key in estimates and total != estimates[key][1]]
+        update_totals(changed_totals)
+        if new_estimates or changed_totals:
+            # bulk queries do not send post_save signals
+            response_cache.invalidate_model(PriceEstimate)
+
+
+def update_totals(totals):
+    """ Set totals of estimates [(estimate id, total), ...] with one UPDATE ... CASE query per chunk """
+    bulk_update_field(PriceEstimate, 'total', totals, chunk_size=CHUNK_SIZE)
+
+
+def get_monthly_cost(backend, resource, price_list):
+    """ Calculate cost with price list unless backend provides its own estimation """
+    if backend.has_custom_monthly_cost_estimate():
+        return backend.get_monthly_cost_estimate(resource)
+    return price_list.get_monthly_cost(resource, backend.get_used_items(resource))
+
+
+def get_resources_queryset(model, customer_uuid=None, resource_uuid=None):
+    queryset = (model.objects
+                .exclude(state=model.States.ERRED)
+                .select_related('service_project_link__project__customer', 'service_project_link__service'))
+    if customer_uuid:
+        queryset = queryset.filter(customer__uuid=customer_uuid)
+    elif resource_uuid:
+        queryset = queryset.filter(uuid=resource_uuid)
+    return queryset
+
+
+def update_projected_estimates(customer_uuid=None, resource_uuid=None):
+    price_list = PriceList.load()
+    batch = ProjectedEstimatesBatch()
+    now = timezone.now()
+
+    for model in Resource.get_all_models():
+        for resource in get_resources_queryset(model, customer_uuid, resource_uuid).iterator():
+            backend = CostTrackingRegister.get_resource_backend(resource)
+            if not backend:
+                continue
+            try:
+                monthly_cost = float(get_monthly_cost(backend, resource, price_list))
+            except ServiceBackendNotImplemented:
+                continue
+            except ServiceBackendError as e:
+                logger.error("Failed to get cost estimate for resource %s: %s", resource, e)
+            except Exception as e:
+                logger.exception("Failed to get cost estimate for resource %s: %s", resource, e)
+            else:
+                logger.info("Update cost estimate for resource %s: %s", resource, monthly_cost)
+                batch.add(resource, get_month_totals(resource, monthly_cost, now))
+
+    batch.save()
@@ -7,6 +7,7 @@ import random
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
+from nodeconductor.core.replicas import read_replica
 from nodeconductor.cost_tracking import models
 
 
@@ -18,7 +19,10 @@ class Command(BaseCommand):
         for model in models.PriceEstimate.get_estimated_models():
             self.stdout.write('Creating price estimates for all instance of model: {} ...'.format(model.__name__))
             estimates = []
-            for obj in model.objects.all():
+            # block is entered per model, so estimates written for previous models do not pin reads to the primary
+            with read_replica():
+                objects = list(model.objects.all())
+            for obj in objects:
                 self.stdout.write(' - price estimates for object: {}'.format(obj))
                 for i in range(6):
                     year = current_year
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from nodeconductor.core.indexes import CreateIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cost_tracking', '0013_remove_item_type_choices'),
+    ]
+
+    operations = [
+        # visible estimates filtered and ordered by date
+        CreateIndex(
+            name='cost_tracking_priceestimate_visible_date_idx',
+            model_name='priceestimate',
+            columns=['year', 'month'],
+            condition='is_visible',
+        ),
+    ]
@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
 
-from nodeconductor.core.serializers import GenericRelatedField, AugmentedSerializerMixin
+from nodeconductor.core.serializers import GenericRelatedField, GenericRelatedListSerializer, AugmentedSerializerMixin
 from nodeconductor.cost_tracking import models
 from nodeconductor.structure import SupportedServices
 from nodeconductor.structure import models as structure_models
@@ -19,6 +19,7 @@ class PriceEstimateSerializer(AugmentedSerializerMixin, serializers.HyperlinkedM
         fields = ('url', 'uuid', 'scope', 'total', 'details', 'month', 'year',
                   'is_manually_input', 'scope_name', 'scope_type')
         read_only_fields = ('is_manually_input',)
+        list_serializer_class = GenericRelatedListSerializer
         extra_kwargs = {
             'url': {'lookup_field': 'uuid'},
         }
@@ -0,0 +1,111 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from mock import Mock, patch
+
+from nodeconductor.core.utils import hours_in_month
+from nodeconductor.cost_tracking import CostTrackingBackend, estimation
+from nodeconductor.cost_tracking.models import PriceEstimate
+from nodeconductor.cost_tracking.tests import factories
+from nodeconductor.openstack.cost_tracking import OpenStackCostTrackingBackend
+from nodeconductor.openstack.tests import factories as openstack_factories
+from nodeconductor.structure import models as structure_models
+
+
+class PriceListTest(TestCase):
+
+    def setUp(self):
+        self.flavor = factories.DefaultPriceListItemFactory(item_type='flavor', key='small', value=1)
+        self.storage = factories.DefaultPriceListItemFactory(item_type='storage', key='1 GB', value=Decimal('0.1'))
+        self.instance = openstack_factories.InstanceFactory()
+
+    def test_monthly_cost_is_sum_of_used_items_prices(self):
+        price_list = estimation.PriceList.load()
+        used_items = [('flavor', 'small', 1), ('storage', '1 GB', 10)]
+
+        cost = price_list.get_monthly_cost(self.instance, used_items)
+
+        self.assertEqual(cost, Decimal(self.flavor.monthly_rate) + Decimal(self.storage.monthly_rate) * 10)
+
+    def test_unknown_items_are_ignored(self):
+        price_list = estimation.PriceList.load()
+
+        self.assertEqual(price_list.get_monthly_cost(self.instance, [('flavor', 'huge', 1)]), 0)
+
+    def test_backend_without_custom_estimate_uses_default_price_list(self):
+        class Backend(CostTrackingBackend):
+            get_used_items = classmethod(lambda cls, resource: [('flavor', 'small', 2)])
+
+        self.assertFalse(Backend.has_custom_monthly_cost_estimate())
+        self.assertTrue(OpenStackCostTrackingBackend.has_custom_monthly_cost_estimate())
+        self.assertEqual(Backend.get_monthly_cost_estimate(self.instance), Decimal('%0.2f' % hours_in_month()) * 2)
+
+
+class MonthTotalsTest(TestCase):
+
+    def test_creation_month_cost_is_prorated(self):
+        resource = Mock(created=timezone.make_aware(datetime.datetime(2015, 12, 17), timezone.utc))
+
+        self.assertEqual(estimation.get_creation_month_cost(resource, 31), 15)
+
+    def test_totals_are_calculated_for_each_month_since_creation(self):
+        resource = Mock(created=timezone.make_aware(datetime.datetime(2015, 11, 16), timezone.utc))
+        now = timezone.make_aware(datetime.datetime(2016, 1, 10), timezone.utc)
+
+        totals = estimation.get_month_totals(resource, 30, now)
+
+        self.assertEqual(totals, [(2016, 1, 30, True), (2015, 12, 30, False), (2015, 11, 15, False)])
+
+
+class ProjectedEstimatesTest(TestCase):
+
+    def setUp(self):
+        self.spl = openstack_factories.OpenStackServiceProjectLinkFactory()
+        self.instances = openstack_factories.InstanceFactory.create_batch(
+            3, service_project_link=self.spl, state=structure_models.Resource.States.ONLINE)
+
+    def test_ancestors_estimates_are_sums_of_resources_estimates(self):
+        with patch.object(OpenStackCostTrackingBackend, 'get_monthly_cost_estimate', return_value=10):
+            estimation.update_projected_estimates()
+
+        now = timezone.now()
+        for scope in (self.spl, self.spl.service, self.spl.project, self.spl.project.customer):
+            estimate = PriceEstimate.objects.get(scope=scope, year=now.year, month=now.month)
+            self.assertEqual(estimate.total, sum(
+                PriceEstimate.objects.get(scope=instance, year=now.year, month=now.month).total
+                for instance in self.instances))
+
+    def test_repeated_run_does_not_change_estimates(self):
+        with patch.object(OpenStackCostTrackingBackend, 'get_monthly_cost_estimate', return_value=10):
+            estimation.update_projected_estimates()
+            totals = dict(PriceEstimate.objects.values_list('id', 'total'))
+            estimation.update_projected_estimates()
+
+        self.assertEqual(dict(PriceEstimate.objects.values_list('id', 'total')), totals)
+
+    def test_auto_estimate_is_invisible_if_manual_estimate_exists(self):
+        now = timezone.now()
+        PriceEstimate.objects.create(
+            scope=self.spl.project, year=now.year, month=now.month, total=1, is_manually_input=True)
+
+        with patch.object(OpenStackCostTrackingBackend, 'get_monthly_cost_estimate', return_value=10):
+            estimation.update_projected_estimates()
+
+        estimate = PriceEstimate.objects.get(
+            scope=self.spl.project, year=now.year, month=now.month, is_manually_input=False)
+        self.assertFalse(estimate.is_visible)
+
+    def test_existing_estimates_are_loaded_from_primary_database(self):
+        with patch.object(OpenStackCostTrackingBackend, 'get_monthly_cost_estimate', return_value=10):
+            estimation.update_projected_estimates()
+        now = timezone.now()
+        estimate = PriceEstimate.objects.get(scope=self.spl.project, year=now.year, month=now.month)
+        key = estimation.EstimateKey(estimate.content_type_id, estimate.object_id, now.year, now.month)
+
+        # replica alias does not exist, so any read routed to it fails
+        with patch('nodeconductor.core.replicas.ReplicaRouter.db_for_read', return_value='replica'):
+            estimates, _ = estimation.ProjectedEstimatesBatch().load_estimates({key})
+
+        self.assertEqual(estimates, {key: (estimate.id, estimate.total)})
@@ -3,11 +3,11 @@ from __future__ import unicode_literals
 from django.apps import AppConfig
 from django.db.models import signals
 
-from nodeconductor.core import handlers as core_handlers
 from nodeconductor.core.signals import pre_serializer_fields
 from nodeconductor.cost_tracking import CostTrackingRegister
-from nodeconductor.structure.models import Project
+from nodeconductor.structure.models import Customer, Project
 from nodeconductor.quotas import handlers as quotas_handlers
+from nodeconductor.quotas.reconciliation import QuotaSourcesRegister, CountQuotaSource
 
 
 class IaasConfig(AppConfig):
@@ -57,12 +57,6 @@ class IaasConfig(AppConfig):
             dispatch_uid='nodeconductor.iaas.handlers.prevent_deletion_of_instances_with_connected_backups',
         )
 
-        signals.pre_save.connect(
-            core_handlers.preserve_fields_before_update,
-            sender=Instance,
-            dispatch_uid='nodeconductor.iaas.handlers.preserve_fields_before_update',
-        )
-
         # if instance name is updated, zabbix host visible name should be also updated
         signals.post_save.connect(
             handlers.check_instance_name_update,
@@ -105,3 +99,5 @@ class IaasConfig(AppConfig):
             sender=Project,
             dispatch_uid='nodeconductor.iaas.handlers.check_project_name_update'
         )
+
+        QuotaSourcesRegister.register(Customer, 'nc_service_count', CountQuotaSource(Cloud, 'customer'))
@@ -8,6 +8,7 @@ from __future__ import unicode_literals
 #    tenant_name = 'test_tenant'
 
 import re
+import types
 import uuid
 import threading
 
@@ -23,6 +24,7 @@ from neutronclient.client import exceptions as neutron_exceptions
 from novaclient import exceptions as nova_exceptions
 
 from nodeconductor.core.models import get_ssh_key_fingerprint
+from nodeconductor.iaas.backend.dummy_faults import get_injector
 
 
 OPENSTACK = threading.local().openstack_instance = {}
@@ -221,10 +223,30 @@ class OpenStackResourceList(object):
 class OpenStackBaseClient(object):
     """ Base class for OpenStack client """
 
+    def __getattribute__(self, name):
+        attr = object.__getattribute__(self, name)
+        if name.startswith('_'):
+            return attr
+
+        # Resources lists and methods are wrapped if faults injection is enabled
+        injector = get_injector()
+        if injector is None:
+            return attr
+        operation = '%s.%s' % (object.__getattribute__(self, '_service_name'), name)
+        if isinstance(attr, OpenStackResourceList):
+            return injector.wrap_resources(attr, operation)
+        if isinstance(attr, types.MethodType):
+            return injector.wrap(attr, operation)
+        return attr
+
+    @property
+    def _service_name(self):
+        return self.__class__.__name__[:-len('Client')].lower()
+
     def _get_resources(self, cls_name):
         return getattr(self.__class__, cls_name)(self)
 
-    def _raise(self, exc_name, msg=None):
+    def _raise(self, exc_name, msg=None, **attrs):
         try:
             base = getattr(self.Exceptions, exc_name)
         except AttributeError:
@@ -233,6 +255,7 @@ class OpenStackBaseClient(object):
         class OpenStackException(base):
             def __init__(self, msg=None):
                 self.message = msg or 'Unknown Error'
+                self.__dict__.update(attrs)
 
             def __str__(self):
                 return self.message
@@ -0,0 +1,257 @@
+"""
+Latency and failure injection for dummy OpenStack clients.
+
+Faults are described per operation. An operation is named as
+"<service>.<attribute>[.<method>]", for example "nova.servers.create",
+"cinder.volumes.get" or "neutron.create_network". Rules are matched with
+shell-style patterns, so "nova.*" or "*.get" can be used. Rules of all matching
+patterns are merged; rules of longer patterns override rules of shorter ones.
+
+Available rule options:
+
+- latency -- delay of the call in seconds: a number, a (min, max) tuple for
+  uniform distribution or a tuple of random.Random method name and its
+  arguments, for example ('gauss', 0.2, 0.05) or ('expovariate', 10);
+- error_rate -- probability of ClientException (HTTP 500);
+- rate_limit_rate -- probability of rate limit response (HTTP 429 or 413);
+- retry_after -- retry_after value of rate limit exceptions, default 1;
+- transition -- status of the affected object after the call and number of
+  following get() calls that return this status before the real one,
+  for example {'status': 'BUILD', 'polls': 3}. If polls is None the object
+  stays in transitional state forever. Status is optional for operations
+  listed in TRANSITIONAL_STATUSES.
+
+Faults are enabled by NODECONDUCTOR['OPENSTACK_DUMMY_FAULTS'] setting:
+
+    NODECONDUCTOR['OPENSTACK_DUMMY_FAULTS'] = {
+        'seed': 42,
+        'operations': {
+            '*': {'latency': (0.05, 0.2)},
+            'nova.servers.create': {'error_rate': 0.1, 'transition': {'polls': 3}},
+            'cinder.*': {'rate_limit_rate': 0.05},
+        },
+    }
+
+or temporarily with context manager:
+
+    with inject_faults({'nova.servers.get': {'error_rate': 1}}, seed=1) as injector:
+        ...
+
+Random numbers are generated by seeded generator, so the same sequence of calls
+gets the same faults.
+"""
+from __future__ import unicode_literals
+
+import collections
+import fnmatch
+import functools
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+# Statuses of objects while the operation is in progress on real OpenStack
+TRANSITIONAL_STATUSES = {
+    'nova.servers.create': 'BUILD',
+    'nova.servers.resize': 'RESIZE',
+    'nova.servers.confirm_resize': 'VERIFY_RESIZE',
+    'nova.servers.start': 'SHUTOFF',
+    'nova.servers.stop': 'ACTIVE',
+    'cinder.volumes.create': 'creating',
+    'cinder.volumes.extend': 'extending',
+    'cinder.volume_snapshots.create': 'creating',
+    'cinder.backups.create': 'creating',
+}
+
+LATENCY_DISTRIBUTIONS = ('uniform', 'triangular', 'gauss', 'normalvariate', 'lognormvariate',
+                         'expovariate', 'gammavariate', 'betavariate', 'paretovariate', 'weibullvariate')
+
+# Names of exceptions of different clients, the first existing one is raised
+ERROR_EXCEPTIONS = ('ClientException', 'NeutronClientException')
+RATE_LIMIT_EXCEPTIONS = ('RateLimit', 'OverLimit', 'HTTPOverLimit', 'RequestEntityTooLarge', 'OverQuotaClient')
+
+
+class FaultInjector(object):
+    """ Apply faults of matching rules to calls of dummy clients """
+
+    def __init__(self, operations=None, seed=None):
+        self.operations = operations or {}
+        self.random = random.Random(seed)
+        self.sleep = time.sleep
+        # {(operation, 'calls' | 'errors' | 'rate_limits' | 'latency'): value}
+        self.stats = collections.Counter()
+        # {object id: [real status, number of polls left]}
+        self.transitions = {}
+        self._rules = {}
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    def get_rule(self, operation):
+        try:
+            return self._rules[operation]
+        except KeyError:
+            rule = {}
+            patterns = [p for p in self.operations if fnmatch.fnmatchcase(operation, p)]
+            for pattern in sorted(patterns, key=len):
+                rule.update(self.operations[pattern])
+            self._rules[operation] = rule
+            return rule
+
+    def get_latency(self, latency):
+        if not latency:
+            return 0
+        if isinstance(latency, (int, float)):
+            return latency
+        if len(latency) == 2 and not isinstance(latency[0], basestring):
+            return self.random.uniform(*latency)
+        distribution, args = latency[0], latency[1:]
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError('Unknown latency distribution "%s"' % distribution)
+        return max(0, getattr(self.random, distribution)(*args))
+
+    def wrap(self, method, operation):
+        @functools.wraps(method)
+        def wrapped(*args, **kwargs):
+            # calls of dummy clients made by other dummy calls are not faulty
+            if getattr(self._local, 'active', False):
+                return method(*args, **kwargs)
+            self._local.active = True
+            try:
+                return self.call(method, operation, owner, args, kwargs)
+            finally:
+                self._local.active = False
+
+        owner = getattr(method, '__self__', None)
+        return wrapped
+
+    def wrap_resources(self, resources, prefix):
+        return FaultyResourceList(self, resources, prefix)
+
+    def call(self, method, operation, owner, args, kwargs):
+        rule = self.get_rule(operation)
+        with self._lock:
+            self.stats[operation, 'calls'] += 1
+            latency = self.get_latency(rule.get('latency'))
+            is_rate_limited = self.random.random() < rule.get('rate_limit_rate', 0)
+            is_failed = self.random.random() < rule.get('error_rate', 0)
+
+        if latency:
+            with self._lock:
+                self.stats[operation, 'latency'] += latency
+            self.sleep(latency)
+
+        if is_rate_limited:
+            with self._lock:
+                self.stats[operation, 'rate_limits'] += 1
+            self.raise_exception(
+                owner, RATE_LIMIT_EXCEPTIONS, 'Rate limit exceeded for %s (429)' % operation,
+                retry_after=rule.get('retry_after', 1))
+
+        if is_failed:
+            with self._lock:
+                self.stats[operation, 'errors'] += 1
+            self.raise_exception(owner, ERROR_EXCEPTIONS, 'Injected failure of %s (500)' % operation)
+
+        result = method(*args, **kwargs)
+
+        if 'transition' in rule:
+            self.start_transition(operation, rule['transition'], owner, args, result)
+        if operation.endswith('.get'):
+            self.poll_transition(result)
+        return result
+
+    def raise_exception(self, owner, names, message, **attrs):
+        from nodeconductor.iaas.backend.dummy import OpenStackResourceList
+
+        # resources lists raise exceptions of their client
+        client = owner.client if isinstance(owner, OpenStackResourceList) else owner
+        exceptions = client.Exceptions
+        name = next((name for name in names if hasattr(exceptions, name)), names[0])
+        client._raise(name, message, **attrs)
+
+    def start_transition(self, operation, transition, owner, args, result):
+        from nodeconductor.iaas.backend.dummy import OpenStackResource, OpenStackResourceList
+
+        obj = result if isinstance(result, OpenStackResource) else None
+        if obj is None and args:
+            if isinstance(args[0], OpenStackResource):
+                obj = args[0]
+            elif isinstance(owner, OpenStackResourceList):
+                obj = owner.get(args[0])
+        status = transition.get('status', TRANSITIONAL_STATUSES.get(operation))
+        if obj is None or status is None:
+            return
+
+        with self._lock:
+            real_status = self.transitions.get(obj.id, [obj.status])[0]
+            self.transitions[obj.id] = [real_status, transition.get('polls')]
+            obj.status = status
+
+    def poll_transition(self, obj):
+        obj_id = getattr(obj, 'id', None)
+        with self._lock:
+            if obj_id not in self.transitions:
+                return
+            real_status, polls = self.transitions[obj_id]
+            if polls is None:
+                return
+            if polls > 0:
+                self.transitions[obj_id][1] = polls - 1
+            else:
+                obj.status = real_status
+                del self.transitions[obj_id]
+
+
+class FaultyResourceList(object):
+    """ Proxy of dummy resources list which injects faults to its methods calls """
+
+    def __init__(self, injector, resources, prefix):
+        self._injector = injector
+        self._resources = resources
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._resources, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        return self._injector.wrap(attr, '%s.%s' % (self._prefix, name))
+
+    def __iter__(self):
+        return iter(self._resources.list())
+
+    def __repr__(self):
+        return repr(self._resources)
+
+
+_injectors = []
+_settings_injector = None
+
+
+def get_injector():
+    """ Return injector of the innermost inject_faults block or injector configured in settings """
+    global _settings_injector
+
+    if _injectors:
+        return _injectors[-1]
+
+    config = settings.NODECONDUCTOR.get('OPENSTACK_DUMMY_FAULTS')
+    if not config:
+        return None
+    if _settings_injector is None or _settings_injector.config is not config:
+        _settings_injector = FaultInjector(config.get('operations'), config.get('seed'))
+        _settings_injector.config = config
+    return _settings_injector
+
+
+@contextmanager
+def inject_faults(operations, seed=None):
+    """ Inject faults of :operations: rules to calls of dummy clients within the block """
+    injector = FaultInjector(operations, seed)
+    _injectors.append(injector)
+    try:
+        yield injector
+    finally:
+        _injectors.remove(injector)
@@ -52,6 +52,53 @@ class InstanceBackupStrategy(BackupStrategy):
 
         return metadata
 
+    @classmethod
+    def get_backup_steps(cls, instance):
+        """
+        Snapshot system and data volumes of instance in parallel tasks
+        """
+        if not cls._is_storage_resource_available(instance):
+            raise BackupStrategyExecutionError('No space for instance %s backup' % instance.uuid.hex)
+        return [
+            ('system', {'volume_id': instance.system_volume_id}),
+            ('data', {'volume_id': instance.data_volume_id}),
+        ]
+
+    @classmethod
+    def execute_backup_step(cls, instance, name, parameters):
+        try:
+            backend = cls._get_backend(instance)
+            snapshot_ids = backend.create_snapshots(
+                membership=instance.cloud_project_membership,
+                volume_ids=[parameters['volume_id']],
+                prefix='Instance %s backup: ' % instance.uuid,
+            )
+        except CloudBackendError as e:
+            six.reraise(BackupStrategyExecutionError, e)
+        return snapshot_ids[0]
+
+    @classmethod
+    def join_backup_steps(cls, instance, results):
+        metadata = cls._get_instance_metadata(instance)
+        metadata['system_snapshot_id'] = results['system']
+        metadata['data_snapshot_id'] = results['data']
+        metadata['system_snapshot_size'] = instance.system_volume_size
+        metadata['data_snapshot_size'] = instance.data_volume_size
+        return metadata
+
+    @classmethod
+    def revert_backup_steps(cls, instance, results):
+        if not results:
+            return
+        try:
+            backend = cls._get_backend(instance)
+            backend.delete_snapshots(
+                membership=instance.cloud_project_membership,
+                snapshot_ids=list(results.values()),
+            )
+        except CloudBackendError as e:
+            six.reraise(BackupStrategyExecutionError, e)
+
     @classmethod
     def deserialize_instance(cls, metadata, user_raw_input):
         user_input = {
@@ -1,4 +1,6 @@
 from __future__ import unicode_literals
+
+import collections
 import logging
 
 from django.apps import apps
@@ -7,33 +9,44 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.db import models
 
-from nodeconductor.core.serializers import UnboundSerializerMethodField
-from nodeconductor.iaas.models import SecurityGroup, SecurityGroupRule, CloudProjectMembership
+from nodeconductor.core.serializers import PrefetchedField
+from nodeconductor.iaas.models import Cloud, SecurityGroup, SecurityGroupRule, CloudProjectMembership
 from nodeconductor.quotas import handlers as quotas_handlers
 from nodeconductor.structure.managers import filter_queryset_for_user
+from nodeconductor.structure.models import Project
 
 
 logger = logging.getLogger(__name__)
 
 
-def filter_clouds(clouds, request):
-    related_clouds = clouds.all()
+def get_related_clouds(objects, request):
+    """ Return serialized clouds of projects or customers visible to user: {object pk: clouds} """
+    from nodeconductor.iaas.serializers import BasicCloudSerializer
 
+    clouds = Cloud.objects.all()
     try:
-        user = request.user
-        related_clouds = filter_queryset_for_user(related_clouds, user)
+        clouds = filter_queryset_for_user(clouds, request.user)
     except AttributeError:
         pass
 
-    from nodeconductor.iaas.serializers import BasicCloudSerializer
+    related_clouds = collections.defaultdict(list)
+    if isinstance(objects[0], Project):
+        memberships = (CloudProjectMembership.objects
+                       .filter(project__in=objects, cloud__in=clouds)
+                       .select_related('cloud')
+                       .order_by('cloud'))
+        for membership in memberships:
+            related_clouds[membership.project_id].append(membership.cloud)
+    else:
+        for cloud in clouds.filter(customer__in=objects).order_by('pk'):
+            related_clouds[cloud.customer_id].append(cloud)
 
-    serializer_instance = BasicCloudSerializer(related_clouds, many=True, context={'request': request})
-
-    return serializer_instance.data
+    return {pk: BasicCloudSerializer(clouds, many=True, context={'request': request}).data
+            for pk, clouds in related_clouds.items()}
 
 
 def add_clouds_to_related_model(sender, fields, **kwargs):
-    fields['clouds'] = UnboundSerializerMethodField(filter_clouds)
+    fields['clouds'] = PrefetchedField(get_related_clouds, empty_value=[])
 
 
 def create_initial_security_groups(sender, instance=None, created=False, **kwargs):
@@ -106,8 +119,7 @@ def check_instance_name_update(sender, instance=None, created=False, **kwargs):
     if created:
         return
 
-    old_name = instance._old_values['name']
-    if old_name != instance.name:
+    if instance.has_changed('name'):
         from nodeconductor.iaas.tasks.zabbix import zabbix_update_host_visible_name
         zabbix_update_host_visible_name.delay(instance.uuid.hex)
 
@@ -0,0 +1,25 @@
+from __future__ import unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from nodeconductor.iaas.models import InstanceSlaHistory, InstanceSlaReport
+
+
+class Command(BaseCommand):
+    """ Build SLA reports of resources endpoint from existing SLA history """
+
+    option_list = BaseCommand.option_list + (
+        make_option('--period', action='append', dest='periods', default=[],
+                    help='Build reports only for given period (YYYY or YYYY-MM), can be repeated.'),
+    )
+
+    def handle(self, *args, **options):
+        periods = options['periods']
+        if not periods:
+            periods = InstanceSlaHistory.objects.order_by('period').values_list('period', flat=True).distinct()
+
+        for period in periods:
+            count = InstanceSlaReport.objects.refresh(period)
+            self.stdout.write('Built %s SLA reports for period %s' % (count, period))
@@ -0,0 +1,40 @@
+from __future__ import unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nodeconductor.iaas.models import Instance
+from nodeconductor.monitoring.zabbix.errors import ZabbixError
+from nodeconductor.monitoring.zabbix.inventory import ZabbixInventory
+
+
+class Command(BaseCommand):
+    """ Create missing Zabbix hosts and IT services of instances """
+
+    option_list = BaseCommand.option_list + (
+        make_option('--dry-run', action='store_true', dest='dry_run', default=False,
+                    help='Report missing and outdated hosts and services without changing them.'),
+    )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        instances = Instance.objects.exclude(backend_id='').select_related('template__application_type')
+        try:
+            diff = ZabbixInventory().reconcile(instances, dry_run=dry_run)
+        except ZabbixError as e:
+            raise CommandError('Can not reconcile Zabbix inventory: %s' % e)
+
+        for instance in diff.missing_hosts:
+            self.stdout.write('Missing host of instance %s (%s)' % (instance, instance.backend_id))
+        for instance, host_id in diff.outdated_hosts:
+            self.stdout.write('Outdated visible name of host %s of instance %s' % (host_id, instance))
+        for instance in diff.missing_services:
+            self.stdout.write('Missing service of instance %s (%s)' % (instance, instance.backend_id))
+
+        summary = '%s missing hosts, %s outdated hosts, %s missing services' % (
+            len(diff.missing_hosts), len(diff.outdated_hosts), len(diff.missing_services))
+        if dry_run:
+            self.stdout.write('%s would be reconciled' % summary)
+        else:
+            self.stdout.write('%s have been reconciled' % summary)
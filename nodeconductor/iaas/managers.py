@@ -1,4 +1,8 @@
-from django.db import models
+import calendar
+import datetime
+
+from django.db import models, transaction
+
 
 class InstanceManager(models.Manager):
 
@@ -27,3 +31,72 @@ class InstanceManager(models.Manager):
         Filters instances by customers
         """
         return self.get_queryset().filter(cloud_project_membership__project__customer__in=qs)
+
+
+def get_period_end(period):
+    """ Return the last day of period formatted as YYYY or YYYY-MM """
+    period = str(period)
+    if '-' in period:
+        year, month = map(int, period.split('-'))
+    else:
+        year, month = int(period), 12
+    return datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+
+class InstanceSlaReportManager(models.Manager):
+
+    def build(self, instance, period, history_id=None, value=None):
+        """ Return unsaved SLA report of instance with current names of its project and customer """
+        project = instance.cloud_project_membership.project
+        customer = project.customer
+        return self.model(
+            period=str(period),
+            instance=instance,
+            history_id=history_id,
+            value=value,
+            instance_uuid=instance.uuid,
+            name=instance.name,
+            state=instance.state,
+            template_name=instance.template.name,
+            agreed_sla=instance.agreed_sla,
+            external_ips=instance.external_ips,
+            project=project,
+            project_uuid=project.uuid,
+            project_name=project.name,
+            project_groups=[{'uuid': group.uuid.hex, 'name': group.name}
+                            for group in project.project_groups.all()],
+            customer=customer,
+            customer_uuid=customer.uuid,
+            customer_name=customer.name,
+            customer_native_name=customer.native_name,
+            customer_abbreviation=customer.abbreviation,
+        )
+
+    def get_instances(self, period):
+        """ Return queryset of instances created till the end of period """
+        from nodeconductor.iaas.models import Instance
+
+        return (Instance.objects
+                .exclude(state=Instance.States.DELETING)
+                .filter(created__lte=get_period_end(period))
+                .select_related('template', 'cloud_project_membership__project__customer')
+                .prefetch_related('cloud_project_membership__project__project_groups'))
+
+    def refresh(self, period):
+        """ Rebuild SLA reports of instances created till the end of period """
+        from nodeconductor.iaas.models import InstanceSlaHistory
+
+        period = str(period)
+        instances = self.get_instances(period)
+        histories = {instance_id: (history_id, value) for history_id, instance_id, value in
+                     InstanceSlaHistory.objects.filter(period=period).values_list('id', 'instance_id', 'value')}
+
+        reports = []
+        for instance in instances:
+            history_id, value = histories.get(instance.id, (None, None))
+            reports.append(self.build(instance, period, history_id, value))
+
+        with transaction.atomic():
+            self.filter(period=period).delete()
+            self.bulk_create(reports, batch_size=500)
+        return len(reports)
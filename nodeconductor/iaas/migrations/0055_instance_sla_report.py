@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+import jsonfield.fields
+import uuidfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('structure', '0027_customermembership'),
+        ('iaas', '0054_delete_iaastemplate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstanceSlaReport',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('period', models.CharField(max_length=10)),
+                ('value', models.DecimalField(null=True, max_digits=11, decimal_places=4, blank=True)),
+                ('instance_uuid', uuidfield.fields.UUIDField(max_length=32)),
+                ('name', models.CharField(max_length=150)),
+                ('state', models.IntegerField(choices=[(1, 'Provisioning Scheduled'), (2, 'Provisioning'), (3, 'Online'), (4, 'Offline'), (5, 'Starting Scheduled'), (6, 'Starting'), (7, 'Stopping Scheduled'), (8, 'Stopping'), (9, 'Erred'), (10, 'Deletion Scheduled'), (11, 'Deleting'), (13, 'Resizing Scheduled'), (14, 'Resizing'), (15, 'Restarting Scheduled'), (16, 'Restarting')])),
+                ('template_name', models.CharField(max_length=150)),
+                ('agreed_sla', models.DecimalField(null=True, max_digits=6, decimal_places=4, blank=True)),
+                ('external_ips', models.GenericIPAddressField(null=True, protocol='IPv4', blank=True)),
+                ('project_uuid', uuidfield.fields.UUIDField(max_length=32)),
+                ('project_name', models.CharField(max_length=150)),
+                ('project_groups', jsonfield.fields.JSONField(default=[])),
+                ('customer_uuid', uuidfield.fields.UUIDField(max_length=32)),
+                ('customer_name', models.CharField(max_length=150)),
+                ('customer_native_name', models.CharField(max_length=160, blank=True)),
+                ('customer_abbreviation', models.CharField(max_length=8, blank=True)),
+                ('customer', models.ForeignKey(related_name='+', to='structure.Customer')),
+                ('history', models.ForeignKey(related_name='+', on_delete=django.db.models.deletion.SET_NULL, to='iaas.InstanceSlaHistory', null=True)),
+                ('instance', models.ForeignKey(related_name='sla_reports', to='iaas.Instance')),
+                ('project', models.ForeignKey(related_name='+', to='structure.Project')),
+            ],
+            options={
+                'verbose_name': 'Instance SLA report',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='instanceslareport',
+            unique_together=set([('instance', 'period')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='instanceslareport',
+            index_together=set([('period', 'name')]),
+        ),
+    ]
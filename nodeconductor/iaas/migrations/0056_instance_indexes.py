@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from nodeconductor.core.indexes import CreateIndex, EnableExtension
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iaas', '0055_instance_sla_report'),
+    ]
+
+    operations = [
+        # ordering by start time with empty start times first, expression matches InstanceViewSet ordering
+        CreateIndex(
+            name='iaas_instance_start_time_sort_idx',
+            model_name='instance',
+            columns=['CASE WHEN start_time IS NULL THEN 0 ELSE 1 END', 'start_time'],
+        ),
+        CreateIndex(
+            name='iaas_instance_installation_state_idx',
+            model_name='instance',
+            columns=['state', 'installation_state'],
+        ),
+        EnableExtension('pg_trgm'),
+        CreateIndex(
+            name='iaas_instance_name_trgm_idx',
+            model_name='instance',
+            columns=[('UPPER(name::text)', 'gin_trgm_ops')],
+            method='gin',
+            vendors=('postgresql',),
+            extension='pg_trgm',
+        ),
+    ]
@@ -8,9 +8,12 @@ from django.core.validators import MaxValueValidator, MinValueValidator, URLVali
 from django.db import models
 from django.utils.encoding import python_2_unicode_compatible
 from iptools.ipv4 import validate_cidr
+from jsonfield import JSONField
+from uuidfield import UUIDField
 
 from nodeconductor.core import models as core_models
 from nodeconductor.cost_tracking import models as cost_tracking_models
+from nodeconductor.iaas import managers
 from nodeconductor.logging.log import LoggableMixin
 from nodeconductor.quotas.models import QuotaModelMixin
 from nodeconductor.structure import models as structure_models
@@ -291,7 +294,8 @@ class FloatingIP(core_models.UuidMixin):
     backend_network_id = models.CharField(max_length=255, editable=False)
 
 
-class Instance(structure_models.Resource,
+class Instance(core_models.ChangeTrackingMixin,
+               structure_models.Resource,
                structure_models.PaidResource,
                structure_models.BaseVirtualMachineMixin):
     """
@@ -400,6 +404,53 @@ class InstanceSlaHistory(models.Model):
         return 'SLA for %s during %s: %s' % (self.instance, self.period, self.value)
 
 
+@python_2_unicode_compatible
+class InstanceSlaReport(models.Model):
+    """
+    Denormalized SLA of an instance during a period.
+
+    Rows are rebuilt by SLA update tasks, so resources report is served
+    without joins to instances, projects and customers.
+    """
+    class Permissions(object):
+        customer_path = 'customer'
+        project_path = 'project'
+        project_group_path = 'project__project_groups'
+
+    period = models.CharField(max_length=10)
+    instance = models.ForeignKey(Instance, related_name='sla_reports')
+    history = models.ForeignKey(InstanceSlaHistory, related_name='+', null=True, on_delete=models.SET_NULL)
+    value = models.DecimalField(max_digits=11, decimal_places=4, null=True, blank=True)
+
+    instance_uuid = UUIDField()
+    name = models.CharField(max_length=150)
+    state = models.IntegerField(choices=Instance.States.CHOICES)
+    template_name = models.CharField(max_length=150)
+    agreed_sla = models.DecimalField(max_digits=6, decimal_places=4, null=True, blank=True)
+    external_ips = models.GenericIPAddressField(null=True, blank=True, protocol='IPv4')
+
+    project = models.ForeignKey(structure_models.Project, related_name='+')
+    project_uuid = UUIDField()
+    project_name = models.CharField(max_length=150)
+    # list of {'uuid': ..., 'name': ...} of project groups
+    project_groups = JSONField(default=[])
+    customer = models.ForeignKey(structure_models.Customer, related_name='+')
+    customer_uuid = UUIDField()
+    customer_name = models.CharField(max_length=150)
+    customer_native_name = models.CharField(max_length=160, blank=True)
+    customer_abbreviation = models.CharField(max_length=8, blank=True)
+
+    objects = managers.InstanceSlaReportManager()
+
+    class Meta:
+        unique_together = ('instance', 'period')
+        index_together = ('period', 'name')
+        verbose_name = 'Instance SLA report'
+
+    def __str__(self):
+        return 'SLA report for %s during %s: %s' % (self.name, self.period, self.value)
+
+
 @python_2_unicode_compatible
 class InstanceSlaHistoryEvents(models.Model):
     EVENTS = (
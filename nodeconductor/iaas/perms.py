@@ -27,6 +27,7 @@ PERMISSION_LOGICS = (
     ('iaas.Image', StaffPermissionLogic(any_permission=True)),
     ('iaas.TemplateLicense', StaffPermissionLogic(any_permission=True)),
     ('iaas.InstanceSlaHistory', StaffPermissionLogic(any_permission=True)),
+    ('iaas.InstanceSlaReport', StaffPermissionLogic(any_permission=True)),
     ('iaas.Cloud', FilteredCollaboratorsPermissionLogic(
         collaborators_query='customer__roles__permission_group__user',
         collaborators_filter={
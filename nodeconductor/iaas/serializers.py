@@ -107,7 +107,7 @@ class CloudProjectMembershipSerializer(structure_serializers.PermissionFieldFilt
                                        core_serializers.AugmentedSerializerMixin,
                                        serializers.HyperlinkedModelSerializer):
 
-    quotas = quotas_serializers.QuotaSerializer(many=True, read_only=True)
+    quotas = quotas_serializers.QuotasField()
     state = MappedChoiceField(
         choices=[(v, k) for k, v in core_models.SynchronizationStates.CHOICES],
         choice_mappings={v: k for k, v in core_models.SynchronizationStates.CHOICES},
@@ -909,27 +909,24 @@ class FloatingIPSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class ServiceSerializer(serializers.Serializer):
+    """ Serialize denormalized instance SLA report or instance of resources endpoint """
     url = serializers.SerializerMethodField('get_service_url')
     service_type = serializers.SerializerMethodField()
     state = serializers.ReadOnlyField(source='get_state_display')
     name = serializers.ReadOnlyField()
-    uuid = serializers.ReadOnlyField()
+    uuid = serializers.ReadOnlyField(source='instance_uuid')
     agreed_sla = serializers.ReadOnlyField()
-    actual_sla = serializers.SerializerMethodField()
-    template_name = serializers.ReadOnlyField(source='template.name')
-    customer_name = serializers.ReadOnlyField(source='cloud_project_membership.project.customer.name')
-    customer_native_name = serializers.ReadOnlyField(source='cloud_project_membership.project.customer.native_name')
-    customer_abbreviation = serializers.ReadOnlyField(source='cloud_project_membership.project.customer.abbreviation')
-    project_name = serializers.ReadOnlyField(source='cloud_project_membership.project.name')
-    project_uuid = serializers.ReadOnlyField(source='cloud_project_membership.project.uuid')
+    actual_sla = serializers.ReadOnlyField(source='value')
+    template_name = serializers.ReadOnlyField()
+    customer_name = serializers.ReadOnlyField()
+    customer_native_name = serializers.ReadOnlyField()
+    customer_abbreviation = serializers.ReadOnlyField()
+    project_name = serializers.ReadOnlyField()
+    project_uuid = serializers.ReadOnlyField()
     project_url = serializers.SerializerMethodField()
     project_groups = serializers.SerializerMethodField()
     resource_type = serializers.SerializerMethodField()
-    access_information = serializers.ListField(
-        source='external_ips',
-        child=core_serializers.IPAddressField(),
-        read_only=True,
-    )
+    access_information = serializers.SerializerMethodField()
 
     class Meta(object):
         fields = (
@@ -946,18 +943,16 @@ class ServiceSerializer(serializers.Serializer):
             'service_type',
             'access_information',
         )
-        view_name = 'iaas-resource-detail'
-        extra_kwargs = {
-            'url': {'lookup_field': 'uuid'},
-        }
 
-    def get_project_url(self, obj):
+    def _get_request(self):
         try:
-            request = self.context['request']
-        except AttributeError:
-            raise AttributeError('ServiceSerializer have to be initialized with `request` in context')
-        return request.build_absolute_uri(
-            reverse('project-detail', kwargs={'uuid': obj.cloud_project_membership.project.uuid}))
+            return self.context['request']
+        except (KeyError, AttributeError):
+            raise AttributeError('ServiceSerializer has to be initialized with `request` in context')
+
+    def get_project_url(self, obj):
+        return self._get_request().build_absolute_uri(
+            reverse('project-detail', kwargs={'uuid': obj.project_uuid}))
 
     def get_service_type(self, obj):
         return 'IaaS'
@@ -965,53 +960,32 @@ class ServiceSerializer(serializers.Serializer):
     def get_resource_type(self, obj):
         return 'IaaS.Instance'
 
-    def get_actual_sla(self, obj):
-        try:
-            period = self.context['period']
-        except (KeyError, AttributeError):
-            raise AttributeError('ServiceSerializer has to be initialized with `period` in context')
-        try:
-            return models.InstanceSlaHistory.objects.get(instance=obj, period=period).value
-        except models.InstanceSlaHistory.DoesNotExist:
-            return None
-
     def get_service_url(self, obj):
-        try:
-            request = self.context['request']
-        except (KeyError, AttributeError):
-            raise AttributeError('ServiceSerializer has to be initialized with `request` in context')
-
-        # TODO: this could use something similar to backup's generic model for all resources
-        view_name = 'iaas-resource-detail'
-        service_instance = obj
-        hyperlinked_field = serializers.HyperlinkedRelatedField(
-            view_name=view_name,
-            lookup_field='uuid',
-            read_only=True,
-        )
-        return hyperlinked_field.get_url(service_instance, view_name, request, format=None)
+        return self._get_request().build_absolute_uri(
+            reverse('iaas-resource-detail', kwargs={'uuid': obj.instance_uuid}))
 
     # TODO: this shouldn't come from this endpoint, but UI atm depends on it
     def get_project_groups(self, obj):
-        try:
-            request = self.context['request']
-        except (KeyError, AttributeError):
-            raise AttributeError('ServiceSerializer has to be initialized with `request` in context')
-
-        service_instance = obj
-        groups = structure_serializers.BasicProjectGroupSerializer(
-            service_instance.cloud_project_membership.project.project_groups.all(),
-            many=True,
-            read_only=True,
-            context={'request': request}
-        )
-        return groups.data
-
-    def to_representation(self, instance):
-        # We need this hook, because ips have to be represented as list
-        instance.external_ips = [instance.external_ips] if instance.external_ips else []
-        instance.internal_ips = [instance.internal_ips] if instance.internal_ips else []
-        return super(ServiceSerializer, self).to_representation(instance)
+        request = self._get_request()
+        return [{
+            'url': request.build_absolute_uri(reverse('projectgroup-detail', kwargs={'uuid': group['uuid']})),
+            'name': group['name'],
+            'uuid': group['uuid'],
+        } for group in obj.project_groups]
+
+    def get_access_information(self, obj):
+        # ips have to be represented as list
+        return [obj.external_ips] if obj.external_ips else []
+
+    def to_representation(self, obj):
+        if isinstance(obj, models.Instance):
+            # instance of period without SLA reports is represented with current names
+            history = obj.period_slas[0] if getattr(obj, 'period_slas', None) else None
+            obj = models.InstanceSlaReport.objects.build(
+                obj, self.context['period'],
+                history_id=history.id if history else None,
+                value=history.value if history else None)
+        return super(ServiceSerializer, self).to_representation(obj)
 
 
 class UsageStatsSerializer(serializers.Serializer):
@@ -1041,6 +1015,22 @@ class UsageStatsSerializer(serializers.Serializer):
             item = 'cpu_util_agent'
         item_stats = zabbix_db_client.get_item_stats(
             instances, item, self.data['start_timestamp'], self.data['end_timestamp'], self.data['segments_count'])
+        return self._fix_item_stats(item_stats, instances)
+
+    def get_grouped_stats(self, instances_groups):
+        """
+        Calculate stats for several groups of instances with single Zabbix API call and DB query.
+        Return dictionary of stats keyed by groups keys.
+        """
+        self.attrs = self.data
+        zabbix_db_client = ZabbixDBClient()
+        grouped_stats = zabbix_db_client.get_grouped_item_stats(
+            instances_groups, self.data['item'],
+            self.data['start_timestamp'], self.data['end_timestamp'], self.data['segments_count'])
+        return {key: self._fix_item_stats(grouped_stats.get(key, []), instances)
+                for key, instances in instances_groups.items()}
+
+    def _fix_item_stats(self, item_stats, instances):
         # XXX: Quick and dirty fix: zabbix presents percentage of free space(not utilized) for storage
         if self.data['item'] in ('storage_root_util', 'storage_data_util'):
             for stat in item_stats:
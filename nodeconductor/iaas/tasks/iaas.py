@@ -6,7 +6,7 @@ import logging
 from celery import shared_task
 
 from nodeconductor.core.models import SynchronizationStates
-from nodeconductor.core.tasks import tracked_processing, set_state, StateChangeError
+from nodeconductor.core.tasks import coalesced_task, tracked_processing, set_state, StateChangeError
 from nodeconductor.iaas.log import event_logger
 from nodeconductor.iaas import models
 from nodeconductor.iaas.backend import CloudBackendError
@@ -153,7 +153,7 @@ def pull_service_statistics():
                 stats = backend.pull_service_statistics(cloud)
 
 
-@shared_task
+@coalesced_task
 @tracked_processing(
     models.CloudProjectMembership,
     processing_state='begin_syncing',
@@ -210,6 +210,10 @@ def pull_cloud_memberships():
     queryset = models.CloudProjectMembership.objects.filter(state=SynchronizationStates.IN_SYNC)
 
     for membership in queryset.iterator():
+        if pull_cloud_membership.is_pending(membership.pk):
+            logger.info('Skip pulling of cloud membership %s, previous pull is not finished yet', membership.pk)
+            continue
+
         membership.schedule_syncing()
         membership.save()
 
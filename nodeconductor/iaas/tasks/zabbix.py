@@ -7,12 +7,15 @@ import logging
 from celery import shared_task
 from django.conf import settings
 
-from nodeconductor.core.tasks import retry_if_false
+from nodeconductor.core.cache import response_cache
+from nodeconductor.core.tasks import coalesced_task, retry_if_false
+from nodeconductor.core.utils import bulk_update_field
 from nodeconductor.iaas.models import Instance, CloudProjectMembership
 from nodeconductor.iaas.log import event_logger
 from nodeconductor.monitoring.zabbix.api_client import ZabbixApiClient
 from nodeconductor.monitoring.zabbix.db_client import ZabbixDBClient
 from nodeconductor.monitoring.zabbix.errors import ZabbixError
+from nodeconductor.monitoring.zabbix.inventory import ZabbixInventory
 from nodeconductor.monitoring import utils as monitoring_utils
 
 
@@ -31,7 +34,7 @@ def zabbix_task(task_fn):
     return wrapped
 
 
-@shared_task
+@coalesced_task
 @zabbix_task
 def zabbix_create_host_and_service(instance_uuid, warn_if_exists=True):
     instance = Instance.objects.get(uuid=instance_uuid)
@@ -41,8 +44,12 @@ def zabbix_create_host_and_service(instance_uuid, warn_if_exists=True):
 @shared_task
 @zabbix_task
 def zabbix_create_host_and_service_for_all_instances():
-    for instance in Instance.objects.exclude(backend_id=''):
-        zabbix_create_host_and_service.delay(instance.uuid.hex, warn_if_exists=False)
+    instances = Instance.objects.exclude(backend_id='').select_related('template__application_type')
+    try:
+        ZabbixInventory().reconcile(instances)
+    except ZabbixError as e:
+        # task does not have to fail if something is wrong with zabbix
+        logger.error('Zabbix inventory reconciliation has failed: %s', e)
 
 
 @shared_task
@@ -66,6 +73,21 @@ def _get_installation_state(instance):
     return db_client.get_application_installation_state(instance)
 
 
+def _log_installation_state_change(instance):
+    if instance.installation_state == 'FAIL':
+        event_logger.instance.info(
+            'Application has failed on {instance_name}.',
+            event_type='iaas_instance_application_failed',
+            event_context={'instance': instance}
+        )
+    else:
+        event_logger.instance.info(
+            'Application has become available on {instance_name}.',
+            event_type='iaas_instance_application_became_available',
+            event_context={'instance': instance}
+        )
+
+
 # XXX: instances pulling and polling has to be refactored (NC-580):
 # Or we simply return zabbix status or we handle its status changes.
 
@@ -80,34 +102,43 @@ def pull_instance_installation_state(instance_uuid):
     if instance.installation_state != installation_state:
         instance.installation_state = installation_state
         instance.save()
-
-        if installation_state == 'FAIL':
-            event_logger.instance.info(
-                'Application has failed on {instance_name}.',
-                event_type='iaas_instance_application_failed',
-                event_context={'instance': instance}
-            )
-        else:
-            event_logger.instance.info(
-                'Application has become available on {instance_name}.',
-                event_type='iaas_instance_application_became_available',
-                event_context={'instance': instance}
-            )
+        _log_installation_state_change(instance)
 
 
 @shared_task
 @zabbix_task
 def pull_instances_installation_state():
-    """ Pull state for all stable instances """
-    instances = Instance.objects.filter(
+    """
+    Pull state for all stable instances with one Zabbix API call and one Zabbix DB query.
+    Instances that left stable states (e.g. erred or being deleted) are not tracked anymore.
+    """
+    instances = list(Instance.objects.filter(
         installation_state__in=['OK', 'FAIL'],
         state__in=Instance.States.STABLE_STATES,
-        type=Instance.Services.PAAS)
+        type=Instance.Services.PAAS))
+    if not instances:
+        return
+
+    try:
+        states = ZabbixDBClient().get_application_installation_states(instances)
+    except ZabbixError as e:
+        # the same as per-instance pull failure: application is considered failed
+        logger.error('Failed to pull installation state of instances: %s', e)
+        states = {}
+
+    changed_instances = []
     for instance in instances:
-        pull_instance_installation_state.apply_async(
-            args=(instance.uuid.hex,),
-            link_error=installation_state_pull_failed.s(instance.uuid.hex),
-        )
+        installation_state = 'OK' if states.get(instance.pk) == 'OK' else 'FAIL'
+        if instance.installation_state != installation_state:
+            instance.installation_state = installation_state
+            changed_instances.append(instance)
+
+    bulk_update_field(Instance, 'installation_state',
+                      [(instance.pk, instance.installation_state) for instance in changed_instances])
+    if changed_instances:
+        response_cache.invalidate_model(Instance)
+    for instance in changed_instances:
+        _log_installation_state_change(instance)
 
 
 @shared_task(max_retries=60, default_retry_delay=60)
@@ -1,12 +1,16 @@
 import types
 import uuid
 
+from django.conf import settings
 from django.test import TestCase
+from django.test.utils import override_settings
+from mock import Mock
 
 from novaclient import exceptions as nova_exceptions
 from keystoneclient import exceptions as keystone_exceptions
 from cinderclient import exceptions as cinder_exceptions
 
+from nodeconductor.iaas.backend.dummy_faults import inject_faults
 from nodeconductor.iaas.backend.openstack import OpenStackBackend
 from nodeconductor.iaas.models import OpenStackSettings
 
@@ -291,3 +295,93 @@ class OpenStackClientTest(TestCase):
 
         with self.assertRaises(cinder_exceptions.NotFound):
             cinder.volume_snapshots.get(snapshot.id)
+
+
+class FaultInjectionTest(TestCase):
+
+    def setUp(self):
+        OpenStackSettings.objects.update_or_create(
+            auth_url='http://keystone.example.com:5000/v2.0',
+            defaults={
+                'username': 'test_user',
+                'password': 'test_password',
+                'tenant_name': 'test_tenant',
+            }
+        )
+        self.backend = OpenStackBackend(dummy=True)
+        session = self.backend.create_tenant_session({
+            'auth_url': 'http://keystone.example.com:5000/v2.0',
+            'username': 'test_user',
+            'password': 'test_password',
+            'tenant_id': '593af1f7b67b4d63b691fcabd2dad126',
+        })
+        self.nova = self.backend.create_nova_client(session)
+        self.cinder = self.backend.create_cinder_client(session)
+        self.server = self.nova.servers.list()[0]
+        self.nova.servers.start(self.server.id)
+
+    def test_latency_is_sampled_for_operation(self):
+        with inject_faults({'nova.servers.get': {'latency': 0.5}, 'nova.*': {'latency': (1, 2)}}) as injector:
+            injector.sleep = Mock()
+            self.nova.servers.get(self.server.id)
+            self.nova.flavors.list()
+
+        self.assertEqual(injector.sleep.call_args_list[0][0][0], 0.5)
+        self.assertTrue(1 <= injector.sleep.call_args_list[1][0][0] <= 2)
+        self.assertEqual(injector.stats['nova.servers.get', 'calls'], 1)
+
+    def test_failures_are_raised_with_client_exceptions(self):
+        with inject_faults({'nova.servers.get': {'error_rate': 1}, 'nova.flavors.list': {'rate_limit_rate': 1}}):
+            with self.assertRaises(nova_exceptions.ClientException):
+                self.nova.servers.get(self.server.id)
+
+            with self.assertRaises(nova_exceptions.RateLimit) as context:
+                self.nova.flavors.list()
+            self.assertEqual(context.exception.retry_after, 1)
+
+    def test_nested_calls_of_dummy_clients_are_not_faulty(self):
+        volume = self.cinder.volumes.create(size=1, display_name='volume-%s' % uuid.uuid4().hex)
+
+        with inject_faults({'cinder.volumes.get': {'error_rate': 1}}):
+            snapshot = self.cinder.volume_snapshots.create(
+                volume.id, force=True, display_name='snapshot-%s' % uuid.uuid4().hex)
+
+        self.assertEqual(snapshot.volume_id, volume.id)
+
+    def test_faults_are_deterministic_for_the_same_seed(self):
+        def get_failures(seed):
+            failures = []
+            with inject_faults({'nova.servers.get': {'error_rate': 0.5}}, seed=seed):
+                for _ in range(20):
+                    try:
+                        self.nova.servers.get(self.server.id)
+                    except nova_exceptions.ClientException:
+                        failures.append(True)
+                    else:
+                        failures.append(False)
+            return failures
+
+        self.assertEqual(get_failures(1), get_failures(1))
+        self.assertIn(True, get_failures(1))
+        self.assertIn(False, get_failures(1))
+
+    def test_object_stays_in_transitional_state_for_configured_number_of_polls(self):
+        with inject_faults({'nova.servers.stop': {'transition': {'polls': 2}}}):
+            self.nova.servers.stop(self.server.id)
+            statuses = [self.nova.servers.get(self.server.id).status for _ in range(3)]
+
+        self.assertEqual(statuses, ['ACTIVE', 'ACTIVE', 'SHUTOFF'])
+
+    def test_wait_for_status_fails_if_object_is_stuck(self):
+        with inject_faults({'nova.servers.stop': {'transition': {'status': 'ACTIVE', 'polls': None}}}):
+            self.nova.servers.stop(self.server.id)
+            self.assertFalse(self.backend._wait_for_instance_status(
+                self.server.id, self.nova, 'SHUTOFF', retries=3, poll_interval=0))
+
+    def test_faults_are_injected_from_settings(self):
+        faults = {'seed': 1, 'operations': {'nova.servers.get': {'error_rate': 1}}}
+        with override_settings(NODECONDUCTOR=dict(settings.NODECONDUCTOR, OPENSTACK_DUMMY_FAULTS=faults)):
+            with self.assertRaises(nova_exceptions.ClientException):
+                self.nova.servers.get(self.server.id)
+
+        self.assertEqual(self.nova.servers.get(self.server.id).id, self.server.id)
@@ -2,6 +2,8 @@ from decimal import Decimal
 from datetime import date
 
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import test, status
 
 from nodeconductor.core.tests import helpers
@@ -191,3 +193,58 @@ class ServiceEventsTest(test.APISimpleTestCase):
     # Helper methods
     def _get_service_events_url(self, service):
         return _get_service_url(service) + 'events/'
+
+
+class ServicesReportsTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(structure_factories.UserFactory(is_staff=True))
+        today = date.today()
+        self.period = '%s-%s' % (today.year, today.month)
+        self.instance = factories.InstanceFactory()
+        factories.InstanceSlaHistoryFactory(instance=self.instance, period=self.period, value=Decimal('99.5'))
+
+    def test_instances_are_listed_if_period_has_no_reports(self):
+        response = self.client.get(_get_service_list_url(), data={'period': self.period})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([service['url'] for service in response.data], [_get_service_url(self.instance)])
+        self.assertEqual(Decimal(response.data[0]['actual_sla']), Decimal('99.5'))
+
+    def test_reports_are_listed_if_period_has_reports(self):
+        models.InstanceSlaReport.objects.refresh(self.period)
+        self.instance.name = 'Renamed instance'
+        self.instance.save()
+
+        response = self.client.get(_get_service_list_url(), data={'period': self.period})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data[0]['name'], 'Renamed instance')
+
+
+class ServicesQueriesTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        self.staff = structure_factories.UserFactory(is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.period = str(date.today().year)
+
+    def create_instances(self, count):
+        for _ in range(count):
+            instance = factories.InstanceFactory()
+            instance.cloud_project_membership.project.project_groups.add(structure_factories.ProjectGroupFactory())
+            factories.InstanceSlaHistoryFactory(instance=instance, period=self.period)
+        models.InstanceSlaReport.objects.refresh(self.period)
+
+    def get_queries_count(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(_get_service_list_url(), data={'period': self.period})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context)
+
+    def test_number_of_queries_does_not_depend_on_number_of_instances(self):
+        self.create_instances(2)
+        queries_count = self.get_queries_count()
+
+        self.create_instances(5)
+        self.assertEqual(self.get_queries_count(), queries_count)
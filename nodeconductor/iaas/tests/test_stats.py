@@ -150,7 +150,8 @@ class UsageStatsTest(test.APITransactionTestCase):
 
     def _get_patched_client(self):
         patched_cliend = Mock()
-        patched_cliend.get_item_stats = Mock(return_value=self.expected_datapoints)
+        patched_cliend.get_grouped_item_stats = Mock(
+            side_effect=lambda groups, *args: {key: self.expected_datapoints for key in groups})
         return patched_cliend
 
     def test_invalid_aggregate_processed_correctly(self):
@@ -230,6 +231,21 @@ class UsageStatsTest(test.APITransactionTestCase):
             expected_data = [{'name': self.project1.name, 'datapoints': self.expected_datapoints}]
             self.assertItemsEqual(response.data, expected_data)
 
+    def test_zabbix_is_queried_once_for_all_aggregates(self):
+        self.client.force_authenticate(self.staff)
+
+        patched_client = self._get_patched_client()
+        with patch('nodeconductor.iaas.serializers.ZabbixDBClient', return_value=patched_client) as patched:
+            patched.items = {'cpu': {'key': 'cpu_key', 'table': 'cpu_table'}}
+            data = {'item': 'cpu', 'from': 1, 'to': 1415912629, 'datapoints': 3, 'aggregate': 'project'}
+            response = self.client.get(self.url, data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            self.assertEqual(patched_client.get_grouped_item_stats.call_count, 1)
+            instances_groups = patched_client.get_grouped_item_stats.call_args[0][0]
+            self.assertItemsEqual(instances_groups[self.project1.pk], self.instances1)
+            self.assertItemsEqual(instances_groups[self.project2.pk], self.instances2)
+
 
 class ResourceStatsTest(test.APITransactionTestCase):
 
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from nodeconductor.iaas import models
+from nodeconductor.iaas.tests import factories
+
+
+class BackfillSlaReportsTest(TestCase):
+
+    def test_reports_are_built_for_all_periods_of_sla_history(self):
+        instance = factories.InstanceFactory()
+        current_year = str(instance.created.year)
+        factories.InstanceSlaHistoryFactory(instance=instance, period=current_year, value=Decimal('99'))
+        factories.InstanceSlaHistoryFactory(instance=instance, period='2000', value=Decimal('98'))
+
+        call_command('backfillslareports', stdout=StringIO())
+
+        report = models.InstanceSlaReport.objects.get(instance=instance, period=current_year)
+        self.assertEqual(report.value, Decimal('99'))
+        # instance did not exist in 2000
+        self.assertFalse(models.InstanceSlaReport.objects.filter(period='2000').exists())
+
+    def test_reports_are_built_only_for_given_periods(self):
+        instance = factories.InstanceFactory()
+        factories.InstanceSlaHistoryFactory(instance=instance, period=str(instance.created.year))
+
+        call_command('backfillslareports', periods=['2000'], stdout=StringIO())
+
+        self.assertFalse(models.InstanceSlaReport.objects.exists())
@@ -1,5 +1,9 @@
+import datetime
+from decimal import Decimal
+
 from django.test import TestCase
 
+from nodeconductor.iaas import models
 from nodeconductor.iaas.tests import factories
 from nodeconductor.structure.tests import factories as structure_factories
 
@@ -43,3 +47,55 @@ class InstanceTest(TestCase):
         self.assertEqual(instance.instance_licenses.count(), 1)
         instance_license = instance.instance_licenses.all()[0]
         self.assertEqual(instance_license.template_license, template_license)
+
+
+class InstanceSlaReportTest(TestCase):
+
+    def setUp(self):
+        self.period = '%s-%s' % (datetime.date.today().year, datetime.date.today().month)
+        self.project_group = structure_factories.ProjectGroupFactory()
+        self.instance = factories.InstanceFactory()
+        self.instance.cloud_project_membership.project.project_groups.add(self.project_group)
+        self.history = factories.InstanceSlaHistoryFactory(
+            instance=self.instance, period=self.period, value=Decimal('99.5'))
+
+    def test_report_contains_sla_and_names_of_related_objects(self):
+        models.InstanceSlaReport.objects.refresh(self.period)
+
+        report = models.InstanceSlaReport.objects.get(instance=self.instance, period=self.period)
+        project = self.instance.cloud_project_membership.project
+        self.assertEqual(report.value, Decimal('99.5'))
+        self.assertEqual(report.history, self.history)
+        self.assertEqual(report.name, self.instance.name)
+        self.assertEqual(report.template_name, self.instance.template.name)
+        self.assertEqual(report.project_name, project.name)
+        self.assertEqual(report.customer_name, project.customer.name)
+        self.assertEqual(report.project_groups, [{'uuid': self.project_group.uuid.hex,
+                                                  'name': self.project_group.name}])
+
+    def test_instance_without_sla_history_is_reported_without_value(self):
+        instance = factories.InstanceFactory()
+
+        models.InstanceSlaReport.objects.refresh(self.period)
+
+        report = models.InstanceSlaReport.objects.get(instance=instance, period=self.period)
+        self.assertIsNone(report.value)
+        self.assertIsNone(report.history)
+
+    def test_instances_created_after_period_are_not_reported(self):
+        models.InstanceSlaReport.objects.refresh('2000')
+
+        self.assertFalse(models.InstanceSlaReport.objects.filter(period='2000').exists())
+
+    def test_refresh_replaces_stale_reports(self):
+        models.InstanceSlaReport.objects.refresh(self.period)
+        self.instance.name = 'renamed'
+        self.instance.save()
+        self.history.value = Decimal('90')
+        self.history.save()
+
+        models.InstanceSlaReport.objects.refresh(self.period)
+
+        report = models.InstanceSlaReport.objects.get(instance=self.instance, period=self.period)
+        self.assertEqual(report.name, 'renamed')
+        self.assertEqual(report.value, Decimal('90'))
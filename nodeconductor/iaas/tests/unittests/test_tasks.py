@@ -0,0 +1,42 @@
+from django.test import TestCase
+from mock import patch
+
+from nodeconductor.iaas import models
+from nodeconductor.iaas.tasks import zabbix
+from nodeconductor.iaas.tests import factories
+
+
+@patch('nodeconductor.iaas.tasks.zabbix.event_logger')
+@patch('nodeconductor.iaas.tasks.zabbix.ZabbixDBClient')
+class PullInstancesInstallationStateTest(TestCase):
+
+    def setUp(self):
+        self.ok_instance = factories.InstanceFactory(
+            type=models.Instance.Services.PAAS, state=models.Instance.States.ONLINE, installation_state='OK')
+        self.failed_instance = factories.InstanceFactory(
+            type=models.Instance.Services.PAAS, state=models.Instance.States.ONLINE, installation_state='FAIL')
+        self.erred_instance = factories.InstanceFactory(
+            type=models.Instance.Services.PAAS, state=models.Instance.States.ERRED, installation_state='OK')
+
+    def test_states_of_all_instances_are_pulled_at_once(self, db_client, event_logger):
+        get_states = db_client.return_value.get_application_installation_states
+        get_states.return_value = {self.ok_instance.pk: 'NOT OK', self.failed_instance.pk: 'OK'}
+
+        zabbix.pull_instances_installation_state()
+
+        self.assertEqual(get_states.call_count, 1)
+        self.assertItemsEqual(get_states.call_args[0][0], [self.ok_instance, self.failed_instance])
+        self.assertEqual(models.Instance.objects.get(pk=self.ok_instance.pk).installation_state, 'FAIL')
+        self.assertEqual(models.Instance.objects.get(pk=self.failed_instance.pk).installation_state, 'OK')
+
+        event_types = sorted(call[1]['event_type'] for call in event_logger.instance.info.call_args_list)
+        self.assertEqual(event_types, ['iaas_instance_application_became_available',
+                                       'iaas_instance_application_failed'])
+
+    def test_events_are_emitted_only_for_changed_instances(self, db_client, event_logger):
+        db_client.return_value.get_application_installation_states.return_value = {self.ok_instance.pk: 'OK'}
+
+        zabbix.pull_instances_installation_state()
+
+        self.assertFalse(event_logger.instance.info.called)
+        self.assertEqual(models.Instance.objects.get(pk=self.erred_instance.pk).installation_state, 'OK')
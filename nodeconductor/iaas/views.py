@@ -4,14 +4,13 @@ import functools
 import datetime
 import logging
 import time
-import calendar
+import collections
 
 from django.db import models as django_models
 from django.db import transaction, IntegrityError
 from django.db.models import Q
 from django.conf import settings as django_settings
 from django.http import Http404
-from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django_fsm import TransitionNotAllowed
 import django_filters
@@ -26,11 +25,13 @@ import reversion
 
 from nodeconductor.core import mixins as core_mixins
 from nodeconductor.core import models as core_models
+from nodeconductor.core import pagination as core_pagination
 from nodeconductor.core import exceptions as core_exceptions
 from nodeconductor.core import serializers as core_serializers
+from nodeconductor.core.cache import cache_response
 from nodeconductor.core.filters import DjangoMappingFilterBackend, CategoryFilter, SynchronizationStateFilter
 from nodeconductor.core.models import SynchronizationStates
-from nodeconductor.core.utils import sort_dict, datetime_to_timestamp
+from nodeconductor.core.utils import sort_dict, datetime_to_timestamp, get_grouped_counts
 from nodeconductor.iaas import models
 from nodeconductor.iaas import serializers
 from nodeconductor.iaas import tasks
@@ -253,7 +254,8 @@ class InstanceFilter(django_filters.FilterSet):
         }
 
 
-class InstanceViewSet(UpdateOnlyByPaidCustomerMixin,
+class InstanceViewSet(core_mixins.ReadReplicaMixin,
+                      UpdateOnlyByPaidCustomerMixin,
                       mixins.CreateModelMixin,
                       mixins.RetrieveModelMixin,
                       mixins.UpdateModelMixin,
@@ -272,6 +274,7 @@ class InstanceViewSet(UpdateOnlyByPaidCustomerMixin,
     filter_backends = (structure_filters.GenericRoleFilter, DjangoMappingFilterBackend)
     permission_classes = (permissions.IsAuthenticated, permissions.DjangoObjectPermissions)
     filter_class = InstanceFilter
+    pagination_class = core_pagination.OptionalCursorLinkHeaderPagination
 
     def get_queryset(self):
         queryset = super(InstanceViewSet, self).get_queryset()
@@ -715,6 +718,83 @@ class TemplateLicenseViewSet(viewsets.ModelViewSet):
 
 
 class ResourceFilter(django_filters.FilterSet):
+    project_group_name = django_filters.CharFilter(
+        name='project__project_groups__name',
+        distinct=True,
+        lookup_type='icontains',
+    )
+    project_name = django_filters.CharFilter(lookup_type='icontains')
+    project_uuid = django_filters.CharFilter()
+
+    # FIXME: deprecated, use project_group_name instead
+    project_groups = django_filters.CharFilter(
+        name='project__project_groups__name',
+        distinct=True,
+        lookup_type='icontains',
+    )
+
+    name = django_filters.CharFilter(lookup_type='icontains')
+
+    customer = django_filters.CharFilter(name='customer_uuid')
+
+    customer_name = django_filters.CharFilter(lookup_type='icontains')
+    customer_abbreviation = django_filters.CharFilter(lookup_type='icontains')
+    customer_native_name = django_filters.CharFilter(lookup_type='icontains')
+
+    template_name = django_filters.CharFilter(lookup_type='icontains')
+    agreed_sla = django_filters.NumberFilter()
+    actual_sla = django_filters.NumberFilter(name='value')
+
+    class Meta(object):
+        model = models.InstanceSlaReport
+        fields = [
+            'name',
+            'template_name',
+            'customer',
+            'customer_name',
+            'customer_native_name',
+            'customer_abbreviation',
+            'project_name',
+            'project_uuid',
+            'project_groups',
+            'agreed_sla',
+            'actual_sla',
+        ]
+        order_by = [
+            'name',
+            'template_name',
+            'customer_name',
+            'customer_abbreviation',
+            'customer_native_name',
+            'project_name',
+            'project__project_groups__name',
+            'agreed_sla',
+            'value',
+            # desc
+            '-name',
+            '-template_name',
+            '-customer_name',
+            '-customer_abbreviation',
+            '-customer_native_name',
+            '-project_name',
+            '-project__project_groups__name',
+            '-agreed_sla',
+            '-value',
+        ]
+        order_by_mapping = {
+            # Proper field naming
+            'project_group_name': 'project__project_groups__name',
+            'actual_sla': 'value',
+
+            # Backwards compatibility
+            'template__name': 'template_name',
+            'project__customer__name': 'customer_name',
+            'project__name': 'project_name',
+        }
+
+
+class LiveResourceFilter(django_filters.FilterSet):
+    """ Filter instances of period without SLA reports """
     project_group_name = django_filters.CharFilter(
         name='cloud_project_membership__project__project_groups__name',
         distinct=True,
@@ -821,23 +901,36 @@ class ResourceFilter(django_filters.FilterSet):
 
 # XXX: This view has to be rewritten or removed after haystack implementation
 class ResourceViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = models.Instance.objects.exclude(
-        state=models.Instance.States.DELETING,
-    )
+    """
+    Instances and their SLA during period, served from denormalized SLA reports.
+    Reports are rebuilt by SLA update tasks, use backfillslareports command to build
+    reports of past periods. Period without reports is served from current instances.
+    """
+    queryset = models.InstanceSlaReport.objects.all()
     serializer_class = ServiceSerializer
-    lookup_field = 'uuid'
+    lookup_url_kwarg = 'uuid'
     filter_backends = (structure_filters.GenericRoleFilter, DjangoMappingFilterBackend)
-    filter_class = ResourceFilter
+
+    @property
+    def lookup_field(self):
+        return 'uuid' if self._is_live() else 'instance_uuid'
+
+    @property
+    def filter_class(self):
+        return LiveResourceFilter if self._is_live() else ResourceFilter
 
     def get_queryset(self):
         period = self._get_period()
-        if '-' in period:
-            year, month = map(int, period.split('-'))
-        else:
-            year = int(period)
-            month = 12
-        last_day = calendar.monthrange(year, month)[1]
-        return super(ResourceViewSet, self).get_queryset().filter(created__lte=datetime.date(year, month, last_day))
+        if self._is_live():
+            return models.InstanceSlaReport.objects.get_instances(period).prefetch_related(
+                django_models.Prefetch('slas', models.InstanceSlaHistory.objects.filter(period=period),
+                                       to_attr='period_slas'))
+        return super(ResourceViewSet, self).get_queryset().filter(period=period)
+
+    def get_serializer_context(self):
+        context = super(ResourceViewSet, self).get_serializer_context()
+        context['period'] = self._get_period()
+        return context
 
     def _get_period(self):
         period = self.request.query_params.get('period')
@@ -846,22 +939,25 @@ class ResourceViewSet(viewsets.ReadOnlyModelViewSet):
             period = '%s-%s' % (today.year, today.month)
         return period
 
-    def get_serializer_context(self):
-        """
-        Extra context provided to the serializer class.
-        """
-        context = super(ResourceViewSet, self).get_serializer_context()
-        context['period'] = self._get_period()
-        return context
+    def _is_live(self):
+        if not hasattr(self, '_live'):
+            self._live = not models.InstanceSlaReport.objects.filter(period=self._get_period()).exists()
+        return self._live
 
     @detail_route()
     def events(self, request, uuid):
-        service = self.get_object()
-        period = self._get_period()
-        # TODO: this should use a generic resource model
-        history = get_object_or_404(models.InstanceSlaHistory, instance__uuid=service.uuid, period=period)
+        obj = self.get_object()
+        if isinstance(obj, models.Instance):
+            history_id = obj.period_slas[0].id if obj.period_slas else None
+        else:
+            history_id = obj.history_id
+        if history_id is None:
+            raise Http404()
 
-        history_events = list(history.events.all().order_by('-timestamp').values('timestamp', 'state'))
+        history_events = list(models.InstanceSlaHistoryEvents.objects
+                              .filter(instance_id=history_id)
+                              .order_by('-timestamp')
+                              .values('timestamp', 'state'))
 
         serializer = serializers.SlaHistoryEventSerializer(data=history_events,
                                                            many=True)
@@ -911,25 +1007,27 @@ class ResourceStatsView(views.APIView):
         return Response(sort_dict(stats), status=status.HTTP_200_OK)
 
 
-class CustomerStatsView(views.APIView):
+class CustomerStatsView(core_mixins.ReadReplicaMixin, views.APIView):
 
+    @cache_response(models=('structure.Customer', 'structure.Project', 'structure.ProjectGroup', 'iaas.Instance'))
     def get(self, request, format=None):
-        customer_statistics = []
         customer_queryset = filter_queryset_for_user(Customer.objects.all(), request.user)
+        projects_counts = get_grouped_counts(
+            filter_queryset_for_user(Project.objects.all(), request.user), 'customer')
+        project_groups_counts = get_grouped_counts(
+            filter_queryset_for_user(ProjectGroup.objects.all(), request.user), 'customer')
+        instances_counts = get_grouped_counts(
+            filter_queryset_for_user(models.Instance.objects.all(), request.user),
+            models.Instance.Permissions.customer_path)
+
+        customer_statistics = []
         for customer in customer_queryset:
-            projects_count = filter_queryset_for_user(
-                Project.objects.filter(customer=customer), request.user).count()
-            project_groups_count = filter_queryset_for_user(
-                ProjectGroup.objects.filter(customer=customer), request.user).count()
-            instances_count = filter_queryset_for_user(
-                models.Instance.objects.filter(cloud_project_membership__project__customer=customer),
-                request.user).count()
             customer_statistics.append({
                 'name': customer.name,
                 'abbreviation': customer.abbreviation,
-                'projects': projects_count,
-                'project_groups': project_groups_count,
-                'instances': instances_count,
+                'projects': projects_counts.get(customer.pk, 0),
+                'project_groups': project_groups_counts.get(customer.pk, 0),
+                'instances': instances_counts.get(customer.pk, 0),
             })
 
         return Response(customer_statistics, status=status.HTTP_200_OK)
@@ -947,17 +1045,23 @@ class UsageStatsView(views.APIView):
         model = self.aggregate_models[aggregate_model_name]['model']
         return filter_queryset_for_user(model.objects.all(), request.user)
 
-    def _get_aggregate_filter(self, aggregate_model_name, obj):
+    def _get_instances_by_aggregates(self, instances, aggregate_model_name, aggregate_objects):
+        """ Group instances by aggregate objects primary keys with two queries """
         path = self.aggregate_models[aggregate_model_name]['path']
-        return {path: obj}
+        instances_aggregates = models.Instance.objects.filter(
+            pk__in=instances.values('pk'), **{path + '__in': aggregate_objects}).values_list('pk', path)
+        instances_map = models.Instance.objects.in_bulk({instance_pk for instance_pk, _ in instances_aggregates})
+
+        instances_by_aggregates = collections.defaultdict(list)
+        for instance_pk, aggregate_pk in instances_aggregates:
+            instances_by_aggregates[aggregate_pk].append(instances_map[instance_pk])
+        return instances_by_aggregates
 
     def get(self, request, format=None):
         # XXX: hook. Should be removed after zabbix refactoring
         if not ZABBIX_ENABLED:
             raise Http404()
 
-        usage_stats = []
-
         aggregate_model_name = request.query_params.get('aggregate', 'customer')
         if aggregate_model_name not in self.aggregate_models.keys():
             return Response(
@@ -971,30 +1075,31 @@ class UsageStatsView(views.APIView):
         if 'uuid' in request.query_params:
             aggregate_queryset = aggregate_queryset.filter(uuid=request.query_params['uuid'])
 
+        aggregate_objects = list(aggregate_queryset)
+
         # This filters out the vm Instances to those that can be seen
-        # by currently logged in user. This is done within each aggregate root separately.
+        # by currently logged in user. Instances are narrowed down to aggregate roots.
         visible_instances = filter_queryset_for_user(models.Instance.objects.all(), request.user)
+        instances_by_aggregates = self._get_instances_by_aggregates(
+            visible_instances, aggregate_model_name, aggregate_objects)
+
+        stats = {}
+        if instances_by_aggregates:
+            hour = 60 * 60
+            data = {
+                'start_timestamp': request.query_params.get('from', int(time.time() - hour)),
+                'end_timestamp': request.query_params.get('to', int(time.time())),
+                'segments_count': request.query_params.get('datapoints', 6),
+                'item': request.query_params.get('item'),
+            }
 
-        for aggregate_object in aggregate_queryset:
-            # Narrow down the instance scope to aggregate root.
-            instances = visible_instances.filter(
-                **self._get_aggregate_filter(aggregate_model_name, aggregate_object))
-            if instances:
-                hour = 60 * 60
-                data = {
-                    'start_timestamp': request.query_params.get('from', int(time.time() - hour)),
-                    'end_timestamp': request.query_params.get('to', int(time.time())),
-                    'segments_count': request.query_params.get('datapoints', 6),
-                    'item': request.query_params.get('item'),
-                }
-
-                serializer = serializers.UsageStatsSerializer(data=data)
-                serializer.is_valid(raise_exception=True)
-
-                stats = serializer.get_stats(instances)
-                usage_stats.append({'name': aggregate_object.name, 'datapoints': stats})
-            else:
-                usage_stats.append({'name': aggregate_object.name, 'datapoints': []})
+            serializer = serializers.UsageStatsSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+
+            stats = serializer.get_grouped_stats(instances_by_aggregates)
+
+        usage_stats = [{'name': aggregate_object.name, 'datapoints': stats.get(aggregate_object.pk, [])}
+                       for aggregate_object in aggregate_objects]
         return Response(usage_stats, status=status.HTTP_200_OK)
 
 
@@ -1405,8 +1510,9 @@ class FloatingIPViewSet(viewsets.ReadOnlyModelViewSet):
     filter_class = FloatingIPFilter
 
 
-class QuotaStatsView(views.APIView):
+class QuotaStatsView(core_mixins.ReadReplicaMixin, views.APIView):
 
+    @cache_response(models=('iaas.CloudProjectMembership', 'quotas.Quota'))
     def get(self, request, format=None):
         serializer = serializers.StatsAggregateSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
@@ -1418,7 +1524,7 @@ class QuotaStatsView(views.APIView):
 
 
 # XXX: This view is deprecated. It has to be replaced with quotas history endpoints
-class QuotaTimelineStatsView(views.APIView):
+class QuotaTimelineStatsView(core_mixins.ReadReplicaMixin, views.APIView):
     """
     Count quota usage and limit history statistics
     """
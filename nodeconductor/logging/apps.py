@@ -17,3 +17,16 @@ class EventsConfig(AppConfig):
                 sender=model,
                 dispatch_uid='nodeconductor.logging.handlers.remove_{}_{}_related_alerts'.format(model.__name__, index),
             )
+
+            signals.post_save.connect(
+                handlers.invalidate_log_context,
+                sender=model,
+                dispatch_uid='nodeconductor.logging.handlers.invalidate_{}_{}_log_context'.format(model.__name__, index),
+            )
+
+            signals.post_delete.connect(
+                handlers.invalidate_log_context,
+                sender=model,
+                dispatch_uid='nodeconductor.logging.handlers.invalidate_{}_{}_deleted_log_context'.format(
+                    model.__name__, index),
+            )
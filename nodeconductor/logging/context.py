@@ -0,0 +1,163 @@
+"""
+Memoized capture of log contexts of objects.
+
+Emitting an event serializes log context of each related object, which follows
+foreign keys of its log fields, e.g. instance -> membership -> project -> customer.
+Within a request or a task serialized contexts are memoized per object,
+so several events of the same objects do not walk the chain again.
+Memoized context of an object is invalidated when the object or any object
+included into its context is saved or deleted.
+
+Foreign keys of log fields that are not loaded yet are fetched with one
+select_related query instead of a query per hop.
+"""
+from __future__ import unicode_literals
+
+import collections
+import threading
+from contextlib import contextmanager
+
+from django.db import models
+from django.db.models.fields import FieldDoesNotExist
+
+
+# Maximum length of foreign keys chains fetched with select_related
+MAX_DEPTH = 4
+
+
+class LogContextMemo(threading.local):
+    """ Serialized log contexts of objects of current request or task """
+
+    def __init__(self):
+        self.depth = 0
+        # {(model, pk, entity name): context}
+        self.contexts = {}
+        # {(model, pk, entity name): set of (model, pk) of objects included into context}
+        self.dependencies = {}
+        # {(model, pk): set of (model, pk, entity name) of contexts which include the object}
+        self.dependents = collections.defaultdict(set)
+        # objects included into contexts that are being serialized
+        self.stack = []
+
+    @property
+    def active(self):
+        return self.depth > 0
+
+    def clear(self):
+        self.contexts.clear()
+        self.dependencies.clear()
+        self.dependents.clear()
+
+    def invalidate(self, model, pk):
+        for key in self.dependents.pop((model, pk), ()):
+            self.contexts.pop(key, None)
+            self.dependencies.pop(key, None)
+
+
+_memo = LogContextMemo()
+
+# {model: foreign keys of log fields}
+_related_fields = {}
+
+
+def start_memo():
+    """ Start memoizing log contexts, nested calls are allowed (e.g. eager tasks within request) """
+    _memo.depth += 1
+
+
+def stop_memo():
+    _memo.depth = max(_memo.depth - 1, 0)
+    if not _memo.active:
+        _memo.clear()
+
+
+@contextmanager
+def memo():
+    start_memo()
+    try:
+        yield
+    finally:
+        stop_memo()
+
+
+def invalidate(instance):
+    if _memo.active and instance.pk is not None:
+        _memo.invalidate(instance._meta.concrete_model, instance.pk)
+
+
+def get_log_related_fields(model):
+    """ Return foreign keys of model log fields """
+    try:
+        return _related_fields[model]
+    except KeyError:
+        pass
+
+    fields = []
+    # log fields do not depend on state of the object
+    for name in model.get_log_fields(model.__new__(model)):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if isinstance(field, models.ForeignKey) and hasattr(field.rel.to, 'get_log_fields'):
+            fields.append(field)
+    _related_fields[model] = fields
+    return fields
+
+
+def get_log_related_paths(model, depth=MAX_DEPTH):
+    """ Return select_related paths of foreign keys of log fields of model and its related objects """
+    paths = []
+    if depth <= 0:
+        return paths
+    for field in get_log_related_fields(model):
+        paths.append(field.name)
+        paths.extend('%s__%s' % (field.name, path) for path in get_log_related_paths(field.rel.to, depth - 1))
+    return paths
+
+
+def load_log_related(entity):
+    """ Fetch related objects of entity log fields that are not loaded yet with one query """
+    model = entity._meta.concrete_model
+    missing = [field for field in get_log_related_fields(model)
+               if getattr(entity, field.attname) is not None and not hasattr(entity, field.get_cache_name())]
+    if not missing:
+        return
+
+    paths = [path for field in missing for path in [field.name] + [
+        '%s__%s' % (field.name, p) for p in get_log_related_paths(field.rel.to, MAX_DEPTH - 1)]]
+    try:
+        loaded = model._base_manager.select_related(*paths).get(pk=entity.pk)
+    except model.DoesNotExist:
+        return
+    for field in missing:
+        # related object is not taken from database if foreign key of entity has been changed
+        if getattr(loaded, field.attname) == getattr(entity, field.attname):
+            setattr(entity, field.get_cache_name(), getattr(loaded, field.name))
+
+
+def get_log_context(entity, entity_name):
+    """ Return log context of LoggableMixin entity, memoized within request or task """
+    if not isinstance(entity, models.Model) or entity.pk is None:
+        return entity._get_log_context(entity_name)
+
+    object_key = (entity._meta.concrete_model, entity.pk)
+    key = object_key + (entity_name,)
+    if _memo.active and key in _memo.contexts:
+        context, dependencies = _memo.contexts[key], _memo.dependencies[key]
+    else:
+        load_log_related(entity)
+        _memo.stack.append({object_key})
+        try:
+            context = entity._get_log_context(entity_name)
+        finally:
+            dependencies = _memo.stack.pop()
+        if _memo.active:
+            _memo.contexts[key] = context
+            _memo.dependencies[key] = dependencies
+            for dependency in dependencies:
+                _memo.dependents[dependency].add(key)
+
+    if _memo.stack:
+        _memo.stack[-1].update(dependencies)
+    return dict(context)
@@ -8,7 +8,10 @@ class ElasticsearchDummyClient(elasticsearch_client.ElasticsearchClient):
 
     # We do not need connection with real elasticsearch
     def __init__(self):
-        pass
+        self.should_terms = {}
+        self.must_terms = {}
+        self.must_not_terms = {}
+        self.search_text = ''
 
     def _get_dummy_events(self, user=None):
         if user:
@@ -62,6 +65,44 @@ class ElasticsearchDummyClient(elasticsearch_client.ElasticsearchClient):
             'total': len(filtered_events),
         }
 
+    def prepare_search_body(self, should_terms=None, must_terms=None, must_not_terms=None, search_text='',
+                            start=None, end=None):
+        self.should_terms = should_terms or {}
+        self.must_terms = must_terms or {}
+        self.must_not_terms = must_not_terms or {}
+        self.search_text = search_text
+
+    def _get_filtered_events(self):
+        def matches(event, field_name, values):
+            return str(event.get(field_name)) in map(str, values)
+
+        events = []
+        for event in DUMMY_EVENTS:
+            if self.should_terms and not any(
+                    matches(event, name, values) for name, values in self.should_terms.items()):
+                continue
+            if not all(matches(event, name, values) for name, values in self.must_terms.items()):
+                continue
+            if any(matches(event, name, values) for name, values in self.must_not_terms.items()):
+                continue
+            if self.search_text and not any(
+                    self.search_text in event.get(field, '') for field in self.SearchBody.FTS_FIELDS):
+                continue
+            events.append(event)
+        return events
+
+    def get_events(self, sort='-@timestamp', index='_all', from_=0, size=10, start=None, end=None):
+        reverse = sort.startswith('-')
+        sort = sort[1:] if reverse else sort
+        events = sorted(self._get_filtered_events(), key=lambda event: event.get(sort), reverse=reverse)
+        return {
+            'events': events[from_:from_ + size],
+            'total': len(events),
+        }
+
+    def get_count(self, index='_all'):
+        return len(self._get_filtered_events())
+
 
 DUMMY_EVENTS = [
     {
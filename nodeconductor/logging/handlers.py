@@ -1,10 +1,9 @@
-from django.contrib.contenttypes import models as ct_models
-
-from nodeconductor.logging import models
+from nodeconductor.logging import context, models
 
 
 def remove_related_alerts(sender, instance, **kwargs):
-    content_type = ct_models.ContentType.objects.get_for_model(instance)
-    for alert in models.Alert.objects.filter(
-            object_id=instance.id, content_type=content_type, closed__isnull=True).iterator():
-        alert.close()
+    models.Alert.objects.close_for_scopes([instance])
+
+
+def invalidate_log_context(sender, instance, **kwargs):
+    context.invalidate(instance)
@@ -13,6 +13,7 @@ from django.utils import six
 
 from nodeconductor.core.tasks import send_task
 from nodeconductor.logging import models
+from nodeconductor.logging.context import get_log_context
 from nodeconductor.logging.middleware import get_event_context
 
 
@@ -109,7 +110,7 @@ class BaseLogger(object):
                 continue
 
             if isinstance(entity, LoggableMixin):
-                context.update(entity._get_log_context(entity_name))
+                context.update(get_log_context(entity, entity_name))
             elif isinstance(entity, (int, float, basestring, dict, tuple, list, bool)):
                 context[entity_name] = entity
             elif entity is None:
@@ -252,6 +253,14 @@ class AlertLogger(BaseLogger):
 
         context = self.compile_context(**alert_context)
         msg = self.compile_message(message_template, context)
+        if models.Alert.objects.supports_upsert():
+            alert, created = models.Alert.objects.upsert(scope, alert_type, severity, msg, context)
+            if created:
+                logger.info(
+                    'Created new alert for scope %s (id: %s), with type %s',
+                    scope, scope.id, alert_type)
+            return alert, created
+
         content_type = ct_models.ContentType.objects.get_for_model(scope)
 
         try:
@@ -294,13 +303,7 @@ class AlertLogger(BaseLogger):
             return None, False
 
     def close(self, scope, alert_type):
-        try:
-            content_type = ct_models.ContentType.objects.get_for_model(scope)
-            alert = models.Alert.objects.get(
-                object_id=scope.id, content_type=content_type, alert_type=alert_type, closed__isnull=True)
-            alert.close()
-        except models.Alert.DoesNotExist:
-            pass
+        models.Alert.objects.close_for_scopes([scope], [alert_type])
 
 
 class LoggableMixin(object):
@@ -324,7 +327,7 @@ class LoggableMixin(object):
             if isinstance(value, uuid.UUID):
                 context[name] = value.hex
             elif isinstance(value, LoggableMixin):
-                context.update(value._get_log_context(field))
+                context.update(get_log_context(value, field))
             elif isinstance(value, datetime.date):
                 context[name] = value.isoformat()
             elif isinstance(value, decimal.Decimal):
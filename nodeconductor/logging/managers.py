@@ -1,6 +1,12 @@
+import collections
+import sqlite3
+import uuid
+
 from django.contrib.contenttypes import models as ct_models
-from django.db import models
+from django.db import connections, models, router
 from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils import timezone
 
 
 # XXX: This manager are very similar with quotas manager
@@ -30,3 +36,120 @@ class AlertManager(models.Manager):
             closed__isnull=True
         )
         return self.get_queryset().filter(**kwargs)
+
+    def get_open_for_scopes(self, scopes, alert_types=None):
+        """ Return open alerts of given types (any type if None) for scopes.
+            Scopes can be a queryset or a list of objects of different models.
+        """
+        if isinstance(scopes, QuerySet):
+            query = Q(content_type=ct_models.ContentType.objects.get_for_model(scopes.model),
+                      object_id__in=scopes.values('pk'))
+        else:
+            ids = collections.defaultdict(set)
+            for scope in scopes:
+                ids[ct_models.ContentType.objects.get_for_model(scope).id].add(scope.pk)
+            if not ids:
+                return self.none()
+            query = Q()
+            for content_type_id, object_ids in ids.items():
+                query |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+
+        queryset = self.filter(query, closed__isnull=True)
+        if alert_types is not None:
+            queryset = queryset.filter(alert_type__in=alert_types)
+        return queryset
+
+    def close_for_scopes(self, scopes, alert_types=None):
+        """ Close open alerts of given types (any type if None) for scopes with one query """
+        return self.bulk_close(self.get_open_for_scopes(scopes, alert_types))
+
+    def bulk_close(self, queryset):
+        """ Close open alerts of queryset with one UPDATE query, return number of closed alerts """
+        from nodeconductor.core.cache import response_cache
+
+        now = timezone.now()
+        # Closed alerts need unique is_closed values only among alerts of the same scope and type,
+        # each of them has at most one open alert, so one value is enough for all of them.
+        closed = queryset.filter(closed__isnull=True).update(closed=now, modified=now, is_closed=uuid.uuid4().hex)
+        if closed:
+            # update does not send post_save signals
+            response_cache.invalidate_model(self.model)
+        return closed
+
+    def get_orphaned(self):
+        """ Return open alerts whose scopes do not exist anymore.
+            Alerts of each scope model are matched with the model table by NOT IN subquery.
+        """
+        open_alerts = self.filter(closed__isnull=True)
+        query = Q(content_type__isnull=True) | Q(object_id__isnull=True)
+        content_type_ids = open_alerts.values_list('content_type', flat=True).distinct()
+        for content_type in ct_models.ContentType.objects.filter(id__in=content_type_ids):
+            model = content_type.model_class()
+            if model is None:
+                query |= Q(content_type=content_type)
+            else:
+                # base manager is used by scope generic foreign key too
+                query |= Q(content_type=content_type) & ~Q(object_id__in=model._base_manager.values('pk'))
+        return open_alerts.filter(query)
+
+    def supports_upsert(self):
+        connection = connections[router.db_for_write(self.model)]
+        if connection.vendor == 'sqlite':
+            # upsert is supported since 3.24, RETURNING since 3.35
+            return sqlite3.sqlite_version_info >= (3, 35)
+        return connection.vendor in ('postgresql', 'mysql')
+
+    def upsert(self, scope, alert_type, severity, message, context=None):
+        """ Create open alert of given type for scope or update severity and message of existing one
+            with one INSERT ... ON CONFLICT (ON DUPLICATE KEY on MySQL) statement.
+            Alert modification time is changed only if severity or message is changed.
+            Return (alert, created).
+        """
+        # statement writes, so it is executed on the database for writes even within read_replica block
+        using = router.db_for_write(self.model)
+        connection = connections[using]
+        alert = self.model(scope=scope, alert_type=alert_type, severity=severity, message=message,
+                           context=context or {})
+        fields = [f for f in alert._meta.local_concrete_fields if not isinstance(f, models.AutoField)]
+        params = [f.get_db_prep_save(f.pre_save(alert, True), connection=connection) for f in fields]
+
+        qn = connection.ops.quote_name
+        table = qn(alert._meta.db_table)
+        columns = ', '.join(qn(f.column) for f in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        modified, severity_column, message_column = qn('modified'), qn('severity'), qn('message')
+
+        if connection.vendor == 'mysql':
+            # assignments are evaluated from left to right, so modified goes first;
+            # LAST_INSERT_ID(id) makes id of updated row available as id of inserted one
+            sql = (
+                'INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE '
+                '{pk} = LAST_INSERT_ID({pk}), '
+                '{modified} = IF({severity} = VALUES({severity}) AND {message} = VALUES({message}), '
+                '{modified}, VALUES({modified})), '
+                '{severity} = VALUES({severity}), {message} = VALUES({message})')
+        else:
+            unique_columns = ', '.join(qn(alert._meta.get_field(name).column)
+                                       for name in ('content_type', 'object_id', 'alert_type', 'is_closed'))
+            sql = (
+                'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+                'ON CONFLICT ({unique_columns}) DO UPDATE SET '
+                '{modified} = CASE WHEN {table}.{severity} = EXCLUDED.{severity} '
+                'AND {table}.{message} = EXCLUDED.{message} '
+                'THEN {table}.{modified} ELSE EXCLUDED.{modified} END, '
+                '{severity} = EXCLUDED.{severity}, {message} = EXCLUDED.{message} '
+                'RETURNING {returning}')
+            sql = sql.replace('{unique_columns}', unique_columns).replace(
+                '{returning}', ', '.join(qn(f.column) for f in alert._meta.concrete_fields))
+        sql = sql.format(table=table, columns=columns, placeholders=placeholders, pk=qn(alert._meta.pk.column),
+                         modified=modified, severity=severity_column, message=message_column)
+
+        if connection.vendor == 'mysql':
+            cursor = connection.cursor()
+            cursor.execute(sql, params)
+            result = self.db_manager(using).get(pk=cursor.lastrowid)
+        else:
+            result = list(self.db_manager(using).raw(sql, params))[0]
+        # uuid of existing alert is not updated, number of affected rows is ambiguous
+        # on MySQL, as Django connects with CLIENT.FOUND_ROWS flag
+        return result, result.uuid == alert.uuid
@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 
 import threading
 
+from nodeconductor.logging import context as log_context
+
 _locals = threading.local()
 
 
@@ -20,7 +22,7 @@ def reset_event_context():
 
 def set_current_user(user):
     context = get_event_context() or {}
-    context.update(user._get_log_context('user'))
+    context.update(log_context.get_log_context(user, 'user'))
     set_event_context(context)
 
 
@@ -36,14 +38,16 @@ def get_ip_address(request):
 
 class CaptureEventContextMiddleware(object):
     def process_request(self, request):
+        log_context.start_memo()
         context = {'ip_address': get_ip_address(request)}
 
         user = getattr(request, 'user', None)
         if user and not user.is_anonymous():
-            context.update(user._get_log_context('user'))
+            context.update(log_context.get_log_context(user, 'user'))
 
         set_event_context(context)
 
     def process_response(self, request, response):
         reset_event_context()
+        log_context.stop_memo()
         return response
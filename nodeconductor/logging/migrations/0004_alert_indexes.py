@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from nodeconductor.core.indexes import CreateIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logging', '0003_add_alert_unique_together_constraint'),
+    ]
+
+    operations = [
+        # open alerts of scopes filtered by severity
+        CreateIndex(
+            name='logging_alert_open_scope_idx',
+            model_name='alert',
+            columns=['content_type_id', 'object_id', 'severity'],
+            condition='closed IS NULL',
+        ),
+        # open alerts ordered by creation time
+        CreateIndex(
+            name='logging_alert_open_created_idx',
+            model_name='alert',
+            columns=['created'],
+            condition='closed IS NULL',
+        ),
+        CreateIndex(
+            name='logging_alert_created_idx',
+            model_name='alert',
+            columns=['created'],
+        ),
+    ]
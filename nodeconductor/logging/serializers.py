@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from nodeconductor.core.serializers import GenericRelatedField
+from nodeconductor.core.serializers import GenericRelatedField, GenericRelatedListSerializer
 from nodeconductor.core.fields import MappedChoiceField, JsonField
 from nodeconductor.logging import models, utils, log
 
@@ -20,6 +20,7 @@ class AlertSerializer(serializers.HyperlinkedModelSerializer):
             'created', 'closed', 'context', 'acknowledged',
         )
         read_only_fields = ('uuid', 'created', 'closed')
+        list_serializer_class = GenericRelatedListSerializer
         extra_kwargs = {
             'url': {'lookup_field': 'uuid'},
         }
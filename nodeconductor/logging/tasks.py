@@ -28,7 +28,8 @@ def check_event(event, hook):
 
 @shared_task(name='nodeconductor.logging.close_alerts_without_scope')
 def close_alerts_without_scope():
-    for alert in Alert.objects.filter(closed__isnull=True).iterator():
-        if alert.scope is None:
-            logger.error('Alert without scope was not closed. Alert id: %s.', alert.id)
-            alert.close()
+    orphaned_ids = list(Alert.objects.get_orphaned().values_list('id', flat=True))
+    if orphaned_ids:
+        logger.error('Alerts without scope were not closed. Alerts ids: %s.',
+                     ', '.join(str(alert_id) for alert_id in orphaned_ids))
+        Alert.objects.bulk_close(Alert.objects.filter(id__in=orphaned_ids))
@@ -1,14 +1,18 @@
+import base64
 from datetime import timedelta
+import json
 import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 from rest_framework import test, status
 
-from nodeconductor.core import utils as core_utils
-from nodeconductor.logging import log, models
+from nodeconductor.core import replicas, utils as core_utils
+from nodeconductor.logging import log, models, tasks
 from nodeconductor.logging.tests import factories
 # Dependency from `structure` application exists only in tests
 from nodeconductor.structure import models as structure_models
@@ -135,6 +139,74 @@ class AlertsListTest(test.APITransactionTestCase):
         self.assertNotIn(alert2.uuid.hex, [a['uuid'] for a in response.data])
 
 
+class AlertsCursorPaginationTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        self.customer = structure_factories.CustomerFactory()
+        self.owner = structure_factories.UserFactory()
+        self.customer.add_user(self.owner, structure_models.CustomerRole.OWNER)
+        project = structure_factories.ProjectFactory(customer=self.customer)
+        self.alerts = [factories.AlertFactory(scope=project, severity=severity, alert_type='test_alert_%s' % index)
+                       for index, severity in enumerate((10, 30, 20, 30, 10))]
+        self.client.force_authenticate(self.owner)
+
+    def get_link(self, response, rel):
+        for link in response['Link'].split(', '):
+            url, link_rel = link.split('; ')
+            if link_rel == 'rel="%s"' % rel:
+                return url[1:-1]
+
+    def get_all_pages(self, params):
+        response = self.client.get(factories.AlertFactory.get_list_url(), params)
+        pages = [response]
+        while self.get_link(response, 'next'):
+            response = self.client.get(self.get_link(response, 'next'))
+            pages.append(response)
+        return pages
+
+    def test_alerts_are_paginated_by_cursor_in_order_of_the_list(self):
+        pages = self.get_all_pages({'cursor': '', 'page_size': 2})
+
+        self.assertEqual([len(page.data) for page in pages], [2, 2, 1])
+        self.assertEqual(int(pages[0]['X-Result-Count']), len(self.alerts))
+        # alert filter orders list by the first of Meta.order_by fields by default
+        expected = [alert.uuid.hex for alert in sorted(self.alerts, key=lambda a: (a.severity, a.pk))]
+        self.assertEqual([a['uuid'] for page in pages for a in page.data], expected)
+
+    def test_cursor_pagination_respects_ordering_parameter(self):
+        pages = self.get_all_pages({'cursor': '', 'page_size': 2, 'o': 'severity'})
+
+        expected = [alert.uuid.hex for alert in sorted(self.alerts, key=lambda a: (a.severity, a.pk))]
+        self.assertEqual([a['uuid'] for page in pages for a in page.data], expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first, second = self.get_all_pages({'cursor': '', 'page_size': 2, 'o': '-severity'})[:2]
+
+        response = self.client.get(self.get_link(second, 'prev'))
+
+        self.assertEqual(response.data, first.data)
+        self.assertIsNone(self.get_link(response, 'prev'))
+
+    def test_garbage_cursor_is_not_found(self):
+        response = self.client.get(factories.AlertFactory.get_list_url(), {'cursor': 'garbage'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_tampered_position_is_not_found(self):
+        query = json.dumps({'o': 'severity', 'p': 'not a number', 'k': '1'})
+        cursor = base64.urlsafe_b64encode(query.encode('utf-8')).decode('ascii')
+
+        response = self.client.get(factories.AlertFactory.get_list_url(), {'cursor': cursor})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_is_used_without_cursor(self):
+        response = self.client.get(factories.AlertFactory.get_list_url(), {'page': 2, 'page_size': 2})
+
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="last"', response['Link'])
+
+
 class AlertsCreateUpdateDeleteTest(test.APITransactionTestCase):
 
     def setUp(self):
@@ -273,7 +345,80 @@ class AlertUniquenessTest(test.APITransactionTestCase):
 
     def test_if_race_conditions_detected_alert_skipped(self):
         with mock.patch('nodeconductor.logging.log.models') as mock_models:
+            mock_models.Alert.objects.supports_upsert.return_value = False
             mock_models.Alert.objects.create.side_effect = IntegrityError
 
             alert, created = self.log_alert()
             self.assertEqual(created, False)
+
+
+class AlertStoreTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        self.project = structure_factories.ProjectFactory()
+
+    def count_alert_queries(self, context):
+        return len([query for query in context.captured_queries if '"logging_alert"' in query['sql']])
+
+    def test_existing_alert_is_updated_with_one_query(self):
+        alert, _ = models.Alert.objects.upsert(self.project, 'test_alert', models.Alert.SeverityChoices.INFO, 'Old')
+
+        with CaptureQueriesContext(connection) as context:
+            updated_alert, created = models.Alert.objects.upsert(
+                self.project, 'test_alert', models.Alert.SeverityChoices.ERROR, 'New')
+
+        self.assertEqual(self.count_alert_queries(context), 1)
+        self.assertFalse(created)
+        self.assertEqual(updated_alert.pk, alert.pk)
+        reread_alert = models.Alert.objects.get(pk=alert.pk)
+        self.assertEqual(reread_alert.severity, models.Alert.SeverityChoices.ERROR)
+        self.assertEqual(reread_alert.message, 'New')
+        self.assertGreater(reread_alert.modified, alert.modified)
+
+    def test_alert_is_upserted_on_primary_database_within_read_replica_block(self):
+        with override_settings(NODECONDUCTOR=dict(settings.NODECONDUCTOR, READ_REPLICAS=['replica'])), \
+                replicas.read_replica():
+            alert, created = models.Alert.objects.upsert(
+                self.project, 'test_alert', models.Alert.SeverityChoices.INFO, 'Msg')
+
+        self.assertTrue(created)
+        self.assertTrue(models.Alert.objects.filter(pk=alert.pk).exists())
+
+    def test_modification_time_is_kept_if_alert_is_not_changed(self):
+        alert, _ = models.Alert.objects.upsert(self.project, 'test_alert', models.Alert.SeverityChoices.INFO, 'Msg')
+
+        models.Alert.objects.upsert(self.project, 'test_alert', models.Alert.SeverityChoices.INFO, 'Msg')
+
+        self.assertEqual(models.Alert.objects.get(pk=alert.pk).modified, alert.modified)
+
+    def test_alerts_of_scopes_are_closed_with_one_query(self):
+        other_project = structure_factories.ProjectFactory()
+        customer = self.project.customer
+        alerts = [factories.AlertFactory(scope=scope, alert_type=alert_type)
+                  for scope in (self.project, other_project, customer)
+                  for alert_type in ('first_type', 'second_type')]
+
+        with CaptureQueriesContext(connection) as context:
+            closed = models.Alert.objects.close_for_scopes([self.project, other_project], ['first_type'])
+
+        self.assertEqual(self.count_alert_queries(context), 1)
+        self.assertEqual(closed, 2)
+        open_alerts = models.Alert.objects.filter(closed__isnull=True)
+        self.assertItemsEqual(open_alerts, [a for a in alerts if a.scope == customer or a.alert_type == 'second_type'])
+
+        # alert of the same type can be opened again and closed again
+        alert, created = models.Alert.objects.upsert(self.project, 'first_type', models.Alert.SeverityChoices.INFO, 'm')
+        self.assertTrue(created)
+        self.assertEqual(models.Alert.objects.close_for_scopes(structure_models.Project.objects.all()), 3)
+
+    def test_alerts_without_scope_are_closed(self):
+        alert = factories.AlertFactory(scope=self.project)
+        orphaned_alert = factories.AlertFactory(scope=structure_factories.ProjectFactory())
+        models.Alert.objects.filter(pk=orphaned_alert.pk).update(object_id=self.project.pk + 100)
+
+        self.assertEqual(list(models.Alert.objects.get_orphaned()), [orphaned_alert])
+
+        tasks.close_alerts_without_scope()
+
+        self.assertIsNone(models.Alert.objects.get(pk=alert.pk).closed)
+        self.assertIsNotNone(models.Alert.objects.get(pk=orphaned_alert.pk).closed)
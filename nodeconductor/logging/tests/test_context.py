@@ -0,0 +1,74 @@
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from nodeconductor.iaas import models as iaas_models
+from nodeconductor.iaas.tests import factories as iaas_factories
+from nodeconductor.logging import context
+
+
+class LogContextTest(TestCase):
+
+    def setUp(self):
+        self.instance = iaas_factories.InstanceFactory()
+        self.project = self.instance.cloud_project_membership.project
+
+    def get_instance(self):
+        # instance is loaded without related objects, as in tasks
+        return iaas_models.Instance.objects.get(pk=self.instance.pk)
+
+    def get_context(self, instance):
+        with CaptureQueriesContext(connection) as queries:
+            log_context = context.get_log_context(instance, 'instance')
+        return log_context, len(queries)
+
+    def test_related_paths_are_collected_from_log_fields(self):
+        paths = context.get_log_related_paths(iaas_models.Instance)
+
+        self.assertIn('cloud_project_membership__project__customer', paths)
+        self.assertIn('cloud_project_membership__cloud', paths)
+        self.assertIn('template', paths)
+
+    def test_related_objects_are_fetched_with_one_query(self):
+        instance = self.get_instance()
+        with CaptureQueriesContext(connection) as queries:
+            context.load_log_related(instance)
+            project_name = instance.cloud_project_membership.project.customer.name
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(project_name, self.project.customer.name)
+
+    def test_context_is_memoized_within_memo_block(self):
+        with context.memo():
+            first_context, _ = self.get_context(self.get_instance())
+            second_context, queries = self.get_context(self.get_instance())
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(first_context, second_context)
+        self.assertEqual(first_context['project_name'], self.project.name)
+
+    def test_context_is_not_memoized_outside_memo_block(self):
+        self.get_context(self.get_instance())
+        _, queries = self.get_context(self.get_instance())
+
+        self.assertGreater(queries, 0)
+
+    def test_context_is_invalidated_when_related_object_is_saved(self):
+        with context.memo():
+            self.get_context(self.get_instance())
+            self.project.name = 'New project name'
+            self.project.save()
+            log_context, _ = self.get_context(self.get_instance())
+
+        self.assertEqual(log_context['project_name'], 'New project name')
+
+    def test_changed_foreign_key_is_not_replaced_with_stored_object(self):
+        instance = self.get_instance()
+        template = iaas_factories.TemplateFactory()
+        instance.template = template
+
+        log_context, _ = self.get_context(instance)
+
+        self.assertEqual(log_context['template_uuid'], template.uuid.hex)
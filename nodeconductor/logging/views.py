@@ -4,7 +4,7 @@ from django.core.exceptions import PermissionDenied
 from django.db.models import Count
 from rest_framework import response, viewsets, permissions, status, decorators, mixins
 
-from nodeconductor.core import serializers as core_serializers, filters as core_filters
+from nodeconductor.core import serializers as core_serializers, filters as core_filters, pagination as core_pagination
 from nodeconductor.core.views import BaseSummaryView
 from nodeconductor.logging import elasticsearch_client, models, serializers, filters
 
@@ -67,6 +67,7 @@ class AlertViewSet(mixins.CreateModelMixin,
         filters.AlertScopeFilterBackend,
     )
     filter_class = filters.AlertFilter
+    pagination_class = core_pagination.OptionalCursorLinkHeaderPagination
 
     def get_queryset(self):
         return models.Alert.objects.filtered_for_user(self.request.user).order_by('-created')
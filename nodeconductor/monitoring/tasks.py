@@ -3,9 +3,8 @@ from decimal import Decimal
 import logging
 import datetime
 
-from celery import shared_task
-
-from nodeconductor.iaas.models import Instance, InstanceSlaHistory
+from nodeconductor.core.tasks import coalesced_task
+from nodeconductor.iaas.models import Instance, InstanceSlaHistory, InstanceSlaReport
 from nodeconductor.monitoring.zabbix.api_client import ZabbixApiClient
 from nodeconductor.monitoring.zabbix.errors import ZabbixError
 
@@ -20,7 +19,7 @@ def add_months(source_date, months):
     return datetime.datetime.strptime('%s/%s/%s' % (day, month, year), '%d/%m/%Y')
 
 
-@shared_task
+@coalesced_task
 def update_instance_sla(sla_type):
     if sla_type not in ('yearly', 'monthly'):
         logger.error('Requested unknown SLA type: %s' % sla_type)
@@ -38,6 +37,14 @@ def update_instance_sla(sla_type):
 
     end_time = int(dt.strftime("%s"))
 
+    try:
+        _pull_instance_slas(sla_type, period, start_time, end_time)
+    finally:
+        # reports include instances without SLA, so they are refreshed even if Zabbix is not available
+        InstanceSlaReport.objects.refresh(period)
+
+
+def _pull_instance_slas(sla_type, period, start_time, end_time):
     instances = Instance.objects.exclude(state__in=[
         Instance.States.DELETING,
         Instance.States.PROVISIONING_SCHEDULED,
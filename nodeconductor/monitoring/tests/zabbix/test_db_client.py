@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 import unittest
 
 from django.db import DatabaseError
-from mock import Mock
+from mock import Mock, patch
 
 from nodeconductor.monitoring.zabbix.db_client import ZabbixDBClient
 
@@ -17,3 +17,69 @@ class ZabbixPublicApiTest(unittest.TestCase):
         self.client.zabbix_api_client.get_host_ids = Mock(return_value=[])
         self.client.get_item_time_and_value_list = Mock(side_effect=DatabaseError)
         self.assertEqual(self.client.get_item_stats([], 'cpu', 1, 10, 2), [])
+
+    def test_get_grouped_item_stats_splits_records_by_groups(self):
+        instances = [Mock(backend_id='first'), Mock(backend_id='second')]
+        self.client.zabbix_api_client.get_host_ids_map = Mock(return_value={'first': '1', 'second': '2'})
+        self.client.get_hosts_records = Mock(return_value=[
+            ('history', '2', 9, 20),
+            ('history', '1', 8, 10),
+        ])
+        self.client._get_records_intervals = Mock(return_value={'history': 60, 'trends': 60, 'trends_start': -1})
+
+        stats = self.client.get_grouped_item_stats({'a': instances[:1], 'b': instances[1:]}, 'cpu', 0, 10, 1)
+
+        self.assertEqual(stats['a'], [{'from': 0, 'to': 10, 'value': 10}])
+        self.assertEqual(stats['b'], [{'from': 0, 'to': 10, 'value': 20}])
+        self.assertEqual(self.client.get_hosts_records.call_count, 1)
+
+    def test_get_grouped_item_stats_adds_records_of_shared_host_to_all_its_groups(self):
+        instances = [Mock(backend_id='first'), Mock(backend_id='second')]
+        self.client.zabbix_api_client.get_host_ids_map = Mock(return_value={'first': '1', 'second': '2'})
+        self.client.get_hosts_records = Mock(return_value=iter([
+            ('history', '2', 9, 20),
+            ('history', '1', 8, 10),
+        ]))
+        self.client._get_records_intervals = Mock(return_value={'history': 60, 'trends': 60, 'trends_start': -1})
+
+        stats = self.client.get_grouped_item_stats({'a': instances, 'b': instances[:1], 'c': []}, 'cpu', 0, 10, 1)
+
+        self.assertEqual(stats['a'], [{'from': 0, 'to': 10, 'value': 20}])
+        self.assertEqual(stats['b'], [{'from': 0, 'to': 10, 'value': 10}])
+        self.assertEqual(stats['c'], [])
+
+    @patch('nodeconductor.monitoring.zabbix.db_client.connections')
+    def test_get_grouped_item_stats_sums_storage_of_group_hosts_with_single_query(self, connections):
+        instances = [Mock(backend_id='first'), Mock(backend_id='second')]
+        self.client.zabbix_api_client.get_host_ids_map = Mock(return_value={'first': '1', 'second': '2'})
+        cursor = connections['zabbix'].cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [(1, 60, 100), (2, 60, 50), (1, 120, 110), None]
+
+        stats = self.client.get_grouped_item_stats({'a': instances, 'b': instances[1:]}, 'storage', 0, 180, 1)
+
+        self.assertEqual(stats['a'], [{'from': 0, 'to': 180, 'value': 110}])
+        self.assertEqual(stats['b'], [{'from': 0, 'to': 180, 'value': 50}])
+        self.assertEqual(cursor.execute.call_count, 1)
+
+    def test_get_grouped_item_stats_returns_empty_lists_if_hosts_are_not_found(self):
+        self.client.zabbix_api_client.get_host_ids_map = Mock(return_value={})
+        self.client.get_hosts_records = Mock()
+
+        stats = self.client.get_grouped_item_stats({'a': [Mock(backend_id='first')]}, 'cpu', 0, 10, 1)
+
+        self.assertEqual(stats, {'a': []})
+        self.assertFalse(self.client.get_hosts_records.called)
+
+    def test_get_application_installation_states_uses_single_query_for_all_hosts(self):
+        instances = [Mock(pk=1, type='PaaS', backend_id='first'),
+                     Mock(pk=2, type='PaaS', backend_id='second'),
+                     Mock(pk=3, type='PaaS', backend_id='third'),
+                     Mock(pk=4, type='IaaS', backend_id='fourth')]
+        self.client.zabbix_api_client.get_host_ids_map = Mock(return_value={'first': '1', 'second': '2'})
+        self.client.zabbix_api_client._settings = {}
+        self.client.execute_query = Mock(return_value=[(1, 1), (2, 0)])
+
+        states = self.client.get_application_installation_states(instances)
+
+        self.assertEqual(states, {1: 'OK', 2: 'NOT OK', 3: 'NO DATA', 4: 'OK'})
+        self.assertEqual(self.client.execute_query.call_count, 1)
@@ -0,0 +1,130 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from mock import Mock, patch
+from pyzabbix import ZabbixAPIException
+
+from nodeconductor.monitoring.zabbix.api_client import ZabbixApiClient
+from nodeconductor.monitoring.zabbix.errors import ZabbixError
+from nodeconductor.monitoring.zabbix.inventory import ZabbixInventory
+
+
+def get_instance(pk, application_type=None):
+    instance = Mock(pk=pk, uuid='uuid%s' % pk, backend_id='backend%s' % pk)
+    instance.name = 'instance%s' % pk
+    instance.template.application_type = application_type
+    return instance
+
+
+@patch('nodeconductor.monitoring.zabbix.inventory.event_logger')
+class ZabbixInventoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = ZabbixApiClient()
+        self.api = Mock()
+        self.client.get_zabbix_api = Mock(return_value=self.api)
+        self.inventory = ZabbixInventory(self.client)
+
+        self.synced = get_instance(1)
+        self.renamed = get_instance(2)
+        self.new = get_instance(3)
+
+        self.api.host.get.side_effect = self.get_hosts
+        self.api.service.get.return_value = [
+            {'serviceid': '1', 'name': 'Availability of backend1', 'triggerid': '11'},
+            {'serviceid': '2', 'name': 'Availability of backend2', 'triggerid': '12'},
+        ]
+        self.api.trigger.get.return_value = [{'triggerid': '13', 'hosts': [{'hostid': '3'}]}]
+
+    def get_hosts(self, filter, **kwargs):
+        hosts = [
+            {'hostid': '1', 'host': 'backend1', 'name': self.client.get_host_visible_name(self.synced)},
+            {'hostid': '2', 'host': 'backend2', 'name': 'old name'},
+        ]
+        if self.api.host.create.called:
+            hosts.append({'hostid': '3', 'host': 'backend3', 'name': self.client.get_host_visible_name(self.new)})
+        return [host for host in hosts if host['host'] in filter['host']]
+
+    def test_diff_contains_only_missing_and_outdated_hosts_and_services(self, event_logger):
+        diff = self.inventory.diff([self.synced, self.renamed, self.new])
+
+        self.assertEqual(diff.missing_hosts, [self.new])
+        self.assertEqual(diff.outdated_hosts, [(self.renamed, '2')])
+        self.assertEqual(diff.missing_services, [self.new])
+
+    def test_dry_run_does_not_change_zabbix(self, event_logger):
+        self.inventory.reconcile([self.synced, self.renamed, self.new], dry_run=True)
+
+        self.assertFalse(self.api.host.create.called)
+        self.assertFalse(self.api.host.update.called)
+        self.assertFalse(self.api.service.create.called)
+        self.assertFalse(event_logger.zabbix.info.called)
+
+    def test_synced_instances_are_checked_with_one_call_per_object_type(self, event_logger):
+        self.inventory.reconcile([self.synced])
+
+        self.assertEqual(self.api.host.get.call_count, 1)
+        self.assertEqual(self.api.service.get.call_count, 1)
+        self.assertFalse(self.api.host.create.called)
+        self.assertFalse(self.api.service.create.called)
+
+    def test_missing_hosts_and_services_are_created_with_array_calls(self, event_logger):
+        another_new = get_instance(4)
+        self.inventory.reconcile([self.synced, self.renamed, self.new, another_new])
+
+        hosts = self.api.host.create.call_args[0][0]
+        self.assertEqual([host['host'] for host in hosts], ['backend3', 'backend4'])
+        self.api.host.update.assert_called_once_with(
+            [{'hostid': '2', 'name': self.client.get_host_visible_name(self.renamed)}])
+
+        # host of another new instance does not have SLA trigger
+        services = self.api.service.create.call_args[0][0]
+        self.assertEqual([(s['name'], s['triggerid']) for s in services], [('Availability of backend3', '13')])
+        event_logger.zabbix.info.assert_called_once_with(
+            'Added instance {instance_name} to Zabbix',
+            event_type='zabbix_host_creation_succeeded', event_context={'instance': self.new})
+        event_logger.zabbix.error.assert_called_once_with(
+            'Unable to add instance {instance_name} to Zabbix',
+            event_type='zabbix_host_creation_failed', event_context={'instance': another_new})
+
+    def test_application_template_is_linked_to_host(self, event_logger):
+        self.client._settings = dict(self.client._settings, **{'wordpress-templateid': '20'})
+        instance = get_instance(5, application_type=Mock(slug='WordPress'))
+
+        parameters = ZabbixInventory(self.client).get_host_parameters(instance)
+
+        self.assertEqual(parameters['templates'],
+                         [{'templateid': self.client._settings['templateid']}, {'templateid': '20'}])
+
+    def test_services_are_not_created_if_hosts_creation_fails(self, event_logger):
+        self.api.host.create.side_effect = ZabbixAPIException
+
+        self.inventory.reconcile([self.new])
+
+        self.assertFalse(self.api.service.create.called)
+        self.assertTrue(event_logger.zabbix.error.called)
+
+    def test_hosts_are_fetched_by_names_of_instances_from_all_groups(self, event_logger):
+        self.inventory.diff([self.synced, self.new])
+
+        self.api.host.get.assert_called_once_with(
+            filter={'host': ['backend1', 'backend3']}, output=['hostid', 'host', 'name'])
+
+    def test_hosts_of_failed_chunk_are_created_one_by_one(self, event_logger):
+        another_new = get_instance(4)
+
+        def create_host(parameters):
+            if isinstance(parameters, list) or parameters['host'] == 'backend4':
+                raise ZabbixAPIException('Host already exists')
+        self.api.host.create.side_effect = create_host
+
+        failed = self.inventory.create_hosts([self.new, another_new])
+
+        self.assertEqual(failed, [another_new])
+        self.assertEqual(self.api.host.create.call_count, 3)
+
+    def test_inventory_fetch_failure_raises_zabbix_error(self, event_logger):
+        self.api.host.get.side_effect = ZabbixAPIException
+
+        self.assertRaises(ZabbixError, lambda: self.inventory.reconcile([self.new]))
@@ -83,6 +83,18 @@ class ZabbixApiClient(object):
             logger.warning('There are no hosts for some instances')
         return [host['hostid'] for host in hosts]
 
+    @_exception_decorator('Can not get Zabbix hosts for instances {1}')
+    def get_host_ids_map(self, instances):
+        """
+        Return dictionary of host IDs for instances keyed by host names, uses single API call
+        """
+        api = self.get_zabbix_api()
+        names = [self.get_host_name(instance) for instance in instances]
+        hosts = api.host.get(filter={'host': names}, output=['hostid', 'host'])
+        if len(hosts) != len(names):
+            logger.warning('There are no hosts for some instances')
+        return {host['host']: host['hostid'] for host in hosts}
+
     @_exception_decorator('Can not create Zabbix host for instance {1}. {exception_name}: {exception}')
     def create_host(self, instance, warn_if_host_exists=True, is_tenant=False):
         api = self.get_zabbix_api()
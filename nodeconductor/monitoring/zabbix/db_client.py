@@ -9,6 +9,7 @@ from django.conf import settings
 from django.db import connections, DatabaseError
 from django.utils import six, timezone
 
+from nodeconductor.core import timeseries
 from nodeconductor.core.utils import datetime_to_timestamp
 from nodeconductor.iaas.models import Instance
 from nodeconductor.monitoring.zabbix import errors, api_client
@@ -237,59 +238,174 @@ class ZabbixDBClient(object):
         if not host_ids:
             return []
 
-        zabbix_settings = getattr(settings, 'NODECONDUCTOR', {}).get('MONITORING', {}).get('ZABBIX', {})
-        HISTORY_RECORDS_INTERVAL = zabbix_settings.get('HISTORY_RECORDS_INTERVAL', 15) * 60
-        TRENDS_RECORDS_INTERVAL = zabbix_settings.get('TRENDS_RECORDS_INTERVAL', 60)  * 60
-        HISTORY_DATE_RANGE = timedelta(hours=zabbix_settings.get('TRENDS_DATE_RANGE', 48))
-
+        intervals = self._get_records_intervals()
         item_key = self.items[item]['key']
         item_history_table = self.items[item]['table']
         item_trends_table = 'trends' if item_history_table == 'history' else 'trends_uint'
         convert_to_mb = self.items[item]['convert_to_mb']
-        trends_start_date = datetime_to_timestamp(timezone.now() - HISTORY_DATE_RANGE)
         try:
             history_cursor = self.get_cursor(
                 host_ids, [item_key], item_history_table, start_timestamp, end_timestamp, convert_to_mb,
-                min_interval=HISTORY_RECORDS_INTERVAL)
+                min_interval=intervals['history'])
             trends_cursor = self.get_cursor(
                 host_ids, [item_key], item_trends_table, start_timestamp, end_timestamp, convert_to_mb,
-                min_interval=TRENDS_RECORDS_INTERVAL)
-
-            interval = ((end_timestamp - start_timestamp) / segments_count)
-            points = [start_timestamp + interval * i for i in range(segments_count + 1)][::-1]
+                min_interval=intervals['trends'])
 
-            segment_list = []
-            if points[1] > trends_start_date:
-                next_value = history_cursor.fetchone()
-            else:
-                next_value = trends_cursor.fetchone()
+            return self.format_segment_list(
+                iter(history_cursor.fetchone, None), iter(trends_cursor.fetchone, None),
+                start_timestamp, end_timestamp, segments_count, intervals)
+        except DatabaseError as e:
+            logger.exception('Can not execute query the Zabbix DB.')
+            six.reraise(errors.ZabbixError, e, sys.exc_info()[2])
 
-            for end, start in zip(points[:-1], points[1:]):
-                segment = {'from': start, 'to': end}
-                interval = HISTORY_RECORDS_INTERVAL if start > trends_start_date else TRENDS_RECORDS_INTERVAL
+    def get_grouped_item_stats(self, instances_groups, item, start_timestamp, end_timestamp, segments_count):
+        """
+        Calculate item stats for several groups of instances at once.
 
-                while True:
-                    if next_value is None:
-                        break
-                    time, value = next_value
+        Hosts of all instances are resolved with a single Zabbix API call and
+        history of all hosts is fetched with a single query. Records are split
+        by groups of their hosts in one pass over the query cursor.
 
-                    if time <= end:
-                        if end - time < interval or time > start:
-                            segment['value'] = value
-                        break
-                    else:
-                        if start > trends_start_date:
-                            next_value = history_cursor.fetchone()
-                        else:
-                            next_value = trends_cursor.fetchone()
+        instances_groups: dictionary
+            Example: {group_key: [instance1, instance2], ...}
+        Returns
+        -------
+        Dictionary of segment lists, keyed by group keys
+        """
+        hosts_groups = self._get_hosts_groups(instances_groups)
+        if not hosts_groups:
+            return {key: [] for key in instances_groups}
 
-                segment_list.append(segment)
+        if item == 'storage':
+            return self.get_grouped_storage_stats(
+                instances_groups, hosts_groups, start_timestamp, end_timestamp, segments_count)
 
-            return segment_list
+        intervals = self._get_records_intervals()
+        # {group key: {table: {time: value}}}, times are added in descending order
+        values = {key: {'history': collections.OrderedDict(), 'trends': collections.OrderedDict()}
+                  for key in set.union(*hosts_groups.values())}
+        try:
+            for table, host_id, time, value in self.get_hosts_records(
+                    hosts_groups.keys(), item, start_timestamp, end_timestamp, intervals):
+                for key in hosts_groups[host_id]:
+                    # Keep single value per timestamp, same as GROUP BY clock for a single group
+                    values[key][table].setdefault(time, value)
         except DatabaseError as e:
             logger.exception('Can not execute query the Zabbix DB.')
             six.reraise(errors.ZabbixError, e, sys.exc_info()[2])
 
+        grouped_stats = {key: [] for key in instances_groups}
+        for key, group_values in values.items():
+            grouped_stats[key] = self.format_segment_list(
+                iter(group_values['history'].items()), iter(group_values['trends'].items()),
+                start_timestamp, end_timestamp, segments_count, intervals)
+        return grouped_stats
+
+    def _get_hosts_groups(self, instances_groups):
+        """ Return keys of groups of Zabbix hosts of instances: {host id: {group key, ...}} """
+        all_instances = {instance for instances in instances_groups.values() for instance in instances}
+        host_ids_map = {}
+        try:
+            host_ids_map = self.zabbix_api_client.get_host_ids_map(all_instances) or {}
+        except errors.ZabbixError:
+            logger.warning('Failed to get Zabbix hosts for instances %s', all_instances)
+
+        hosts_groups = collections.defaultdict(set)
+        for key, instances in instances_groups.items():
+            for instance in instances:
+                name = self.zabbix_api_client.get_host_name(instance)
+                if name in host_ids_map:
+                    hosts_groups[str(host_ids_map[name])].add(key)
+        return dict(hosts_groups)
+
+    def _get_records_intervals(self):
+        zabbix_settings = getattr(settings, 'NODECONDUCTOR', {}).get('MONITORING', {}).get('ZABBIX', {})
+        return {
+            'history': zabbix_settings.get('HISTORY_RECORDS_INTERVAL', 15) * 60,
+            'trends': zabbix_settings.get('TRENDS_RECORDS_INTERVAL', 60) * 60,
+            'trends_start': datetime_to_timestamp(
+                timezone.now() - timedelta(hours=zabbix_settings.get('TRENDS_DATE_RANGE', 48))),
+        }
+
+    def format_segment_list(self, history_values, trends_values, start_timestamp, end_timestamp, segments_count,
+                            intervals):
+        """
+        Split item values into time segments, each segment gets the latest value known before its end.
+
+        history_values and trends_values are iterators over (time, value) tuples ordered by time descending.
+        Values and segments are merged in a single pass. It is not replaced with timeseries.bucketize,
+        because value recorded before segment start is still used if it is within records interval.
+        """
+        trends_start_date = intervals['trends_start']
+        interval = ((end_timestamp - start_timestamp) / segments_count)
+        points = [start_timestamp + interval * i for i in range(segments_count + 1)][::-1]
+
+        segment_list = []
+        if points[1] > trends_start_date:
+            next_value = next(history_values, None)
+        else:
+            next_value = next(trends_values, None)
+
+        for end, start in zip(points[:-1], points[1:]):
+            segment = {'from': start, 'to': end}
+            interval = intervals['history'] if start > trends_start_date else intervals['trends']
+
+            while True:
+                if next_value is None:
+                    break
+                time, value = next_value
+
+                if time <= end:
+                    if end - time < interval or time > start:
+                        segment['value'] = value
+                    break
+                else:
+                    if start > trends_start_date:
+                        next_value = next(history_values, None)
+                    else:
+                        next_value = next(trends_values, None)
+
+            segment_list.append(segment)
+
+        return segment_list
+
+    def get_hosts_records(self, host_ids, item, start_timestamp, end_timestamp, intervals):
+        """
+        Fetch history and trends values of item for all hosts with a single query.
+        Yield (table, host_id, time, value) tuples ordered by time descending,
+        where table is either 'history' or 'trends', one value per host and time.
+        """
+        item_history_table = self.items[item]['table']
+        item_trends_table = 'trends' if item_history_table == 'history' else 'trends_uint'
+
+        query_template = (
+            "SELECT '%(table)s' source, it.hostid hostid, hi.clock time, (%(value_path)s) value "
+            'FROM zabbix.items it JOIN zabbix.%(item_table)s hi on hi.itemid = it.itemid '
+            'WHERE it.key_ = "%(item_key)s" AND it.hostid in (%(host_ids)s) '
+            'AND hi.clock < %(end_timestamp)s AND hi.clock > %(start_timestamp)s '
+            'GROUP BY it.hostid, hi.clock'
+        )
+        queries = []
+        for table, item_table, value_path in (('history', item_history_table, 'hi.value'),
+                                              ('trends', item_trends_table, 'hi.value_avg')):
+            if self.items[item]['convert_to_mb']:
+                value_path += ' / (1024*1024)'
+            queries.append(query_template % {
+                'table': table,
+                'item_key': self.items[item]['key'],
+                'item_table': item_table,
+                'value_path': value_path,
+                'host_ids': ','.join(str(host_id) for host_id in host_ids),
+                'start_timestamp': start_timestamp - intervals[table],
+                'end_timestamp': end_timestamp,
+            })
+        query = sql_utils.make_union(queries) + ' ORDER BY time DESC'
+
+        with connections['zabbix'].cursor() as cursor:
+            cursor.execute(query)
+            for table, host_id, time, value in iter(cursor.fetchone, None):
+                yield table, str(host_id), time, value
+
     def get_cursor(self, host_ids, item_keys, item_table, start_timestamp, end_timestamp, convert_to_mb, min_interval):
         """
         Execute query to zabbix db to get item values from history
@@ -358,32 +474,53 @@ class ZabbixDBClient(object):
             cursor.execute(query, parameters)
             actual_values = cursor.fetchall()
 
-        # Poor man's resampling
-        resampled_values = []
-        sampling_step = (end_timestamp - start_timestamp) / segments_count
+        # Each segment gets the closest value that was known before its end
+        return timeseries.bucketize(
+            actual_values, segments_count, start_timestamp, end_timestamp,
+            reducer='last', default='0.0000', carry_forward=True)
 
-        for i in range(segments_count):
-            segment_start_timestamp = start_timestamp + sampling_step * i
-            segment_end_timestamp = segment_start_timestamp + sampling_step
-
-            # Get the closest value that was known before the requested data point
-            # This could be written in much more efficient way.
-            preceding_values = [
-                value for time, value in actual_values
-                if time < segment_end_timestamp
-                ]
-            try:
-                value = preceding_values[-1]
-            except IndexError:
-                value = '0.0000'
+    def get_grouped_storage_stats(self, instances_groups, hosts_groups, start_timestamp, end_timestamp,
+                                  segments_count):
+        """
+        Calculate storage stats of several groups of instances with a single query.
+        Disk sizes are summed per host and minute in SQL and per group in Python.
+        """
+        query = """
+            SELECT
+              it.hostid                                 `hostid`,
+              hi.clock - (hi.clock %% 60)               `time`,
+              SUM(hi.value) / (1024 * 1024)             `value`
+            FROM zabbix.items it
+              JOIN zabbix.history_uint hi ON hi.itemid = it.itemid
+            WHERE
+              it.key_ = 'openstack.vm.disk.size'
+              AND
+              it.hostid IN ({hosts_placeholder})
+              AND
+              hi.clock >= %s AND hi.clock < %s
+            GROUP BY it.hostid, hi.clock - (hi.clock %% 60)
+        """.format(hosts_placeholder=sql_utils.make_list_placeholder(len(hosts_groups)))
+        parameters = list(hosts_groups.keys()) + [start_timestamp, end_timestamp]
 
-            resampled_values.append({
-                'from': segment_start_timestamp,
-                'to': segment_end_timestamp,
-                'value': value,
-            })
+        # {group key: {time: value}}
+        values = {key: collections.defaultdict(int) for key in set.union(*hosts_groups.values())}
+        try:
+            with connections['zabbix'].cursor() as cursor:
+                cursor.execute(query, parameters)
+                for host_id, time, value in iter(cursor.fetchone, None):
+                    for key in hosts_groups[str(host_id)]:
+                        values[key][time] += value
+        except DatabaseError as e:
+            logger.exception('Can not execute query the Zabbix DB.')
+            six.reraise(errors.ZabbixError, e, sys.exc_info()[2])
 
-        return resampled_values
+        grouped_stats = {key: [] for key in instances_groups}
+        for key, group_values in values.items():
+            # Each segment gets the closest value that was known before its end
+            grouped_stats[key] = timeseries.bucketize(
+                sorted(group_values.items()), segments_count, start_timestamp, end_timestamp,
+                reducer='last', default='0.0000', carry_forward=True)
+        return grouped_stats
 
     def get_application_installation_state(self, instance):
         # a shortcut for the IaaS instances -- all done
@@ -424,3 +561,53 @@ class ZabbixDBClient(object):
         else:
             logger.warn('Cannot retrieve installation state of instance %s. Host does not exist.', instance)
             return 'NO DATA'
+
+    def get_application_installation_states(self, instances):
+        """
+        Return installation states of several instances keyed by instance primary key.
+
+        Hosts of all instances are resolved with a single Zabbix API call and
+        the latest values of installation state item of all hosts are fetched with a single query.
+        """
+        states = {}
+        paas_instances = []
+        for instance in instances:
+            if instance.type == Instance.Services.IAAS:
+                states[instance.pk] = 'OK'
+            else:
+                states[instance.pk] = 'NO DATA'
+                paas_instances.append(instance)
+
+        if not paas_instances:
+            return states
+
+        host_ids_map = self.zabbix_api_client.get_host_ids_map(paas_instances)
+        if not host_ids_map:
+            return states
+
+        query = r"""
+            SELECT
+              it.hostid,
+              hi.value
+            FROM zabbix.items it
+              JOIN zabbix.history_uint hi ON hi.itemid = it.itemid
+            WHERE
+              it.key_ = %s
+            AND
+              it.hostid IN ({hosts_placeholder})
+            AND
+              hi.clock = (
+                SELECT MAX(hl.clock) FROM zabbix.history_uint hl
+                WHERE hl.itemid = it.itemid AND hl.clock > %s
+              )
+        """.format(hosts_placeholder=sql_utils.make_list_placeholder(len(host_ids_map)))
+        parameters = [self.zabbix_api_client._settings.get('application-status-item', 'application.status')]
+        parameters.extend(host_ids_map.values())
+        parameters.append(datetime_to_timestamp(timezone.now() - timedelta(hours=1)))
+
+        values = {str(host_id): value for host_id, value in self.execute_query(query, parameters)}
+        for instance in paas_instances:
+            host_id = host_ids_map.get(self.zabbix_api_client.get_host_name(instance))
+            if host_id is not None and str(host_id) in values:
+                states[instance.pk] = 'OK' if values[str(host_id)] == 1 else 'NOT OK'
+        return states
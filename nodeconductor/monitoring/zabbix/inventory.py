@@ -0,0 +1,205 @@
+"""
+Batch reconciliation of Zabbix hosts and IT services with instances.
+
+Existing hosts of instances are fetched by their names with one host.get call
+per chunk of instances and existing availability services with one service.get
+call. They are compared with instances, and only missing hosts and services are
+created and outdated visible names are updated. Array-capable host.create,
+host.update and service.create calls are made per chunk of instances, so the
+number of write calls does not grow with the number of instances that are
+already in sync.
+"""
+from __future__ import unicode_literals
+
+import collections
+import logging
+
+import pyzabbix
+from requests.exceptions import RequestException
+
+from nodeconductor.monitoring.log import event_logger
+from nodeconductor.monitoring.zabbix.api_client import ZabbixApiClient
+from nodeconductor.monitoring.zabbix.errors import ZabbixError
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of hosts or services in one API call
+CHUNK_SIZE = 100
+
+# XXX the same hardcoded description as in ZabbixApiClient.get_host_sla_triggerid
+SLA_TRIGGER_DESCRIPTION = 'Missing data about the VM'
+
+# Prefix of names of ZabbixApiClient.get_service_name
+SERVICE_NAME_PREFIX = 'Availability of '
+
+
+def chunked(items, size=CHUNK_SIZE):
+    items = list(items)
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+class InventoryDiff(collections.namedtuple('InventoryDiff', ('missing_hosts', 'outdated_hosts', 'missing_services'))):
+    """ Instances without hosts, [(instance, host id)] of hosts with outdated visible names
+        and instances without services.
+    """
+
+    def __nonzero__(self):
+        return bool(self.missing_hosts or self.outdated_hosts or self.missing_services)
+
+
+class ZabbixInventory(object):
+    """ Reconcile Zabbix hosts and IT services of instances with few API calls """
+
+    def __init__(self, client=None):
+        self.client = client or ZabbixApiClient()
+        self.settings = self.client._settings
+        self._api = None
+
+    @property
+    def api(self):
+        if self._api is None:
+            self._api = self.client.get_zabbix_api()
+        return self._api
+
+    def get_hosts(self, names):
+        """ Return {host name: host} of hosts with given names.
+            Hosts are not filtered by the configured host group: host names are unique
+            in Zabbix, so a host moved to another group can not be created again.
+        """
+        hosts = {}
+        for chunk in chunked(names):
+            for host in self.api.host.get(filter={'host': chunk}, output=['hostid', 'host', 'name']):
+                hosts[host['host']] = host
+        return hosts
+
+    def get_services(self):
+        """ Return {service name: service} of availability services """
+        services = self.api.service.get(
+            search={'name': SERVICE_NAME_PREFIX}, startSearch=True, output=['serviceid', 'name', 'triggerid'])
+        return {service['name']: service for service in services}
+
+    def diff(self, instances):
+        """ Compare instances with hosts and services that exist in Zabbix """
+        instances = [instance for instance in instances if self.client.get_host_name(instance).strip()]
+        hosts = self.get_hosts([self.client.get_host_name(instance) for instance in instances])
+        services = self.get_services()
+        diff = InventoryDiff([], [], [])
+        for instance in instances:
+            host = hosts.get(self.client.get_host_name(instance))
+            if host is None:
+                diff.missing_hosts.append(instance)
+            elif host['name'] != self.client.get_host_visible_name(instance):
+                diff.outdated_hosts.append((instance, host['hostid']))
+            if self.client.get_service_name(instance) not in services:
+                diff.missing_services.append(instance)
+        return diff
+
+    def get_host_parameters(self, instance):
+        templates = [{'templateid': self.settings['templateid']}]
+        application_type = instance.template.application_type
+        if application_type:
+            application_templateid = self.settings.get('%s-templateid' % application_type.slug.lower())
+            if application_templateid:
+                templates.append({'templateid': application_templateid})
+        return {
+            'host': self.client.get_host_name(instance),
+            'name': self.client.get_host_visible_name(instance),
+            'interfaces': [self.settings['interface_parameters']],
+            'groups': [{'groupid': self.settings['groupid']}],
+            'templates': templates,
+        }
+
+    def get_sla_trigger_ids(self, host_ids):
+        """ Return {host id: SLA trigger id} with one trigger.get call """
+        triggers = self.api.trigger.get(
+            hostids=host_ids, output=['triggerid'], selectHosts=['hostid'],
+            filter={'description': SLA_TRIGGER_DESCRIPTION})
+        return {host['hostid']: trigger['triggerid'] for trigger in triggers for host in trigger['hosts']}
+
+    def create_hosts(self, instances):
+        """ Create hosts of instances, return list of instances which hosts were not created """
+        failed = []
+        for chunk in chunked(instances):
+            try:
+                self.api.host.create([self.get_host_parameters(instance) for instance in chunk])
+            except (pyzabbix.ZabbixAPIException, RequestException) as e:
+                # one invalid host fails the whole array call, so hosts of the chunk are created one by one
+                logger.warning('Can not create Zabbix hosts for instances %s, creating them one by one: %s', chunk, e)
+                for instance in chunk:
+                    try:
+                        self.api.host.create(self.get_host_parameters(instance))
+                    except (pyzabbix.ZabbixAPIException, RequestException) as e:
+                        logger.error('Can not create Zabbix host for instance %s: %s', instance, e)
+                        failed.append(instance)
+        return failed
+
+    def update_hosts(self, outdated_hosts):
+        for chunk in chunked(outdated_hosts):
+            try:
+                self.api.host.update([
+                    {'hostid': host_id, 'name': self.client.get_host_visible_name(instance)}
+                    for instance, host_id in chunk])
+            except (pyzabbix.ZabbixAPIException, RequestException) as e:
+                logger.error('Can not update visible names of Zabbix hosts: %s', e)
+
+    def create_services(self, instances):
+        """ Create services of instances, return list of instances which services were not created """
+        failed = []
+        for chunk in chunked(instances):
+            try:
+                hosts = self.api.host.get(
+                    filter={'host': [self.client.get_host_name(instance) for instance in chunk]},
+                    output=['hostid', 'host'])
+                host_ids = {host['host']: host['hostid'] for host in hosts}
+                trigger_ids = self.get_sla_trigger_ids(list(host_ids.values()))
+
+                services = []
+                for instance in chunk:
+                    trigger_id = trigger_ids.get(host_ids.get(self.client.get_host_name(instance)))
+                    if trigger_id is None:
+                        logger.error('Can not find SLA trigger of Zabbix host of instance %s', instance)
+                        failed.append(instance)
+                        continue
+                    services.append(dict(self.settings['default_service_parameters'],
+                                         name=self.client.get_service_name(instance), triggerid=trigger_id))
+
+                if services:
+                    self.api.service.create(services)
+            except (pyzabbix.ZabbixAPIException, RequestException) as e:
+                logger.error('Can not create Zabbix services for instances %s: %s', chunk, e)
+                failed.extend(instance for instance in chunk if instance not in failed)
+        return failed
+
+    def reconcile(self, instances, dry_run=False):
+        """ Create missing hosts and services and update outdated hosts, return the diff """
+        try:
+            diff = self.diff(instances)
+        except (pyzabbix.ZabbixAPIException, RequestException) as e:
+            logger.exception('Can not fetch Zabbix inventory')
+            raise ZabbixError(e)
+        if dry_run or not diff:
+            return diff
+
+        failed = set(instance.pk for instance in self.create_hosts(diff.missing_hosts))
+        self.update_hosts(diff.outdated_hosts)
+        # services are not created for hosts that failed to be created
+        services_instances = [instance for instance in diff.missing_services if instance.pk not in failed]
+        failed.update(instance.pk for instance in self.create_services(services_instances))
+
+        # each added instance is reported once, even if both its host and service were created
+        added = collections.OrderedDict((instance.pk, instance)
+                                        for instance in diff.missing_hosts + diff.missing_services)
+        for pk, instance in added.items():
+            if pk in failed:
+                event_logger.zabbix.error(
+                    'Unable to add instance {instance_name} to Zabbix',
+                    event_type='zabbix_host_creation_failed',
+                    event_context={'instance': instance})
+            else:
+                event_logger.zabbix.info(
+                    'Added instance {instance_name} to Zabbix',
+                    event_type='zabbix_host_creation_succeeded',
+                    event_context={'instance': instance})
+        return diff
@@ -60,7 +60,7 @@ class ImageSerializer(structure_serializers.BasePropertySerializer):
 
 class ServiceProjectLinkSerializer(structure_serializers.BaseServiceProjectLinkSerializer):
 
-    quotas = quotas_serializers.QuotaSerializer(many=True, read_only=True)
+    quotas = quotas_serializers.QuotasField()
 
     class Meta(structure_serializers.BaseServiceProjectLinkSerializer.Meta):
         model = models.OpenStackServiceProjectLink
@@ -1,29 +1,33 @@
 from __future__ import unicode_literals
 
+from optparse import make_option
+
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
-from nodeconductor.quotas import models
-from nodeconductor.quotas.utils import get_models_with_quotas
+from nodeconductor.quotas import handlers, reconciliation
 
 
 class Command(BaseCommand):
     """ Recalculate all quotas """
 
+    option_list = BaseCommand.option_list + (
+        make_option('--dry-run', action='store_true', dest='dry_run', default=False,
+                    help='Report quotas with drifted usage without correcting them.'),
+    )
+
     def handle(self, *args, **options):
-        # TODO: implement other quotas recalculation
-        self.recalculate_global_quotas()
-        self.delete_stale_quotas()
-
-    def delete_stale_quotas(self):
-        for model in get_models_with_quotas():
-            for obj in model.objects.all():
-                obj.quotas.exclude(name__in=model.QUOTAS_NAMES).delete()
-
-    def recalculate_global_quotas(self):
-        for model in get_models_with_quotas():
-            if hasattr(model, 'GLOBAL_COUNT_QUOTA_NAME'):
-                with transaction.atomic():
-                    quota, _ = models.Quota.objects.get_or_create(name=model.GLOBAL_COUNT_QUOTA_NAME)
-                    quota.usage = model.objects.count()
-                    quota.save()
+        dry_run = options['dry_run']
+        if not dry_run:
+            handlers.create_global_quotas()
+
+        drifts = reconciliation.reconcile_quotas(fix=not dry_run)
+        for drift in drifts:
+            scope = '%s #%s' % (drift.model.__name__, drift.scope_id) if drift.scope_id else 'global'
+            self.stdout.write('%s quota of %s: stored usage %s, actual usage %s' % (
+                drift.name, scope, drift.stored, drift.actual))
+
+        if dry_run:
+            self.stdout.write('%s quotas have drifted usage' % len(drifts))
+        else:
+            self.stdout.write('%s quotas have been corrected' % len(drifts))
+            reconciliation.delete_stale_quotas()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from nodeconductor.core.indexes import CreateIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotas', '0002_make_quota_scope_nullable'),
+    ]
+
+    operations = [
+        # quotas of scopes, unique constraint starts with name and does not serve them
+        CreateIndex(
+            name='quotas_quota_scope_idx',
+            model_name='quota',
+            columns=['content_type_id', 'object_id'],
+        ),
+    ]
@@ -6,6 +6,8 @@ from django.utils.encoding import python_2_unicode_compatible
 
 from nodeconductor.logging.log import LoggableMixin
 from nodeconductor.quotas import exceptions, managers
+from nodeconductor.core import revisions
+from nodeconductor.core.cache import response_cache
 from nodeconductor.core.models import UuidMixin, NameMixin, ReversionMixin, DescendantMixin
 
 
@@ -81,10 +83,12 @@ class QuotaModelMixin(models.Model):
     quotas = ct_fields.GenericRelation('quotas.Quota', related_query_name='quotas')
 
     def set_quota_limit(self, quota_name, limit):
-        self.quotas.filter(name=quota_name).update(limit=limit)
+        if self.quotas.filter(name=quota_name).update(limit=limit):
+            # update does not send post_save signals
+            response_cache.invalidate_model(Quota)
 
     def set_quota_usage(self, quota_name, usage, fail_silently=False):
-        with transaction.atomic():
+        with revisions.batch():
             try:
                 original_quota = self.quotas.get(name=quota_name)
             except Quota.DoesNotExist:
@@ -111,7 +115,8 @@ class QuotaModelMixin(models.Model):
         """
         if not delta:
             return
-        with transaction.atomic():
+        # quota and its ancestors quotas are versioned with one revision
+        with revisions.batch():
             try:
                 original_quota = self.quotas.select_for_update().get(name=quota_name)
             except Quota.DoesNotExist, e:
@@ -0,0 +1,185 @@
+"""
+Quotas usage reconciliation.
+
+Usages of most quotas are maintained incrementally by signal handlers,
+so they can drift after failed transactions or manual database fixes.
+Applications register source of truth for such quotas, for example:
+
+.. code-block:: python
+
+    # apps.py
+    QuotaSourcesRegister.register(Customer, 'nc_project_count', CountQuotaSource(Project, 'customer'))
+
+Actual usages of all scopes of a model are calculated with one grouped query per source
+and compared with stored usages.
+"""
+from __future__ import unicode_literals
+
+import collections
+import logging
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Sum
+from django.utils import six
+
+from nodeconductor.core import revisions
+from nodeconductor.core.models import DescendantMixin
+from nodeconductor.quotas import models
+from nodeconductor.quotas.utils import get_models_with_quotas
+
+
+logger = logging.getLogger(__name__)
+
+Drift = collections.namedtuple('Drift', ('quota_id', 'model', 'scope_id', 'name', 'stored', 'actual'))
+
+
+class CountQuotaSource(object):
+    """ Number of :model: objects that are related to quota scope by :path: """
+
+    def __init__(self, model, path, query=None):
+        self.model = model
+        self.path = path
+        self.query = query
+
+    def get_queryset(self):
+        queryset = self.model.objects.all()
+        if self.query is not None:
+            queryset = queryset.filter(self.query)
+        return queryset.order_by()
+
+    def get_aggregates(self):
+        return {'value': Count('pk', distinct=True)}
+
+    def get_values(self):
+        """ Return dictionary {scope id: usage} """
+        rows = self.get_queryset().values(self.path).annotate(**self.get_aggregates())
+        return {row[self.path]: self.get_value(row) for row in rows if row[self.path] is not None}
+
+    def get_value(self, row):
+        return row['value']
+
+
+class SumQuotaSource(CountQuotaSource):
+    """ Sum of :fields: of :model: objects that are related to quota scope by :path: """
+
+    def __init__(self, model, path, fields, query=None):
+        super(SumQuotaSource, self).__init__(model, path, query)
+        self.fields = (fields,) if isinstance(fields, six.string_types) else tuple(fields)
+
+    def get_aggregates(self):
+        return {'value_%s' % field: Sum(field) for field in self.fields}
+
+    def get_value(self, row):
+        return sum(row['value_%s' % field] or 0 for field in self.fields)
+
+
+class QuotaSourcesRegister(object):
+    """ Register of quota usage sources: {scope model: {quota name: [sources]}} """
+
+    _register = collections.defaultdict(lambda: collections.defaultdict(list))
+
+    @classmethod
+    def register(cls, model, quota_name, source):
+        cls._register[model][quota_name].append(source)
+
+    @classmethod
+    def get_sources(cls, model):
+        return cls._register.get(model, {})
+
+
+def get_actual_usages(model, quota_name):
+    usages = collections.defaultdict(int)
+    for source in QuotaSourcesRegister.get_sources(model)[quota_name]:
+        for scope_id, value in source.get_values().items():
+            usages[scope_id] += value
+    return usages
+
+
+def get_model_drifts(model):
+    """ Compare stored usages of registered quotas of all model objects with actual ones """
+    content_type = ContentType.objects.get_for_model(model)
+    drifts = []
+    for quota_name in QuotaSourcesRegister.get_sources(model):
+        actual_usages = get_actual_usages(model, quota_name)
+        stored_usages = (models.Quota.objects
+                         .filter(content_type=content_type, name=quota_name)
+                         .values_list('pk', 'object_id', 'usage'))
+        for quota_id, scope_id, stored in stored_usages:
+            actual = actual_usages.get(scope_id, 0)
+            if float(stored) != float(actual):
+                drifts.append(Drift(quota_id, model, scope_id, quota_name, stored, actual))
+    return drifts
+
+
+def get_global_drifts():
+    """ Compare usages of global count quotas with numbers of objects """
+    drifts = []
+    for model in get_models_with_quotas():
+        name = getattr(model, 'GLOBAL_COUNT_QUOTA_NAME', None)
+        if name is None:
+            continue
+        actual = model.objects.count()
+        for quota_id, stored in models.Quota.objects.filter(name=name, object_id=None).values_list('pk', 'usage'):
+            if float(stored) != float(actual):
+                drifts.append(Drift(quota_id, model, None, name, stored, actual))
+    return drifts
+
+
+def get_drifts():
+    drifts = get_global_drifts()
+    for model in get_models_with_quotas():
+        drifts += get_model_drifts(model)
+    return drifts
+
+
+def add_usage_to_ancestors(scope, quota_name, delta):
+    """ Add usage delta to ancestors quotas which are not reconciled by their own sources """
+    if not delta or not isinstance(scope, DescendantMixin):
+        return
+    for parent in scope.get_parents():
+        if not isinstance(parent, models.QuotaModelMixin) or quota_name in QuotaSourcesRegister.get_sources(type(parent)):
+            continue
+        try:
+            quota = parent.quotas.select_for_update().get(name=quota_name)
+        except models.Quota.DoesNotExist:
+            continue
+        quota.usage += delta
+        quota.save(update_fields=['usage'])
+        add_usage_to_ancestors(parent, quota_name, delta)
+
+
+def fix_drifts(drifts):
+    """ Save actual usages through quotas API, so threshold alerts, versions and
+        response cache are updated by quota signal handlers.
+    """
+    # corrected quotas and their ancestors are versioned with one revision
+    with revisions.batch():
+        quotas = models.Quota.objects.select_for_update().in_bulk([drift.quota_id for drift in drifts])
+        for drift in drifts:
+            quota = quotas.get(drift.quota_id)
+            if quota is None:
+                continue
+            delta = drift.actual - quota.usage
+            quota.usage = drift.actual
+            quota.save(update_fields=['usage'])
+            add_usage_to_ancestors(quota.scope, drift.name, delta)
+
+
+def reconcile_quotas(fix=False):
+    """ Return list of quotas with drifted usages and correct them if :fix: is True """
+    drifts = get_drifts()
+    for drift in drifts:
+        logger.warning('Quota %s of %s #%s usage drift: stored %s, actual %s.',
+                       drift.name, drift.model.__name__, drift.scope_id, drift.stored, drift.actual)
+    if fix and drifts:
+        fix_drifts(drifts)
+    return drifts
+
+
+def delete_stale_quotas():
+    """ Delete quotas that are not in QUOTAS_NAMES of their scope model """
+    for model in get_models_with_quotas():
+        (models.Quota.objects
+         .filter(content_type=ContentType.objects.get_for_model(model))
+         .exclude(name__in=model.QUOTAS_NAMES)
+         .delete())
@@ -1,7 +1,10 @@
+import collections
+
+from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
 
 from nodeconductor.quotas import models, utils
-from nodeconductor.core.serializers import GenericRelatedField
+from nodeconductor.core.serializers import GenericRelatedField, GenericRelatedListSerializer, PrefetchedField
 
 
 class QuotaSerializer(serializers.HyperlinkedModelSerializer):
@@ -10,7 +13,30 @@ class QuotaSerializer(serializers.HyperlinkedModelSerializer):
     class Meta(object):
         model = models.Quota
         fields = ('url', 'uuid', 'name', 'limit', 'usage', 'scope')
+        list_serializer_class = GenericRelatedListSerializer
         read_only_fields = ('uuid', 'name', 'usage')
         extra_kwargs = {
             'url': {'lookup_field': 'uuid'},
         }
+
+
+class QuotasField(PrefetchedField):
+    """ Quotas of serialized scopes, loaded with one query for a page of scopes """
+
+    def __init__(self, **kwargs):
+        kwargs['empty_value'] = []
+        super(QuotasField, self).__init__(**kwargs)
+
+    def prefetch(self, scopes, request):
+        scopes = {scope.pk: scope for scope in scopes}
+        content_type = ContentType.objects.get_for_model(next(iter(scopes.values())))
+        scope_field = next(field for field in models.Quota._meta.virtual_fields if field.name == 'scope')
+
+        quotas = collections.defaultdict(list)
+        for quota in models.Quota.objects.filter(content_type=content_type, object_id__in=scopes.keys()):
+            # scope is already known, so it is not fetched again by serializer
+            setattr(quota, scope_field.cache_attr, scopes[quota.object_id])
+            quotas[quota.object_id].append(quota)
+
+        return {pk: QuotaSerializer(scope_quotas, many=True, context=self.context).data
+                for pk, scope_quotas in quotas.items()}
@@ -0,0 +1,21 @@
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from nodeconductor.core import revisions
+from nodeconductor.quotas import models, reconciliation
+
+
+@shared_task(name='nodeconductor.quotas.reconcile_quotas')
+def reconcile_quotas(fix=True):
+    """ Compare usages of quotas with registered sources with actual ones and correct drifted usages """
+    reconciliation.reconcile_quotas(fix=fix)
+
+
+@shared_task(name='nodeconductor.quotas.compact_quotas_history')
+def compact_quotas_history(days=1):
+    """ Remove duplicate versions of quotas older than given number of days """
+    revisions.compact_versions(models.Quota, timezone.now() - timedelta(days=days))
@@ -1,5 +1,8 @@
 from datetime import timedelta
+import json
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework import test, status
 import reversion
@@ -30,7 +33,7 @@ class QuotaListTest(test.APITransactionTestCase):
     def test_owner_can_see_quotas_only_from_his_customer_memberships(self):
         self.client.force_authenticate(self.owner)
 
-        response = self.client.get(factories.QuotaFactory.get_list_url())
+        response = self.client.get(factories.QuotaFactory.get_list_url(), {'page_size': 300})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         response_quotas_urls = [quota['url'] for quota in response.data]
@@ -47,6 +50,44 @@ class QuotaListTest(test.APITransactionTestCase):
         for url in not_expected_quotas_urls:
             self.assertNotIn(url, response_quotas_urls)
 
+    def test_list_is_paginated(self):
+        self.client.force_authenticate(structure_factories.UserFactory(is_staff=True))
+
+        response = self.client.get(factories.QuotaFactory.get_list_url())
+
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(int(response['X-Result-Count']), models.Quota.objects.count())
+
+    def test_scopes_are_fetched_with_one_query_per_content_type(self):
+        self.client.force_authenticate(structure_factories.UserFactory(is_staff=True))
+        scope_types_count = (models.Quota.objects.exclude(object_id=None)
+                             .values('content_type_id').distinct().count())
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(factories.QuotaFactory.get_list_url(), {'page_size': 300})
+
+        self.assertEqual(len(response.data), models.Quota.objects.count())
+        # count and page queries
+        self.assertEqual(len(context.captured_queries), 2 + scope_types_count)
+
+    def test_list_of_all_quotas_is_streamed_with_result_count(self):
+        self.client.force_authenticate(self.owner)
+
+        response = self.client.get(factories.QuotaFactory.get_list_url(), {'page_size': 'all'})
+
+        self.assertTrue(response.streaming)
+        quotas = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(int(response['X-Result-Count']), len(quotas))
+        self.assertEqual(len(quotas), models.Quota.objects.filtered_for_user(self.owner).count())
+
+    def test_list_is_paginated_by_default(self):
+        self.client.force_authenticate(self.owner)
+
+        response = self.client.get(factories.QuotaFactory.get_list_url())
+
+        self.assertFalse(response.streaming)
+        self.assertTrue(response.has_header('Link'))
+
 
 class QuotaHistoryTest(test.APITransactionTestCase):
 
@@ -0,0 +1,98 @@
+import StringIO
+
+import mock
+from django.core.management import call_command
+from django.test import TestCase
+
+from nodeconductor.logging import models as logging_models
+from nodeconductor.quotas import models, reconciliation
+from nodeconductor.structure import models as structure_models
+# Dependency from structure and iaas exists only in tests
+from nodeconductor.iaas.tests import factories as iaas_factories
+from nodeconductor.structure.tests import factories as structure_factories
+
+
+class QuotaReconciliationTest(TestCase):
+
+    def setUp(self):
+        self.customer = structure_factories.CustomerFactory()
+        self.projects = structure_factories.ProjectFactory.create_batch(3, customer=self.customer)
+        self.membership = iaas_factories.CloudProjectMembershipFactory(project=self.projects[0])
+        iaas_factories.InstanceFactory.create_batch(2, cloud_project_membership=self.membership, cores=2, ram=1024)
+
+    def corrupt(self, scope, name, usage):
+        scope.quotas.filter(name=name).update(usage=usage)
+
+    def get_usage(self, scope, name):
+        return scope.quotas.get(name=name).usage
+
+    def test_consistent_usages_have_no_drifts(self):
+        self.assertEqual(reconciliation.get_drifts(), [])
+
+    def test_drifted_usages_are_reported(self):
+        self.corrupt(self.customer, 'nc_project_count', 10)
+        self.corrupt(self.projects[0], 'nc_resource_count', 1)
+
+        drifts = {(drift.name, drift.scope_id): drift for drift in reconciliation.get_drifts()}
+
+        self.assertItemsEqual(drifts.keys(), [('nc_project_count', self.customer.id),
+                                              ('nc_resource_count', self.projects[0].id)])
+        self.assertEqual(drifts['nc_project_count', self.customer.id].actual, 3)
+        self.assertEqual(drifts['nc_resource_count', self.projects[0].id].actual, 2)
+
+    def test_drifted_usages_are_corrected(self):
+        self.corrupt(self.customer, 'nc_project_count', 10)
+        self.corrupt(self.projects[0], 'nc_resource_count', 0)
+        models.Quota.objects.filter(name=structure_models.Project.GLOBAL_COUNT_QUOTA_NAME).update(usage=100)
+
+        reconciliation.reconcile_quotas(fix=True)
+
+        self.assertEqual(self.get_usage(self.customer, 'nc_project_count'), 3)
+        self.assertEqual(self.get_usage(self.projects[0], 'nc_resource_count'), 2)
+        global_quota = models.Quota.objects.get(name=structure_models.Project.GLOBAL_COUNT_QUOTA_NAME)
+        self.assertEqual(global_quota.usage, structure_models.Project.objects.count())
+        self.assertEqual(reconciliation.get_drifts(), [])
+
+    def test_scopes_without_related_objects_have_zero_usage(self):
+        self.corrupt(self.projects[1], 'nc_resource_count', 5)
+
+        reconciliation.reconcile_quotas(fix=True)
+
+        self.assertEqual(self.get_usage(self.projects[1], 'nc_resource_count'), 0)
+
+    def test_quota_threshold_alert_is_raised_when_usage_is_corrected(self):
+        self.customer.set_quota_limit('nc_project_count', 3)
+        self.corrupt(self.customer, 'nc_project_count', 0)
+
+        reconciliation.reconcile_quotas(fix=True)
+
+        self.assertTrue(logging_models.Alert.objects.filter(
+            object_id=self.customer.id, alert_type='quota_usage_is_over_threshold', closed__isnull=True).exists())
+
+    def test_usage_delta_is_added_to_ancestors_without_own_source(self):
+        register = {model: sources for model, sources in reconciliation.QuotaSourcesRegister._register.items()
+                    if model is not structure_models.Customer}
+        self.corrupt(self.projects[0], 'nc_resource_count', 0)
+        self.corrupt(self.customer, 'nc_resource_count', 0)
+
+        with mock.patch.object(reconciliation.QuotaSourcesRegister, '_register', register):
+            reconciliation.reconcile_quotas(fix=True)
+
+        self.assertEqual(self.get_usage(self.projects[0], 'nc_resource_count'), 2)
+        self.assertEqual(self.get_usage(self.customer, 'nc_resource_count'), 2)
+
+    def test_command_does_not_correct_usages_in_dry_run(self):
+        self.corrupt(self.customer, 'nc_project_count', 10)
+        output = StringIO.StringIO()
+
+        call_command('recalculatequotas', dry_run=True, stdout=output)
+
+        self.assertIn('nc_project_count quota of Customer #%s' % self.customer.id, output.getvalue())
+        self.assertEqual(self.get_usage(self.customer, 'nc_project_count'), 10)
+
+    def test_stale_quotas_are_deleted(self):
+        models.Quota.objects.create(scope=self.customer, name='unknown_quota')
+
+        reconciliation.delete_stale_quotas()
+
+        self.assertFalse(self.customer.quotas.filter(name='unknown_quota').exists())
@@ -7,21 +7,20 @@ import reversion
 from reversion.models import Version
 
 from nodeconductor.core.filters import DjangoMappingFilterBackend
-from nodeconductor.core.pagination import UnlimitedLinkHeaderPagination
+from nodeconductor.core.mixins import StreamingListMixin
 from nodeconductor.core.serializers import HistorySerializer
 from nodeconductor.core.utils import datetime_to_timestamp
 from nodeconductor.quotas import models, serializers, filters
 
 
-class QuotaViewSet(mixins.UpdateModelMixin,
+class QuotaViewSet(StreamingListMixin,
+                   mixins.UpdateModelMixin,
                    viewsets.ReadOnlyModelViewSet):
 
     queryset = models.Quota.objects.all()
     serializer_class = serializers.QuotaSerializer
     lookup_field = 'uuid'
     permission_classes = (rf_permissions.IsAuthenticated,)
-    # XXX: Remove a custom pagination class once the quota calculation has been made more efficient
-    pagination_class = UnlimitedLinkHeaderPagination
     filter_backends = (DjangoMappingFilterBackend, )
     filter_class = filters.QuotaFilterSet
 
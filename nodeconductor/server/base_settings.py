@@ -63,11 +63,15 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'nodeconductor.core.replicas.ReplicaPinMiddleware',
+    'nodeconductor.core.cache.ResponseCacheMiddleware',
     'nodeconductor.logging.middleware.CaptureEventContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
 
+DATABASE_ROUTERS = ('nodeconductor.core.replicas.ReplicaRouter',)
+
 REST_FRAMEWORK = {
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -192,6 +196,18 @@ CELERYBEAT_SCHEDULE = {
         'args': (),
     },
 
+    'reconcile-quotas': {
+        'task': 'nodeconductor.quotas.reconcile_quotas',
+        'schedule': timedelta(hours=24),
+        'args': (),
+    },
+
+    'compact-quotas-history': {
+        'task': 'nodeconductor.quotas.compact_quotas_history',
+        'schedule': timedelta(hours=24),
+        'args': (),
+    },
+
     'check-cloud-project-memberships-quotas': {
         'task': 'nodeconductor.iaas.tasks.iaas.check_cloud_memberships_quotas',
         'schedule': timedelta(minutes=1440),
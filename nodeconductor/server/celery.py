@@ -6,6 +6,7 @@ from celery import Celery
 from celery import signals
 from django.conf import settings
 
+from nodeconductor.logging import context as log_context
 from nodeconductor.logging.middleware import get_event_context, set_event_context, reset_event_context
 
 # set the default Django settings module for the 'celery' program.
@@ -46,6 +47,8 @@ def pass_event_context(sender=None, body=None, **kwargs):
 
 @signals.task_prerun.connect
 def bind_event_context(sender=None, **kwargs):
+    # log contexts of objects are memoized until the end of the task
+    log_context.start_memo()
     try:
         event_context = kwargs['kwargs'].pop('event_context')
     except KeyError:
@@ -57,3 +60,19 @@ def bind_event_context(sender=None, **kwargs):
 @signals.task_postrun.connect
 def unbind_event_context(sender=None, **kwargs):
     reset_event_context()
+    log_context.stop_memo()
+
+
+# Generation counters of response cache are incremented on save, before the task
+# transaction is committed, so they are incremented again after the task is finished.
+@signals.task_prerun.connect
+def track_response_cache_bumps(sender=None, **kwargs):
+    # models are not loaded yet when this module is imported by worker
+    from nodeconductor.core.cache import response_cache
+    response_cache.track_bumps()
+
+
+@signals.task_postrun.connect
+def repeat_response_cache_bumps(sender=None, **kwargs):
+    from nodeconductor.core.cache import response_cache
+    response_cache.repeat_bumps()
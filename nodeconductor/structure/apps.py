@@ -7,6 +7,7 @@ from django_fsm import signals as fsm_signals
 
 from nodeconductor.core.models import SshPublicKey
 from nodeconductor.quotas import handlers as quotas_handlers
+from nodeconductor.quotas.reconciliation import QuotaSourcesRegister, CountQuotaSource
 from nodeconductor.structure.models import Resource, ServiceProjectLink, Service, set_permissions_for_model
 from nodeconductor.structure import handlers
 from nodeconductor.structure import signals as structure_signals
@@ -142,6 +143,21 @@ class StructureConfig(AppConfig):
                 dispatch_uid='nodeconductor.structure.handlers.%s' % name,
             )
 
+        for model in structure_models_with_roles:
+            structure_signals.structure_role_granted.connect(
+                handlers.update_customer_memberships,
+                sender=model,
+                dispatch_uid='nodeconductor.structure.handlers.add_customer_membership_on_%s_role_grant' % (
+                    model.__name__),
+            )
+
+            structure_signals.structure_role_revoked.connect(
+                handlers.update_customer_memberships,
+                sender=model,
+                dispatch_uid='nodeconductor.structure.handlers.remove_customer_membership_on_%s_role_revoke' % (
+                    model.__name__),
+            )
+
         structure_signals.structure_role_granted.connect(
             handlers.log_customer_role_granted,
             sender=Customer,
@@ -366,3 +382,24 @@ class StructureConfig(AppConfig):
                 dispatch_uid='nodeconductor.structure.handlers.delete_service_settings_{}_{}'.format(
                                 service_model.__name__, index),
             )
+
+        # quotas usage sources for reconciliation
+        CustomerMembership = self.get_model('CustomerMembership')
+        QuotaSourcesRegister.register(Customer, 'nc_project_count', CountQuotaSource(Project, 'customer'))
+        QuotaSourcesRegister.register(Customer, 'nc_user_count', CountQuotaSource(CustomerMembership, 'customer'))
+
+        for service_model in Service.get_all_models():
+            QuotaSourcesRegister.register(
+                Customer, 'nc_service_count', CountQuotaSource(service_model, 'customer'))
+
+        for spl_model in ServiceProjectLink.get_all_models():
+            QuotaSourcesRegister.register(
+                Project, 'nc_service_project_link_count', CountQuotaSource(spl_model, 'project'))
+            QuotaSourcesRegister.register(
+                Customer, 'nc_service_project_link_count', CountQuotaSource(spl_model, 'project__customer'))
+
+        for resource_model in Resource.get_all_models():
+            QuotaSourcesRegister.register(
+                Project, 'nc_resource_count', CountQuotaSource(resource_model, resource_model.Permissions.project_path))
+            QuotaSourcesRegister.register(
+                Customer, 'nc_resource_count', CountQuotaSource(resource_model, resource_model.Permissions.customer_path))
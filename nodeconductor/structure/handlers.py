@@ -13,8 +13,9 @@ from nodeconductor.quotas import handlers as quotas_handlers
 from nodeconductor.structure import SupportedServices, ServiceBackendNotImplemented, signals
 from nodeconductor.structure.log import event_logger
 from nodeconductor.structure.managers import filter_queryset_for_user
-from nodeconductor.structure.models import (CustomerRole, Project, ProjectRole, ProjectGroupRole,
-                                            Customer, ProjectGroup, ServiceProjectLink, ServiceSettings, Service)
+from nodeconductor.structure.models import (CustomerRole, Project, ProjectRole, ProjectGroupRole, Customer,
+                                            CustomerMembership, ProjectGroup, ServiceProjectLink, ServiceSettings,
+                                            Service)
 from nodeconductor.structure.utils import serialize_ssh_key, serialize_user
 
 
@@ -396,6 +397,42 @@ def change_customer_nc_users_quota(sender, structure, user, role, signal, **kwar
             customer.add_quota_usage('nc_user_count', -1)
 
 
+def update_customer_memberships(sender, structure, user, role, signal, **kwargs):
+    """ Keep user to customer membership index in sync on structure role grant or revoke """
+    assert signal in (signals.structure_role_granted, signals.structure_role_revoked), \
+        'Handler "update_customer_memberships" has to be used only with structure_role signals'
+    assert sender in (Customer, Project, ProjectGroup), \
+        'Handler "update_customer_memberships" works only with Project, Customer and ProjectGroup models'
+
+    if sender == Customer:
+        customer = structure
+    elif sender in (Project, ProjectGroup):
+        customer = structure.customer
+
+    if signal == signals.structure_role_granted:
+        CustomerMembership.objects.get_or_create(customer=customer, user=user)
+    elif not _has_other_customer_roles(customer, user, structure, role):
+        CustomerMembership.objects.filter(customer=customer, user=user).delete()
+
+
+def _has_other_customer_roles(customer, user, structure, role_type):
+    """ Check if user has roles in customer, its projects or project groups except the revoked one.
+        Role is revoked before membership deletion, so it is excluded explicitly.
+    """
+    roles_querysets = (
+        (Customer, CustomerRole.objects.filter(customer=customer), 'customer'),
+        (Project, ProjectRole.objects.filter(project__customer=customer), 'project'),
+        (ProjectGroup, ProjectGroupRole.objects.filter(project_group__customer=customer), 'project_group'),
+    )
+    for model, queryset, field in roles_querysets:
+        queryset = queryset.filter(permission_group__user=user)
+        if isinstance(structure, model):
+            queryset = queryset.exclude(**{field: structure, 'role_type': role_type})
+        if queryset.exists():
+            return True
+    return False
+
+
 def log_resource_created(sender, instance, created=False, **kwargs):
     if not created:
         return
@@ -5,6 +5,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand
 from django.db import models as django_models
 
+from nodeconductor.core.cache import response_cache
 from nodeconductor.quotas import models as quotas_models
 from nodeconductor.structure import models, SupportedServices
 
@@ -23,6 +24,7 @@ class Command(BaseCommand):
         project_ct = ContentType.objects.get_for_model(models.Project)
         quotas_models.Quota.objects.filter(
             name='nc_resource_count', content_type__in=[project_ct, customer_ct]).update(usage=0)
+        response_cache.invalidate_model(quotas_models.Quota)
         self.stdout.write('... Done')
 
         self.stdout.write('Calculating new nc_resource_count quotas values ...')
@@ -37,6 +39,7 @@ class Command(BaseCommand):
         project_ct = ContentType.objects.get_for_model(models.Project)
         quotas_models.Quota.objects.filter(
             name='nc_service_project_link_count', content_type=project_ct).update(usage=0)
+        response_cache.invalidate_model(quotas_models.Quota)
         self.stdout.write('... Done')
 
         self.stdout.write('Calculating new nc_service_project_link_count quotas values ...')
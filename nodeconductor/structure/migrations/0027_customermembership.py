@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+def init_customer_memberships(apps, schema_editor):
+    CustomerRole = apps.get_model('structure', 'CustomerRole')
+    ProjectRole = apps.get_model('structure', 'ProjectRole')
+    ProjectGroupRole = apps.get_model('structure', 'ProjectGroupRole')
+    CustomerMembership = apps.get_model('structure', 'CustomerMembership')
+
+    role_customer_paths = (
+        (CustomerRole, 'customer'),
+        (ProjectRole, 'project__customer'),
+        (ProjectGroupRole, 'project_group__customer'),
+    )
+
+    memberships = set()
+    for model, customer_path in role_customer_paths:
+        memberships.update(
+            model.objects
+            .filter(permission_group__user__isnull=False)
+            .values_list(customer_path, 'permission_group__user'))
+
+    CustomerMembership.objects.bulk_create([
+        CustomerMembership(customer_id=customer_id, user_id=user_id)
+        for customer_id, user_id in memberships
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('structure', '0026_add_error_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerMembership',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('customer', models.ForeignKey(related_name='memberships', to='structure.Customer')),
+                ('user', models.ForeignKey(related_name='customer_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='customermembership',
+            unique_together=set([('customer', 'user')]),
+        ),
+        migrations.RunPython(init_customer_memberships),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from nodeconductor.core.indexes import CreateIndex, EnableExtension
+
+
+def trigram_index(model_name, field_name):
+    """ Index of icontains lookups, they are translated to UPPER(field::text) LIKE UPPER(%value%) on PostgreSQL """
+    return CreateIndex(
+        name='structure_%s_%s_trgm_idx' % (model_name, field_name),
+        model_name=model_name,
+        columns=[('UPPER(%s::text)' % field_name, 'gin_trgm_ops')],
+        method='gin',
+        vendors=('postgresql',),
+        extension='pg_trgm',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('structure', '0027_customermembership'),
+    ]
+
+    operations = [
+        EnableExtension('pg_trgm'),
+        trigram_index('customer', 'name'),
+        trigram_index('customer', 'native_name'),
+        trigram_index('customer', 'abbreviation'),
+        trigram_index('project', 'name'),
+        trigram_index('projectgroup', 'name'),
+    ]
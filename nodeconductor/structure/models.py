@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 import yaml
 
 from django.apps import apps
+from django.conf import settings as django_settings
 from django.core.validators import MaxLengthValidator
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
@@ -490,6 +491,21 @@ class ProjectGroup(core_models.UuidMixin,
         return {'project_group_uuid': filter_queryset_for_user(cls.objects.all(), user).values_list('uuid', flat=True)}
 
 
+class CustomerMembership(models.Model):
+    """
+    Denormalised index of users connected to a customer via any of
+    customer, project or project group roles.
+
+    Kept in sync by structure role signal handlers so that user directory
+    lookups do not need to join through all role tables.
+    """
+    class Meta(object):
+        unique_together = ('customer', 'user')
+
+    customer = models.ForeignKey(Customer, related_name='memberships')
+    user = models.ForeignKey(django_settings.AUTH_USER_MODEL, related_name='customer_memberships')
+
+
 @python_2_unicode_compatible
 class ServiceSettings(core_models.UuidMixin,
                       core_models.NameMixin,
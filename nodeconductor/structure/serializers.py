@@ -1,6 +1,6 @@
 from __future__ import unicode_literals
 
-from collections import OrderedDict
+from collections import Counter, OrderedDict, defaultdict
 from django.core.validators import RegexValidator, MaxLengthValidator
 from django.contrib import auth
 from django.db import models as django_models
@@ -12,6 +12,7 @@ from rest_framework.reverse import reverse
 
 from nodeconductor.core import serializers as core_serializers
 from nodeconductor.core import models as core_models
+from nodeconductor.core import timeseries
 from nodeconductor.core import utils as core_utils
 from nodeconductor.core.tasks import send_task
 from nodeconductor.core.fields import MappedChoiceField
@@ -130,6 +131,10 @@ class NestedServiceProjectLinkSerializer(serializers.Serializer):
         """
         Count total number of all resources connected to link
         """
+        if hasattr(link, 'resources_count'):
+            # counted by ServiceProjectLinksField for a page of projects
+            return link.resources_count
+
         total = 0
         for model in SupportedServices.get_service_resources(link.service):
             # Format query path from resource to service project link
@@ -138,6 +143,44 @@ class NestedServiceProjectLinkSerializer(serializers.Serializer):
         return total
 
 
+class ServiceProjectLinksField(core_serializers.PrefetchedField):
+    """
+    Service project links of projects with counts of their resources,
+    loaded with one query per service and resource model for a page of projects.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['empty_value'] = []
+        super(ServiceProjectLinksField, self).__init__(**kwargs)
+
+    def prefetch(self, projects, request):
+        links = defaultdict(list)
+        for service in SupportedServices.get_service_models().values():
+            link_model = service['service_project_link']
+            service_path = next(field.name for field in link_model._meta.fields
+                                if field.rel and field.rel.to is service['service'])
+            related = [service_path]
+            if any(field.name == 'settings' for field in service['service']._meta.fields):
+                related.append(service_path + '__settings')
+
+            project_links = list(link_model.objects.filter(project__in=projects).select_related(*related))
+            if not project_links:
+                continue
+
+            resources_counts = Counter()
+            for resource_model in service['resources']:
+                link_path = resource_model.Permissions.project_path.split('__')[0]
+                resources_counts.update(core_utils.get_grouped_counts(
+                    resource_model.objects.filter(**{link_path + '__in': project_links}), link_path))
+
+            for link in project_links:
+                link.resources_count = resources_counts[link.pk]
+                links[link.project_id].append(link)
+
+        return {pk: NestedServiceProjectLinkSerializer(project_links, many=True, context=self.context).data
+                for pk, project_links in links.items()}
+
+
 class ProjectSerializer(PermissionFieldFilteringMixin,
                         core_serializers.DynamicSerializer,
                         core_serializers.AugmentedSerializerMixin,
@@ -149,12 +192,12 @@ class ProjectSerializer(PermissionFieldFilteringMixin,
         default=(),
     )
 
-    quotas = quotas_serializers.QuotaSerializer(many=True, read_only=True)
+    quotas = quotas_serializers.QuotasField()
     # These fields exist for backward compatibility
     resource_quota = serializers.SerializerMethodField('get_resource_quotas')
     resource_quota_usage = serializers.SerializerMethodField('get_resource_quotas_usage')
 
-    services = NestedServiceProjectLinkSerializer(source='get_links', many=True, read_only=True)
+    services = ServiceProjectLinksField()
 
     app_count = serializers.SerializerMethodField()
     vm_count = serializers.SerializerMethodField()
@@ -246,7 +289,7 @@ class CustomerSerializer(core_serializers.DynamicSerializer,
     project_groups = serializers.SerializerMethodField()
     owners = BasicUserSerializer(source='get_owners', many=True, read_only=True)
     image = DefaultImageField(required=False, read_only=True)
-    quotas = quotas_serializers.QuotaSerializer(many=True, read_only=True)
+    quotas = quotas_serializers.QuotasField()
 
     class Meta(object):
         model = models.Customer
@@ -661,22 +704,11 @@ class CreationTimeStatsSerializer(serializers.Serializer):
     segments_count = serializers.IntegerField(min_value=0)
 
     def get_stats(self, user):
-        start_datetime = core_utils.timestamp_to_datetime(self.data['start_timestamp'])
-        end_datetime = core_utils.timestamp_to_datetime(self.data['end_timestamp'])
-
         model = self.MODEL_CLASSES[self.data['model_name']]
         filtered_queryset = filter_queryset_for_user(model.objects.all(), user)
-        created_datetimes = (
-            filtered_queryset
-            .filter(created__gte=start_datetime, created__lte=end_datetime)
-            .values('created')
-            .annotate(count=django_models.Count('id', distinct=True)))
-
-        time_and_value_list = [
-            (core_utils.datetime_to_timestamp(dt['created']), dt['count']) for dt in created_datetimes]
 
-        return core_utils.format_time_and_value_to_segment_list(
-            time_and_value_list, self.data['segments_count'],
+        return timeseries.count_by_buckets(
+            filtered_queryset, 'created', self.data['segments_count'],
             self.data['start_timestamp'], self.data['end_timestamp'])
 
 
@@ -7,7 +7,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 from celery import shared_task
 
-from nodeconductor.core.tasks import transition, retry_if_false, save_error_message
+from nodeconductor.core.tasks import coalesced_task, transition, retry_if_false, save_error_message
 from nodeconductor.core.models import SshPublicKey, SynchronizationStates
 from nodeconductor.iaas.backend import CloudBackendError
 from nodeconductor.structure.log import event_logger
@@ -114,6 +114,10 @@ def sync_service_project_links(service_project_links=None, quotas=None, initial=
 
     for obj in link_objects:
         service_project_link_str = obj.to_string()
+        if begin_syncing_service_project_links.is_pending(service_project_link_str):
+            logger.info('Skip syncing of SPL %s, previous sync is not finished yet', service_project_link_str)
+            continue
+
         if initial:
             # Ignore SPLs with ERRED service settings
             if obj.service.settings.state == SynchronizationStates.ERRED:
@@ -187,7 +191,7 @@ def sync_service_settings_failed(settings_uuid, transition_entity=None):
     pass
 
 
-@shared_task
+@coalesced_task
 def begin_syncing_service_project_links(service_project_link_str, quotas=None, initial=False,
                                         transition_entity=None, transition_method='begin_syncing'):
     spl_model, spl_pk = models.ServiceProjectLink.parse_model_string(service_project_link_str)
@@ -3,11 +3,15 @@ from __future__ import unicode_literals
 from mock import call
 
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from mock_django import mock_signal_receiver
 from rest_framework import status
 from rest_framework import test
 
+from nodeconductor.iaas.tests import factories as iaas_factories
+from nodeconductor.openstack.tests import factories as openstack_factories
 from nodeconductor.structure import signals
 from nodeconductor.structure.models import CustomerRole
 from nodeconductor.structure.models import Project
@@ -160,6 +164,47 @@ class ProjectFilterTest(test.APITransactionTestCase):
             self.assertEqual(len(response.data), 1, 'Expected project to be returned when ordering by %s' % ordering)
 
 
+class ProjectListQueriesTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        self.staff = factories.UserFactory(is_staff=True)
+        self.client.force_authenticate(self.staff)
+
+    def create_project(self):
+        project = factories.ProjectFactory()
+        iaas_factories.CloudProjectMembershipFactory(project=project)
+        link = openstack_factories.OpenStackServiceProjectLinkFactory(project=project)
+        openstack_factories.InstanceFactory(service_project_link=link)
+
+    def count_queries(self, tables):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(factories.ProjectFactory.get_list_url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len([query for query in context.captured_queries
+                    if any('FROM "%s"' % table in query['sql'] for table in tables)])
+
+    def test_clouds_quotas_and_services_are_loaded_once_per_page(self):
+        tables = ('iaas_cloud', 'iaas_cloudprojectmembership', 'openstack_openstackserviceprojectlink')
+        self.create_project()
+        queries = self.count_queries(tables)
+
+        for _ in range(3):
+            self.create_project()
+
+        self.assertEqual(self.count_queries(tables), queries)
+
+    def test_quotas_are_loaded_with_one_query(self):
+        self.create_project()
+        self.create_project()
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(factories.ProjectFactory.get_list_url())
+
+        quotas_queries = [query for query in context.captured_queries
+                          if 'SELECT "quotas_quota"."id"' in query['sql']]
+        self.assertEqual(len(quotas_queries), 1)
+
+
 class ProjectCreateUpdateDeleteTest(test.APITransactionTestCase):
 
     def setUp(self):
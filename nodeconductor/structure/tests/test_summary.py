@@ -0,0 +1,38 @@
+from __future__ import unicode_literals
+
+import json
+
+from mock import Mock, patch
+from rest_framework import test
+
+from nodeconductor.structure.tests import factories
+
+
+class ResourceSummaryStreamingTest(test.APITransactionTestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(factories.UserFactory(is_staff=True))
+        self.url = 'http://testserver/api/resources/'
+        self.items = [{'name': 'first'}, {'name': 'second'}]
+
+        def request_api(request, url, method='GET', params=None):
+            # each resource endpoint returns the same items
+            return Mock(data=self.items if method == 'GET' else None, total=len(self.items), success=True)
+
+        patcher = patch('nodeconductor.core.views.request_api', side_effect=request_api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_summary_of_all_resources_is_streamed(self):
+        response = self.client.get(self.url, {'page_size': 'all'})
+
+        self.assertTrue(response.streaming)
+        items = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(int(response['X-Result-Count']), len(items))
+        self.assertEqual(items[:2], self.items)
+
+    def test_summary_is_paginated_by_default(self):
+        response = self.client.get(self.url)
+
+        self.assertFalse(response.streaming)
+        self.assertTrue(response.has_header('Link'))
@@ -6,7 +6,7 @@ from rest_framework import status
 from rest_framework import test
 
 from nodeconductor.core.models import User
-from nodeconductor.structure.models import CustomerRole
+from nodeconductor.structure.models import CustomerRole, CustomerMembership, ProjectRole
 from nodeconductor.structure.serializers import PasswordSerializer
 from nodeconductor.structure.tests import factories
 
@@ -530,3 +530,72 @@ class UserOrganizationApprovalApiTest(test.APITransactionTestCase):
         candidate_user = User.objects.get(username=self.users['user_with_request_to_a_customer'].username)
         self.assertTrue(candidate_user.organization == "")
         self.assertFalse(candidate_user.organization_approved, 'Organization is not approved')
+
+
+class PotentialUsersListTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.customer = factories.CustomerFactory()
+        self.project = factories.ProjectFactory(customer=self.customer)
+        self.users = {
+            'owner': factories.UserFactory(),
+            'admin': factories.UserFactory(),
+            'other_customer_owner': factories.UserFactory(),
+            'no_role': factories.UserFactory(organization='Org', organization_approved=True),
+            'staff': factories.UserFactory(is_staff=True),
+        }
+        self.customer.add_user(self.users['owner'], CustomerRole.OWNER)
+        self.project.add_user(self.users['admin'], ProjectRole.ADMINISTRATOR)
+        factories.CustomerFactory().add_user(self.users['other_customer_owner'], CustomerRole.OWNER)
+
+    def test_membership_index_is_updated_on_role_grant_and_revoke(self):
+        admin = self.users['admin']
+        self.assertTrue(CustomerMembership.objects.filter(customer=self.customer, user=admin).exists())
+
+        self.customer.add_user(admin, CustomerRole.OWNER)
+        self.project.remove_user(admin)
+        self.assertTrue(CustomerMembership.objects.filter(customer=self.customer, user=admin).exists())
+
+        self.customer.remove_user(admin)
+        self.assertFalse(CustomerMembership.objects.filter(customer=self.customer, user=admin).exists())
+
+    def test_membership_index_is_kept_if_other_role_in_the_same_project_is_revoked(self):
+        admin = self.users['admin']
+        self.project.add_user(admin, ProjectRole.MANAGER)
+
+        self.project.remove_user(admin, ProjectRole.MANAGER)
+        self.assertTrue(CustomerMembership.objects.filter(customer=self.customer, user=admin).exists())
+
+        self.project.remove_user(admin, ProjectRole.ADMINISTRATOR)
+        self.assertFalse(CustomerMembership.objects.filter(customer=self.customer, user=admin).exists())
+
+    def test_owner_sees_only_users_of_connected_customers(self):
+        response = self._get_potential_users(self.users['owner'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertItemsEqual(
+            [user['uuid'] for user in response.data],
+            [self.users['owner'].uuid.hex, self.users['admin'].uuid.hex])
+
+    def test_users_without_roles_are_found_by_approved_organization(self):
+        response = self._get_potential_users(self.users['owner'], potential_organization='Org')
+
+        self.assertIn(self.users['no_role'].uuid.hex, [user['uuid'] for user in response.data])
+        self.assertNotIn(self.users['other_customer_owner'].uuid.hex, [user['uuid'] for user in response.data])
+
+    def test_potential_users_are_paginated_by_cursor(self):
+        response = self._get_potential_users(self.users['staff'], page_size=2)
+
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response['X-Result-Count'], '3')
+        self.assertIn('rel="next"', response['Link'])
+
+        next_url = response['Link'].split(', ')[-1].split(';')[0][1:-1]
+        next_response = self.client.get(next_url)
+
+        self.assertEqual(len(next_response.data), 1)
+        self.assertNotIn('rel="next"', next_response['Link'])
+
+    def _get_potential_users(self, user, **params):
+        self.client.force_authenticate(user)
+        params['potential'] = ''
+        return self.client.get(factories.UserFactory.get_list_url(), data=params)
@@ -26,8 +26,10 @@ from rest_framework.exceptions import PermissionDenied, MethodNotAllowed, NotFou
 from rest_framework.response import Response
 
 from nodeconductor.core import filters as core_filters
+from nodeconductor.core.cache import cache_response
 from nodeconductor.core import mixins as core_mixins
 from nodeconductor.core import models as core_models
+from nodeconductor.core import pagination as core_pagination
 from nodeconductor.core import exceptions as core_exceptions
 from nodeconductor.core import serializers as core_serializers
 from nodeconductor.core.tasks import send_task
@@ -47,7 +49,7 @@ logger = logging.getLogger(__name__)
 User = auth.get_user_model()
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(core_mixins.ReadReplicaMixin, viewsets.ModelViewSet):
     """List of customers that are accessible by this user.
 
     http://nodeconductor.readthedocs.org/en/latest/api/api.html#customer-management
@@ -102,7 +104,7 @@ class CustomerImageView(generics.UpdateAPIView, generics.DestroyAPIView):
         raise PermissionDenied()
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(core_mixins.ReadReplicaMixin, viewsets.ModelViewSet):
     """List of projects that are accessible by this user.
 
     http://nodeconductor.readthedocs.org/en/latest/api/api.html#project-management
@@ -157,6 +159,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    # services field counts resources of links, clouds field is added by iaas application
+    @cache_response(models=('structure.Customer', 'structure.Project', 'structure.ProjectGroup',
+                            'structure.Service', 'structure.ServiceSettings', 'structure.ServiceProjectLink',
+                            'structure.Resource', 'iaas.Cloud', 'quotas.Quota'))
+    def list(self, request, *args, **kwargs):
+        return super(ProjectViewSet, self).list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         customer = serializer.validated_data['customer']
         project_groups = serializer.validated_data['project_groups']
@@ -252,19 +261,11 @@ class UserViewSet(viewsets.ModelViewSet):
 
         # TODO: refactor to a separate endpoint or structure
         # a special query for all users with assigned privileges that the current user can remove privileges from
-        if (not django_settings.NODECONDUCTOR.get('SHOW_ALL_USERS', True) and not user.is_staff) or \
-            'potential' in self.request.query_params:
+        if self.is_potential_users_query():
             connected_customers_query = models.Customer.objects.all()
             # is user is not staff, allow only connected customers
             if not user.is_staff:
-                # XXX: Let the DB cry...
-                connected_customers_query = connected_customers_query.filter(
-                    Q(roles__permission_group__user=user)
-                    |
-                    Q(projects__roles__permission_group__user=user)
-                    |
-                    Q(project_groups__roles__permission_group__user=user)
-                ).distinct()
+                connected_customers_query = connected_customers_query.filter(memberships__user=user)
 
             # check if we need to filter potential users by a customer
             potential_customer = self.request.query_params.get('potential_customer')
@@ -272,36 +273,27 @@ class UserViewSet(viewsets.ModelViewSet):
                 connected_customers_query = connected_customers_query.filter(uuid=potential_customer)
                 connected_customers_query = filter_queryset_for_user(connected_customers_query, user)
 
-            connected_customers = list(connected_customers_query.all())
             potential_organization = self.request.query_params.get('potential_organization')
             if potential_organization is not None:
                 potential_organizations = potential_organization.split(',')
             else:
                 potential_organizations = []
 
+            # Semi-joins over the customer membership index, no DISTINCT over role joins needed
+            connected_users = models.CustomerMembership.objects.filter(
+                customer__in=connected_customers_query.values('pk')).values('user_id')
+            users_with_roles = models.CustomerMembership.objects.values('user_id')
+
             queryset = queryset.filter(is_staff=False).filter(
                 # customer users
-                Q(
-                    groups__customerrole__customer__in=connected_customers,
-                )
-                |
-                Q(
-                    groups__projectrole__project__customer__in=connected_customers,
-                )
-                |
-                Q(
-                    groups__projectgrouprole__project_group__customer__in=connected_customers,
-                )
+                Q(pk__in=connected_users)
                 |
                 # users with no role
-                Q(
-                    groups__customerrole=None,
-                    groups__projectrole=None,
-                    groups__projectgrouprole=None,
-                    organization_approved=True,
-                    organization__in=potential_organizations,
+                (
+                    Q(organization_approved=True, organization__in=potential_organizations) &
+                    ~Q(pk__in=users_with_roles)
                 )
-            ).distinct()
+            )
 
         organization_claimed = self.request.query_params.get('organization_claimed')
         if organization_claimed is not None:
@@ -314,6 +306,17 @@ class UserViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def is_potential_users_query(self):
+        return (not django_settings.NODECONDUCTOR.get('SHOW_ALL_USERS', True) and not self.request.user.is_staff) or \
+            'potential' in self.request.query_params
+
+    @property
+    def paginator(self):
+        # Potential users search is paginated by keyset to avoid deep OFFSET scans over the user table
+        if not hasattr(self, '_paginator') and self.is_potential_users_query():
+            self._paginator = core_pagination.CursorLinkHeaderPagination()
+        return super(UserViewSet, self).paginator
+
     @detail_route(methods=['post'])
     def password(self, request, uuid=None):
         user = self.get_object()
@@ -604,7 +607,7 @@ class CustomerPermissionViewSet(mixins.CreateModelMixin,
         affected_customer.remove_user(affected_user, role)
 
 
-class CreationTimeStatsView(views.APIView):
+class CreationTimeStatsView(core_mixins.ReadReplicaMixin, views.APIView):
 
     def get(self, request, format=None):
         month = 60 * 60 * 24 * 30
@@ -680,6 +683,10 @@ class ResourceViewSet(BaseSummaryView):
 
     params = filters.BaseResourceFilter.Meta.fields
 
+    @cache_response(models=('structure.Resource', 'structure.ServiceProjectLink', 'structure.Service'))
+    def list(self, request):
+        return super(ResourceViewSet, self).list(request)
+
     def get_urls(self, request):
         types = request.query_params.getlist('resource_type', [])
         resources = SupportedServices.get_resources(request).items()
@@ -689,6 +696,7 @@ class ResourceViewSet(BaseSummaryView):
             return [url for (type, url) in resources]
 
     @list_route()
+    @cache_response(models=('structure.Resource', 'structure.ServiceProjectLink', 'structure.Service'))
     def count(self, request):
         """
         Count resources by type. Example output:
@@ -722,6 +730,10 @@ class ServicesViewSet(BaseSummaryView):
 
     params = filters.BaseServiceFilter.Meta.fields
 
+    @cache_response(models=('structure.Service', 'structure.ServiceSettings', 'iaas.Cloud'))
+    def list(self, request):
+        return super(ServicesViewSet, self).list(request)
+
     def get_urls(self, request):
         return SupportedServices.get_services(request).values()
 
@@ -937,7 +949,8 @@ def safe_operation(valid_state=None):
     return decorator
 
 
-class BaseResourceViewSet(UpdateOnlyByPaidCustomerMixin,
+class BaseResourceViewSet(core_mixins.ReadReplicaMixin,
+                          UpdateOnlyByPaidCustomerMixin,
                           core_mixins.UserContextMixin,
                           viewsets.ModelViewSet):
 
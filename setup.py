@@ -10,6 +10,9 @@ dev_requires = [
 tests_requires = [
     'ddt>=1.0.0',
     'factory_boy==2.4.1',
+    # the last fakeredis compatible with redis==2.10.3, lupa runs Lua scripts of semaphores
+    'fakeredis==0.13.1',
+    'lupa==1.9',
     'mock==1.0.1',
     'mock-django==0.6.6',
     'six>=1.9.0',